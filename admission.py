@@ -0,0 +1,237 @@
+import datetime
+import logging
+import math
+import os
+from collections import Counter
+from functools import wraps
+
+from flask import request, jsonify
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models import OptimizationTicket, OptimizationSlot, TicketStatus
+from utils import get_current_project
+
+# Optimizations allowed to run at once across all web workers; keep it below the
+# gunicorn worker count so page requests always find a free worker
+MAX_CONCURRENT_OPTIMIZATIONS = int(os.environ.get('MAX_CONCURRENT_OPTIMIZATIONS', 2))
+QUEUE_TICKET_TTL = 30  # Seconds a queued ticket survives without a retry from its client
+RUNNING_TICKET_TTL = 30 * 60  # Seconds after which a running ticket's worker is presumed dead
+DONE_TICKET_TTL = 24 * 60 * 60  # Seconds finished tickets are kept for runtime estimates
+RETRY_AFTER_SECONDS = 3  # Polling interval suggested to queued clients
+DEFAULT_RUNTIME_SECONDS = 30.0  # Runtime estimate before any optimization has finished
+RUNTIME_SAMPLE = 20  # Recent runs the runtime estimate is based on
+
+
+def _expire(now):
+    """Drop abandoned queued tickets, free the slots of dead workers and forget old finished runs."""
+    OptimizationTicket.query.filter(
+        OptimizationTicket.status == TicketStatus.QUEUED,
+        OptimizationTicket.last_seen_at < now - datetime.timedelta(seconds=QUEUE_TICKET_TTL)
+    ).delete(synchronize_session=False)
+
+    stale = [ticket_id for ticket_id, in db.session.query(OptimizationTicket.id).filter(
+        OptimizationTicket.status == TicketStatus.RUNNING,
+        OptimizationTicket.started_at < now - datetime.timedelta(seconds=RUNNING_TICKET_TTL)
+    )]
+    if stale:
+        logging.warning(f"Releasing {len(stale)} optimizer slots held longer than {RUNNING_TICKET_TTL}s")
+        OptimizationSlot.query.filter(OptimizationSlot.ticket_id.in_(stale)).update(
+            {'ticket_id': None, 'claimed_at': None}, synchronize_session=False
+        )
+        OptimizationTicket.query.filter(OptimizationTicket.id.in_(stale)).update(
+            {'status': TicketStatus.DONE, 'finished_at': now}, synchronize_session=False
+        )
+
+    OptimizationTicket.query.filter(
+        OptimizationTicket.status == TicketStatus.DONE,
+        OptimizationTicket.finished_at < now - datetime.timedelta(seconds=DONE_TICKET_TTL)
+    ).delete(synchronize_session=False)
+
+
+def ensure_slots():
+    """Create the slot rows up to MAX_CONCURRENT_OPTIMIZATIONS (run at start-up by every web worker)."""
+    existing = {slot_id for slot_id, in db.session.query(OptimizationSlot.id)}
+    missing = [slot_id for slot_id in range(1, MAX_CONCURRENT_OPTIMIZATIONS + 1) if slot_id not in existing]
+    if not missing:
+        return
+    try:
+        db.session.add_all(OptimizationSlot(id=slot_id) for slot_id in missing)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker starting at the same time created them
+        db.session.rollback()
+
+
+def _free_slots():
+    """Ids of the unclaimed slots; slots beyond the current cap are ignored."""
+    return [slot_id for slot_id, in db.session.query(OptimizationSlot.id).filter(
+        OptimizationSlot.id <= MAX_CONCURRENT_OPTIMIZATIONS,
+        OptimizationSlot.ticket_id.is_(None)
+    ).order_by(OptimizationSlot.id)]
+
+
+def _fair_queue():
+    """
+    Queued tickets in the order they will be admitted.
+
+    Projects take turns: a ticket's turn is the number of its project's
+    tickets running or queued ahead of it, and ties go to the older ticket.
+    One project pressing Optimize five times therefore cannot hold back
+    another project's single request.
+    """
+    running = Counter(project_id for project_id, in db.session.query(OptimizationTicket.project_id).filter(
+        OptimizationTicket.status == TicketStatus.RUNNING
+    ))
+    queued = OptimizationTicket.query.filter_by(status=TicketStatus.QUEUED).order_by(
+        OptimizationTicket.created_at, OptimizationTicket.id
+    ).all()
+
+    ahead = Counter()
+    keyed = []
+    for ticket in queued:
+        keyed.append((running[ticket.project_id] + ahead[ticket.project_id], ticket.created_at, ticket.id, ticket))
+        ahead[ticket.project_id] += 1
+    return [ticket for *_, ticket in sorted(keyed, key=lambda key: key[:3])]
+
+
+def _average_runtime():
+    """Mean runtime of recent optimizations in seconds."""
+    recent = db.session.query(OptimizationTicket.started_at, OptimizationTicket.finished_at).filter(
+        OptimizationTicket.status == TicketStatus.DONE,
+        OptimizationTicket.started_at.isnot(None)
+    ).order_by(OptimizationTicket.finished_at.desc()).limit(RUNTIME_SAMPLE).all()
+    runtimes = [(finished - started).total_seconds() for started, finished in recent if finished]
+    return sum(runtimes) / len(runtimes) if runtimes else DEFAULT_RUNTIME_SECONDS
+
+
+def _status(queue, position, running):
+    """Queue state as reported to clients; position is 1-based (None when not queued)."""
+    waits_for = position if position is not None else len(queue) + 1
+    return {
+        'position': position,
+        'queue_depth': len(queue),
+        'running': running,
+        'capacity': MAX_CONCURRENT_OPTIMIZATIONS,
+        'estimated_wait_seconds': round(math.ceil(waits_for / MAX_CONCURRENT_OPTIMIZATIONS) * _average_runtime())
+    }
+
+
+def request_slot(project_id, user_id, ticket_id=None):
+    """
+    Admit an optimization request now or keep it in the queue.
+
+    A client that was queued retries with its ticket id to keep its place;
+    the same user submitting again for the same project also keeps theirs.
+    Slots are claimed with a conditional update, so two workers can never
+    take the same slot.
+
+    Args:
+        project_id: Project the optimization is for
+        user_id: User who requested it
+        ticket_id: Ticket returned by an earlier queued response (optional)
+
+    Returns:
+        Tuple of (ticket, status dict); status['admitted'] is True when the caller may run
+        and must call release(ticket.id) afterwards
+    """
+    now = datetime.datetime.utcnow()
+    _expire(now)
+
+    ticket = None
+    if ticket_id:
+        ticket = OptimizationTicket.query.filter_by(
+            id=ticket_id, project_id=project_id, user_id=user_id, status=TicketStatus.QUEUED
+        ).first()
+    if ticket is None:
+        ticket = OptimizationTicket.query.filter_by(
+            project_id=project_id, user_id=user_id, status=TicketStatus.QUEUED
+        ).first()
+    if ticket is None:
+        ticket = OptimizationTicket(project_id=project_id, user_id=user_id, created_at=now)
+        db.session.add(ticket)
+    ticket.last_seen_at = now
+    db.session.flush()
+
+    queue = _fair_queue()
+    position = queue.index(ticket)
+    free_slots = _free_slots()
+    if position < len(free_slots):
+        for slot_id in free_slots:
+            claimed = OptimizationSlot.query.filter_by(id=slot_id, ticket_id=None).update(
+                {'ticket_id': ticket.id, 'claimed_at': now}, synchronize_session=False
+            )
+            if claimed:
+                ticket.status = TicketStatus.RUNNING
+                ticket.started_at = now
+                db.session.commit()
+                return ticket, {'admitted': True, 'ticket': ticket.id}
+
+    running = MAX_CONCURRENT_OPTIMIZATIONS - len(free_slots)
+    db.session.commit()
+    status = _status(queue, position + 1, running)
+    status.update({'admitted': False, 'ticket': ticket.id})
+    return ticket, status
+
+
+def release(ticket_id):
+    """Give a running ticket's slot back and record its runtime."""
+    OptimizationSlot.query.filter_by(ticket_id=ticket_id).update(
+        {'ticket_id': None, 'claimed_at': None}, synchronize_session=False
+    )
+    OptimizationTicket.query.filter_by(id=ticket_id).update(
+        {'status': TicketStatus.DONE, 'finished_at': datetime.datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+def queue_status(ticket_id=None):
+    """Current queue depth and wait estimate, with the position of a ticket if given."""
+    _expire(datetime.datetime.utcnow())
+    queue = _fair_queue()
+    running = MAX_CONCURRENT_OPTIMIZATIONS - len(_free_slots())
+    db.session.commit()
+    positions = {ticket.id: i + 1 for i, ticket in enumerate(queue)}
+    return _status(queue, positions.get(ticket_id), running)
+
+
+def admission_controlled(view):
+    """
+    Run an optimization endpoint only when a slot is free.
+
+    Excess requests get an immediate 429 with their ticket, queue position
+    and estimated wait instead of tying up a web worker. The client retries
+    with the same payload plus the ticket (JSON 'ticket' field).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        project = get_current_project()
+        if not project:
+            return view(*args, **kwargs)
+
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            # Any other JSON (a list, a number) carries no ticket; the view rejects it itself
+            payload = {}
+        try:
+            ticket_id = int(payload.get('ticket')) if payload.get('ticket') is not None else None
+        except (TypeError, ValueError):
+            ticket_id = None
+
+        ticket, status = request_slot(project.id, current_user.id, ticket_id)
+        if not status['admitted']:
+            status.update({'success': False, 'queued': True,
+                           'message': f"The optimizer is busy; your request is number {status['position']} in the queue."})
+            response = jsonify(status)
+            response.status_code = 429
+            response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+            return response
+
+        ticket_id = ticket.id
+        try:
+            return view(*args, **kwargs)
+        finally:
+            db.session.rollback()  # Leave no half-finished transaction in the way of the release
+            release(ticket_id)
+    return wrapper
@@ -55,12 +55,42 @@ def load_user(user_id):
     from models import User
     return User.query.get(int(user_id))
 
+def _discard_inherited_connections():
+    """Give a forked child (optimizer pool worker) its own empty connection pool."""
+    with app.app_context():
+        # close=False: the parent still owns those connections, so don't touch them
+        db.engine.dispose(close=False)
+
+# Optimizer pools (instance_solvers.solve_many, nightly re-optimization) fork from
+# web workers that hold open database connections; children must never reuse them
+os.register_at_fork(after_in_child=_discard_inherited_connections)
+
 with app.app_context():
     # Import models to register them with SQLAlchemy
     import models
     
     # Create database tables
     db.create_all()
+    
+    # Bring tables created by earlier versions up to date (columns, indexes)
+    from migrations import run_migrations
+    run_migrations()
+    
+    # Index actor bookings of schedules saved before the cross-project index existed
+    from booking_index import backfill_bookings
+    backfill_bookings()
+    
+    # Compute call sheets of schedules saved before they were stored
+    from call_sheets import backfill_call_sheets
+    backfill_call_sheets()
+    
+    # Fold availability stored one row per day by earlier versions into ranges
+    from availability_store import migrate_day_rows
+    migrate_day_rows()
+    
+    # Slot rows the optimization admission controller hands out
+    from admission import ensure_slots
+    ensure_slots()
 
     # Import and register routes
     from routes import register_routes
@@ -0,0 +1,269 @@
+import datetime
+import logging
+from collections import defaultdict
+
+from app import db
+from models import (
+    Actor, Location, ActorAvailability, LocationAvailability,
+    ActorAvailabilityRange, LocationAvailabilityRange
+)
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+class _RangeStore:
+    """A range table: its model, the entity column and the status columns a run must share to merge."""
+
+    def __init__(self, model, entity, owner, fields):
+        self.model = model
+        self.entity = entity
+        self.owner = owner
+        self.fields = fields
+
+    @property
+    def entity_column(self):
+        return getattr(self.model, self.entity)
+
+
+ACTOR_STORE = _RangeStore(ActorAvailabilityRange, 'actor_id', Actor, ('is_available',))
+LOCATION_STORE = _RangeStore(LocationAvailabilityRange, 'location_id', Location,
+                             ('is_available', 'start_time', 'end_time'))
+
+
+def encode_runs(days):
+    """
+    Collapse a {date: status} dict into runs of consecutive days with equal status.
+
+    Args:
+        days: Dict mapping dates to a hashable status (gaps stay gaps)
+
+    Returns:
+        List of (start_date, end_date, status) tuples in date order, end dates inclusive
+    """
+    runs = []
+    for date in sorted(days):
+        status = days[date]
+        if runs and runs[-1][2] == status and runs[-1][1] + ONE_DAY == date:
+            runs[-1][1] = date
+        else:
+            runs.append([date, date, status])
+    return [tuple(run) for run in runs]
+
+
+def _upsert(store, rows):
+    """
+    Insert or update range rows on the unique (entity, start_date) key in one statement.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on SQLite and PostgreSQL and
+    falls back to a delete and insert elsewhere.
+    """
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            store.model.query.filter(
+                store.entity_column == row[store.entity], store.model.start_date == row['start_date']
+            ).delete(synchronize_session=False)
+        db.session.execute(store.model.__table__.insert(), rows)
+        return
+
+    statement = insert(store.model.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=[store.entity, 'start_date'],
+        set_={column: statement.excluded[column] for column in ('end_date',) + store.fields}
+    )
+    db.session.execute(statement, rows)
+
+
+def _write_many(store, changes):
+    """
+    Overlay per-day statuses on the ranges of many entities, re-merging the runs around them.
+
+    All ranges touching the written days (or the day either side, so
+    adjacent runs merge) are read in one query. The re-encoded runs are
+    then written with one DELETE for the runs that disappeared and one
+    upsert for the rest. The caller commits, so a whole batch is one
+    transaction.
+
+    Args:
+        store: ACTOR_STORE or LOCATION_STORE
+        changes: Dict mapping entity ids to {date: status tuple} dicts
+    """
+    changes = {entity_id: days for entity_id, days in changes.items() if days}
+    if not changes:
+        return
+    first = min(min(days) for days in changes.values()) - ONE_DAY
+    last = max(max(days) for days in changes.values()) + ONE_DAY
+    touched = db.session.query(
+        store.model.id, store.entity_column, store.model.start_date, store.model.end_date,
+        *[getattr(store.model, field) for field in store.fields]
+    ).filter(
+        store.entity_column.in_(list(changes)),
+        store.model.start_date <= last,
+        store.model.end_date >= first
+    ).all()
+
+    merged = defaultdict(dict)
+    existing = {}
+    for range_id, entity_id, start, end, *status in touched:
+        days = changes[entity_id]
+        # Only ranges within a day of this entity's own changes need re-encoding
+        if start > max(days) + ONE_DAY or end < min(days) - ONE_DAY:
+            continue
+        existing[(entity_id, start)] = range_id
+        date = start
+        while date <= end:
+            merged[entity_id][date] = tuple(status)
+            date += ONE_DAY
+    for entity_id, days in changes.items():
+        merged[entity_id].update(days)
+
+    rows = []
+    for entity_id, days in merged.items():
+        for start, end, status in encode_runs(days):
+            existing.pop((entity_id, start), None)
+            rows.append({store.entity: entity_id, 'start_date': start, 'end_date': end, **dict(zip(store.fields, status))})
+
+    # Ranges whose start no longer begins a run are gone; the others are updated in place
+    if existing:
+        store.model.query.filter(store.model.id.in_(list(existing.values()))).delete(synchronize_session=False)
+    _upsert(store, rows)
+
+
+def _date_span(start_date, end_date):
+    days = []
+    date = start_date
+    while date <= end_date:
+        days.append(date)
+        date += ONE_DAY
+    return days
+
+
+def write_actor_days(actor_id, days):
+    """
+    Record an actor's availability day by day.
+
+    Args:
+        actor_id: Actor to update
+        days: Dict mapping dates to is_available
+    """
+    write_actor_changes({actor_id: days})
+
+
+def write_location_days(location_id, days):
+    """
+    Record a location's availability day by day.
+
+    Args:
+        location_id: Location to update
+        days: Dict mapping dates to (is_available, start_time, end_time) tuples
+    """
+    write_location_changes({location_id: days})
+
+
+def write_actor_changes(changes):
+    """
+    Record the availability of many actors in one read and one write.
+
+    Args:
+        changes: Dict mapping actor ids to {date: is_available} dicts
+    """
+    _write_many(ACTOR_STORE, {
+        int(actor_id): {date: (bool(is_available),) for date, is_available in days.items()}
+        for actor_id, days in changes.items()
+    })
+
+
+def write_location_changes(changes):
+    """
+    Record the availability of many locations in one read and one write.
+
+    Args:
+        changes: Dict mapping location ids to {date: (is_available, start_time, end_time)} dicts
+    """
+    _write_many(LOCATION_STORE, {
+        int(location_id): {
+            date: (bool(is_available), start_time, end_time)
+            for date, (is_available, start_time, end_time) in days.items()
+        }
+        for location_id, days in changes.items()
+    })
+
+
+def set_actor_availability(actor_id, start_date, end_date, is_available):
+    """Set an actor's availability for every day from start_date to end_date (inclusive)."""
+    write_actor_days(actor_id, {date: is_available for date in _date_span(start_date, end_date)})
+
+
+def set_location_availability(location_id, start_date, end_date, is_available, start_time=None, end_time=None):
+    """Set a location's availability and opening hours for every day from start_date to end_date (inclusive)."""
+    write_location_days(location_id, {
+        date: (is_available, start_time, end_time) for date in _date_span(start_date, end_date)
+    })
+
+
+def _project_ranges(store, project_id, start_date=None, end_date=None):
+    """(entity_id, start_date, end_date, *status) rows of a project's ranges overlapping the dates, in one query."""
+    query = db.session.query(
+        store.entity_column, store.model.start_date, store.model.end_date,
+        *[getattr(store.model, field) for field in store.fields]
+    ).join(store.owner, store.owner.id == store.entity_column).filter(store.owner.project_id == project_id)
+    if start_date:
+        query = query.filter(store.model.end_date >= start_date)
+    if end_date:
+        query = query.filter(store.model.start_date <= end_date)
+    return query.order_by(store.entity_column, store.model.start_date).all()
+
+
+def actor_availability_ranges(project_id, start_date=None, end_date=None):
+    """(actor_id, start_date, end_date, is_available) runs of a project's actors overlapping the dates."""
+    return _project_ranges(ACTOR_STORE, project_id, start_date, end_date)
+
+
+def location_availability_ranges(project_id, start_date=None, end_date=None):
+    """(location_id, start_date, end_date, is_available, start_time, end_time) runs of a project's locations."""
+    return _project_ranges(LOCATION_STORE, project_id, start_date, end_date)
+
+
+def _expand(ranges, start_date, end_date):
+    """Per-day rows (entity_id, date, *status) of ranges, clipped to the dates."""
+    for entity_id, first, last, *status in ranges:
+        date = max(first, start_date) if start_date else first
+        last = min(last, end_date) if end_date else last
+        while date <= last:
+            yield (entity_id, date, *status)
+            date += ONE_DAY
+
+
+def actor_availability_days(project_id, start_date=None, end_date=None):
+    """The per-date view: (actor_id, date, is_available) for every day a project's actors have a status."""
+    return list(_expand(actor_availability_ranges(project_id, start_date, end_date), start_date, end_date))
+
+
+def location_availability_days(project_id, start_date=None, end_date=None):
+    """The per-date view: (location_id, date, is_available, start_time, end_time) for every day with a status."""
+    return list(_expand(location_availability_ranges(project_id, start_date, end_date), start_date, end_date))
+
+
+def migrate_day_rows():
+    """Fold per-day availability rows written by earlier versions into ranges and drop them."""
+    for store, legacy in ((ACTOR_STORE, ActorAvailability), (LOCATION_STORE, LocationAvailability)):
+        rows = db.session.query(
+            getattr(legacy, store.entity), legacy.date, *[getattr(legacy, field) for field in store.fields]
+        ).order_by(legacy.id).all()
+        if not rows:
+            continue
+
+        # Later rows win, as they did when the rows were read one at a time
+        days = defaultdict(dict)
+        for entity_id, date, *status in rows:
+            days[entity_id][date] = (bool(status[0]), *status[1:])
+        _write_many(store, days)
+        legacy.query.delete(synchronize_session=False)
+        db.session.commit()
+        logging.info(f"Folded {len(rows)} {legacy.__tablename__} rows into ranges for {len(days)} entities")
@@ -0,0 +1,144 @@
+import logging
+from collections import defaultdict
+
+from app import db
+from models import (
+    Actor, ActorScene, ActorBooking, Project, Schedule, ScheduledScene, ScheduleStatus,
+    normalize_actor_identity
+)
+
+
+def record_bookings(schedule_id, scene_dates):
+    """
+    Add index rows for the scheduled scenes just written for a schedule.
+
+    Each actor is booked once per shooting day, however many of their
+    scenes fall on it. The rows are inserted in one statement inside the
+    session's transaction; the caller commits them together with the
+    ScheduledScene rows.
+
+    Args:
+        schedule_id: Schedule the scenes belong to
+        scene_dates: List of (scene_id, shooting_date) pairs
+    """
+    scene_dates = [(scene_id, date) for scene_id, date in scene_dates if scene_id is not None and date]
+    if not scene_dates:
+        return
+
+    # One query for the cast of every scene
+    cast = defaultdict(list)
+    rows = db.session.query(ActorScene.scene_id, Actor.id, Actor.email, Actor.name).join(
+        Actor, Actor.id == ActorScene.actor_id
+    ).filter(ActorScene.scene_id.in_({scene_id for scene_id, _ in scene_dates})).all()
+    for scene_id, actor_id, email, name in rows:
+        cast[scene_id].append((actor_id, normalize_actor_identity(email, name)))
+
+    booked = {}
+    for scene_id, date in scene_dates:
+        for actor_id, identity in cast[scene_id]:
+            if (actor_id, date) not in booked:
+                booked[(actor_id, date)] = {'identity': identity, 'date': date, 'actor_id': actor_id,
+                                            'schedule_id': schedule_id}
+    if booked:
+        db.session.execute(ActorBooking.__table__.insert(), list(booked.values()))
+
+
+def refresh_identity(actor):
+    """Re-key an actor's bookings after their name or email changed."""
+    ActorBooking.query.filter_by(actor_id=actor.id).update(
+        {'identity': actor.identity}, synchronize_session=False
+    )
+
+
+def _approved_bookings_elsewhere(project_id, identities, start_date=None, end_date=None):
+    """Bookings of approved schedules in other projects for the given identities (one indexed query)."""
+    if not identities:
+        return []
+    query = db.session.query(ActorBooking, Schedule, Project).join(
+        Schedule, Schedule.id == ActorBooking.schedule_id
+    ).join(
+        Project, Project.id == Schedule.project_id
+    ).filter(
+        ActorBooking.identity.in_(identities),
+        Schedule.status == ScheduleStatus.APPROVED,
+        Schedule.project_id != project_id
+    )
+    if start_date:
+        query = query.filter(ActorBooking.date >= start_date)
+    if end_date:
+        query = query.filter(ActorBooking.date <= end_date)
+    return query.all()
+
+
+def booked_elsewhere(project_id, identities, start_date=None, end_date=None):
+    """
+    Days each actor is already booked by another project's approved schedule.
+
+    Args:
+        project_id: Project being scheduled
+        identities: Dict mapping the project's actor ids to their normalized identity
+        start_date: First date of interest (optional)
+        end_date: Last date of interest (optional)
+
+    Returns:
+        Dict mapping actor_id to a set of dates
+    """
+    actors_by_identity = defaultdict(list)
+    for actor_id, identity in identities.items():
+        actors_by_identity[identity].append(actor_id)
+
+    booked = defaultdict(set)
+    for booking, _, _ in _approved_bookings_elsewhere(project_id, list(actors_by_identity), start_date, end_date):
+        for actor_id in actors_by_identity[booking.identity]:
+            booked[actor_id].add(booking.date)
+    return dict(booked)
+
+
+def find_double_bookings(schedule):
+    """
+    Actors a schedule books on a day another project's approved schedule already has them.
+
+    Returns:
+        List of dicts with the actor, date and the conflicting schedule and project, sorted by date
+    """
+    own = ActorBooking.query.filter_by(schedule_id=schedule.id).all()
+    if not own:
+        return []
+    own_by_key = {(booking.identity, booking.date): booking for booking in own}
+    dates = [booking.date for booking in own]
+
+    conflicts = []
+    for other, other_schedule, project in _approved_bookings_elsewhere(
+            schedule.project_id, list({booking.identity for booking in own}), min(dates), max(dates)):
+        booking = own_by_key.get((other.identity, other.date))
+        if booking:
+            conflicts.append({
+                'actor_id': booking.actor_id,
+                'actor_name': booking.actor.name,
+                'date': other.date,
+                'schedule_id': other_schedule.id,
+                'schedule_name': other_schedule.name,
+                'project_name': project.name
+            })
+    conflicts.sort(key=lambda conflict: (conflict['date'], conflict['actor_name']))
+    if conflicts:
+        logging.warning(f"Schedule {schedule.id} double-books {len(conflicts)} actor-days across projects")
+    return conflicts
+
+
+def backfill_bookings():
+    """Index the scheduled scenes of schedules written before the booking index existed."""
+    indexed = db.session.query(ActorBooking.schedule_id).distinct()
+    rows = db.session.query(ScheduledScene.schedule_id, ScheduledScene.scene_id, ScheduledScene.shooting_date).filter(
+        ~ScheduledScene.schedule_id.in_(indexed)
+    ).all()
+    if not rows:
+        return
+
+    by_schedule = defaultdict(list)
+    for schedule_id, scene_id, shooting_date in rows:
+        by_schedule[schedule_id].append((scene_id, shooting_date))
+    for schedule_id, scene_dates in by_schedule.items():
+        record_bookings(schedule_id, scene_dates)
+    db.session.commit()
+    logging.info(f"Indexed actor bookings of {len(by_schedule)} existing schedules")
@@ -0,0 +1,140 @@
+import json
+import logging
+from collections import defaultdict
+
+from app import db
+from models import Actor, ActorScene, CallSheet, Location, Scene, ScheduledScene
+
+
+def _clock(value):
+    return value.strftime('%H:%M') if value else None
+
+
+def build_call_sheets(scheduled):
+    """
+    Compute the call sheet of every shooting day from a schedule's rows.
+
+    Each sheet lists the day's scenes in shooting order, the locations in
+    the order the unit reaches them, every actor's call (their earliest
+    scene start; actors whose scenes have no time come last) and the
+    day's cost.
+
+    Args:
+        scheduled: List of (scene_id, shooting_date, start_time, end_time, estimated_cost) tuples
+
+    Returns:
+        Dict mapping shooting dates to sheet dicts
+    """
+    scheduled = [row for row in scheduled if row[0] is not None and row[1]]
+    if not scheduled:
+        return {}
+    scene_ids = {row[0] for row in scheduled}
+
+    # One query for the scenes with their locations, one for the cast
+    scenes = {}
+    for scene_id, scene_number, int_ext, time_of_day, location_id, location_name, address in db.session.query(
+            Scene.id, Scene.scene_number, Scene.int_ext, Scene.time_of_day,
+            Location.id, Location.name, Location.address
+    ).outerjoin(Location, Location.id == Scene.location_id).filter(Scene.id.in_(scene_ids)):
+        scenes[scene_id] = (scene_number, int_ext, time_of_day, location_id, location_name, address)
+
+    cast = defaultdict(list)
+    for scene_id, actor_id, name, character_name in db.session.query(
+            ActorScene.scene_id, Actor.id, Actor.name, Actor.character_name
+    ).join(Actor, Actor.id == ActorScene.actor_id).filter(ActorScene.scene_id.in_(scene_ids)):
+        cast[scene_id].append((actor_id, name, character_name))
+
+    by_date = defaultdict(list)
+    for row in scheduled:
+        by_date[row[1]].append(row)
+
+    sheets = {}
+    for shooting_date, rows in by_date.items():
+        # Timed scenes in start order, then the ones slotting found no room for
+        rows.sort(key=lambda row: (row[2] is None, row[2] or 0, row[0]))
+        day_scenes, locations, calls = [], {}, {}
+        for scene_id, _, start_time, end_time, cost in rows:
+            scene_number, int_ext, time_of_day, location_id, location_name, address = scenes.get(
+                scene_id, (None, None, None, None, None, None))
+            day_scenes.append({
+                'scene_id': scene_id,
+                'scene_number': scene_number,
+                'int_ext': int_ext,
+                'time_of_day': time_of_day,
+                'location_id': location_id,
+                'start_time': _clock(start_time),
+                'end_time': _clock(end_time)
+            })
+            if location_id is not None and location_id not in locations:
+                locations[location_id] = {'location_id': location_id, 'name': location_name, 'address': address}
+
+            # Rows are in start order, so an actor's first timed scene is their call
+            for actor_id, name, character_name in cast[scene_id]:
+                call = calls.get(actor_id)
+                if call is None:
+                    call = calls[actor_id] = {
+                        'actor_id': actor_id, 'name': name, 'character_name': character_name,
+                        'call_time': day_scenes[-1]['start_time'], 'scenes': []
+                    }
+                call['scenes'].append(scene_number)
+
+        sheets[shooting_date] = {
+            'date': shooting_date.strftime('%Y-%m-%d'),
+            'cost': float(sum(row[4] or 0 for row in rows)),
+            'scenes': day_scenes,
+            'locations': list(locations.values()),
+            'calls': sorted(calls.values(), key=lambda call: (call['call_time'] is None, call['call_time'] or '', call['name']))
+        }
+    return sheets
+
+
+def record_call_sheets(schedule_id, scheduled):
+    """
+    Insert the call sheets of a schedule's rows in one statement; the caller commits them with the rows.
+
+    Args:
+        schedule_id: Schedule the rows belong to
+        scheduled: List of (scene_id, shooting_date, start_time, end_time, estimated_cost) tuples
+    """
+    sheets = [
+        {'schedule_id': schedule_id, 'shooting_date': shooting_date, 'data': json.dumps(sheet, separators=(',', ':'))}
+        for shooting_date, sheet in build_call_sheets(scheduled).items()
+    ]
+    if sheets:
+        db.session.execute(CallSheet.__table__.insert(), sheets)
+
+
+def call_sheets(schedule_id, shooting_date=None):
+    """
+    Stored call sheets of a schedule in date order (one indexed read).
+
+    Args:
+        schedule_id: Schedule to read
+        shooting_date: Only this day's sheet (optional)
+
+    Returns:
+        List of sheet dicts
+    """
+    query = db.session.query(CallSheet.data).filter(CallSheet.schedule_id == schedule_id)
+    if shooting_date:
+        query = query.filter(CallSheet.shooting_date == shooting_date)
+    return [json.loads(data) for data, in query.order_by(CallSheet.shooting_date)]
+
+
+def backfill_call_sheets():
+    """Compute the call sheets of schedules saved before they were stored."""
+    with_sheets = db.session.query(CallSheet.schedule_id).distinct()
+    rows = db.session.query(
+        ScheduledScene.schedule_id, ScheduledScene.scene_id, ScheduledScene.shooting_date,
+        ScheduledScene.start_time, ScheduledScene.end_time, ScheduledScene.estimated_cost
+    ).filter(~ScheduledScene.schedule_id.in_(with_sheets)).all()
+    if not rows:
+        return
+
+    by_schedule = defaultdict(list)
+    for schedule_id, *row in rows:
+        by_schedule[schedule_id].append(tuple(row))
+    for schedule_id, scheduled in by_schedule.items():
+        record_call_sheets(schedule_id, scheduled)
+    db.session.commit()
+    logging.info(f"Computed call sheets of {len(by_schedule)} existing schedules")
@@ -3,6 +3,7 @@ import datetime
 import os
 from app import app, db
 from models import User, Project, ProjectAccess, Scene, Actor, Location, ActorScene, Role
+from availability_store import write_actor_days, write_location_days
 
 def create_demo_screenplay():
     """
@@ -278,6 +279,7 @@ def create_demo_screenplay():
         availability_percentage = 0.6 if is_main_actor else 0.8
         
         # Generate availability for the next 30 days
+        days = {}
         for day in range(30):
             date = today + datetime.timedelta(days=day)
             
@@ -286,20 +288,15 @@ def create_demo_screenplay():
                 continue
                 
             # Randomly determine availability based on actor importance
-            is_available = random.random() < availability_percentage
-            
-            # Create availability record
-            from models import ActorAvailability
-            availability = ActorAvailability(
-                actor_id=actor.id,
-                date=date,
-                is_available=is_available
-            )
-            db.session.add(availability)
+            days[date] = random.random() < availability_percentage
+        
+        # Store the days as ranges of equal availability
+        write_actor_days(actor.id, days)
     
     # Create location availability
     for location in location_objects:
         # Generate availability for the next 30 days
+        days = {}
         for day in range(30):
             date = today + datetime.timedelta(days=day)
             
@@ -308,19 +305,11 @@ def create_demo_screenplay():
             if is_outdoor and date.weekday() >= 5 and random.random() < 0.8:
                 continue
                 
-            # Randomly determine availability (90% available)
-            is_available = random.random() < 0.9
-            
-            # Create availability record
-            from models import LocationAvailability
-            availability = LocationAvailability(
-                location_id=location.id,
-                date=date,
-                is_available=is_available,
-                start_time=datetime.time(8, 0),  # 8:00 AM
-                end_time=datetime.time(18, 0)    # 6:00 PM
-            )
-            db.session.add(availability)
+            # Randomly determine availability (90% available), open 8:00 AM to 6:00 PM
+            days[date] = (random.random() < 0.9, datetime.time(8, 0), datetime.time(18, 0))
+        
+        # Store the days as ranges of equal availability
+        write_location_days(location.id, days)
     
     db.session.commit()
     print(f"Created sample project '{project.name}' with:")
@@ -581,6 +570,7 @@ def create_sample_screenplay_for_project(project_id):
         availability_percentage = 0.6 if is_main_actor else 0.8
         
         # Generate availability for the next 30 days
+        days = {}
         for day in range(30):
             date = today + datetime.timedelta(days=day)
             
@@ -589,20 +579,15 @@ def create_sample_screenplay_for_project(project_id):
                 continue
                 
             # Randomly determine availability based on actor importance
-            is_available = random.random() < availability_percentage
-            
-            # Create availability record
-            from models import ActorAvailability
-            availability = ActorAvailability(
-                actor_id=actor.id,
-                date=date,
-                is_available=is_available
-            )
-            db.session.add(availability)
+            days[date] = random.random() < availability_percentage
+        
+        # Store the days as ranges of equal availability
+        write_actor_days(actor.id, days)
     
     # Create location availability
     for location in location_objects:
         # Generate availability for the next 30 days
+        days = {}
         for day in range(30):
             date = today + datetime.timedelta(days=day)
             
@@ -611,19 +596,11 @@ def create_sample_screenplay_for_project(project_id):
             if is_outdoor and date.weekday() >= 5 and random.random() < 0.8:
                 continue
                 
-            # Randomly determine availability (90% available)
-            is_available = random.random() < 0.9
-            
-            # Create availability record
-            from models import LocationAvailability
-            availability = LocationAvailability(
-                location_id=location.id,
-                date=date,
-                is_available=is_available,
-                start_time=datetime.time(8, 0),  # 8:00 AM
-                end_time=datetime.time(18, 0)    # 6:00 PM
-            )
-            db.session.add(availability)
+            # Randomly determine availability (90% available), open 8:00 AM to 6:00 PM
+            days[date] = (random.random() < 0.9, datetime.time(8, 0), datetime.time(18, 0))
+        
+        # Store the days as ranges of equal availability
+        write_location_days(location.id, days)
     
     db.session.commit()
     print(f"Created sample data for project '{project.name}' with:")
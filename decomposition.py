@@ -0,0 +1,255 @@
+import logging
+import os
+import time
+
+import numpy as np
+
+from problem_instance import ProblemInstance, ScheduleState
+from instance_solvers import solve_many
+from local_search import local_search
+from rng_streams import make_rng, spawn_seeds
+
+DEFAULT_TIME_LIMIT = 10.0  # Seconds for the whole run
+MERGE_TIME_SHARE = 0.2  # Share of the budget kept back for merging components
+MIN_TASK_SCENES = 40  # Small components are packed together until a task has this many scenes
+MIN_COMPONENT_TIME = 0.2  # Seconds
+MAX_BUNDLE_CANDIDATES = 10  # Days priced exactly when relocating an overbooked component bundle
+
+
+def find_components(instance):
+    """
+    Split scenes into groups that share no actors and no locations.
+
+    Builds the actor/location co-occurrence graph (a scene links every actor
+    in it and its location) and returns its connected components with
+    union-find.
+
+    Returns:
+        List of scene index arrays, largest component first
+    """
+    num_actors = instance.num_actors
+    # Graph nodes: actors first, then locations, then one node per scene
+    parent = np.arange(num_actors + instance.num_locations + instance.num_scenes)
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    scene_node = num_actors + instance.num_locations
+    for scene, actor in zip(instance.edge_scene, instance.edge_actor):
+        union(scene_node + scene, actor)
+    for scene in np.flatnonzero(instance.scene_location >= 0):
+        union(scene_node + scene, num_actors + instance.scene_location[scene])
+
+    roots = np.array([find(scene_node + scene) for scene in range(instance.num_scenes)], dtype=np.int64)
+    _, labels = np.unique(roots, return_inverse=True)
+    components = [np.flatnonzero(labels == label) for label in range(labels.max() + 1)] if len(labels) else []
+    components.sort(key=len, reverse=True)
+    return components
+
+
+def pack_components(components, min_task_scenes=MIN_TASK_SCENES):
+    """
+    Group components into worker tasks.
+
+    Large components get a task of their own; small ones are packed together
+    so a storyline of three scenes doesn't pay for a process round trip.
+    """
+    tasks = []
+    pending = []
+    pending_size = 0
+    for component in components:
+        if len(component) >= min_task_scenes:
+            tasks.append(component)
+            continue
+        pending.append(component)
+        pending_size += len(component)
+        if pending_size >= min_task_scenes:
+            tasks.append(np.concatenate(pending))
+            pending, pending_size = [], 0
+    if pending:
+        tasks.append(np.concatenate(pending))
+    return tasks
+
+
+def _bundle_move_cost(state, bundle, day):
+    """Exact cost change of moving a group of scenes onto one day."""
+    before = state.cost
+    origins = [state.remove(scene) for scene in bundle]
+    for scene in bundle:
+        state.insert(scene, day)
+    delta = state.cost - before
+    for scene in bundle:
+        state.remove(scene)
+    for scene, origin in zip(bundle, origins):
+        state.insert(scene, origin)
+    return delta
+
+
+def repair_shared_capacity(state, component_of_scene, max_candidates=MAX_BUNDLE_CANDIDATES):
+    """
+    Resolve days that the merged components overbook.
+
+    Components are optimized independently, so two of them can fill the same
+    day. On every overbooked day the smallest component's scenes are moved,
+    as one bundle, to the cheapest nearby day that has room and where all of
+    them are available, which keeps location and actor blocks intact. A
+    bundle that fits nowhere is split and its scenes reinserted one by one.
+
+    Returns:
+        Number of bundles moved
+    """
+    inst = state.instance
+    capacity = inst.day_capacity + 1e-9
+    moved = 0
+
+    for day in np.flatnonzero(state.day_hours > capacity):
+        while state.day_hours[day] > capacity:
+            day_scenes = np.flatnonzero(state.assignment == day)
+            components = np.unique(component_of_scene[day_scenes])
+            if len(components) <= 1:
+                break
+
+            bundles = [day_scenes[component_of_scene[day_scenes] == c] for c in components]
+            bundle = min(bundles, key=lambda b: inst.durations[b].sum())
+            hours = inst.durations[bundle].sum()
+
+            fits = (state.day_hours + hours <= capacity) & inst.feasible[bundle].all(axis=0)
+            fits[day] = False
+            candidates = np.flatnonzero(fits)
+            if candidates.size:
+                candidates = candidates[np.argsort(np.abs(candidates - day), kind='stable')][:max_candidates]
+                target = min(candidates, key=lambda d: _bundle_move_cost(state, bundle, int(d)))
+                for scene in bundle:
+                    state.move(scene, int(target))
+            else:
+                allowed = np.ones(inst.num_days, dtype=bool)
+                allowed[day] = False
+                for scene in bundle:
+                    state.remove(scene)
+                state.insert_greedy(bundle, allowed_days=allowed)
+            moved += 1
+    return moved
+
+
+def solve_decomposed(instance, method='large_neighborhood', time_limit=DEFAULT_TIME_LIMIT, seed=None, max_workers=None):
+    """
+    Optimize independent scene clusters in parallel and merge the results.
+
+    Args:
+        instance: ProblemInstance to optimize
+        method: Instance solver used for every component (see instance_solvers.SOLVERS)
+        time_limit: Wall clock budget in seconds for the whole run
+        seed: Seed for the run; each component gets its own spawned stream
+        max_workers: Process pool size (CPU count if omitted)
+
+    Returns:
+        Tuple of (assignment, stats dict)
+    """
+    started = time.perf_counter()
+    components = find_components(instance)
+    tasks = pack_components(components)
+    seeds = spawn_seeds(seed, len(tasks) + 1)
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks)))
+
+    # Split the solve budget by task size so the pool finishes in roughly the
+    # budget whether or not there are enough workers to run every task at once
+    solve_budget = time_limit * (1 - MERGE_TIME_SHARE)
+    total_scenes = max(1, instance.num_scenes)
+    budgets = [
+        max(MIN_COMPONENT_TIME, min(solve_budget, solve_budget * max_workers * len(task) / total_scenes))
+        for task in tasks
+    ]
+    sub_instances = [instance.subset(task) for task in tasks]
+    results = solve_many(sub_instances, method, budgets, seeds[:len(tasks)], max_workers)
+
+    # Day indexes are shared with the parent instance, so merging is a scatter
+    assignment = np.full(instance.num_scenes, -1, dtype=np.int64)
+    for task, (sub_assignment, _) in zip(tasks, results):
+        assignment[task] = sub_assignment
+
+    component_of_scene = np.empty(instance.num_scenes, dtype=np.int64)
+    for label, component in enumerate(components):
+        component_of_scene[component] = label
+
+    state = ScheduleState(instance, assignment)
+    merged_cost = state.cost
+    capacity_moves = repair_shared_capacity(state, component_of_scene)
+
+    remaining = time_limit - (time.perf_counter() - started)
+    polish_stats = None
+    if remaining > 0:
+        final, polish_stats = local_search(instance, state.assignment, time_limit=remaining,
+                                           rng=make_rng(seeds[-1]))
+    else:
+        final = state.assignment.copy()
+
+    stats = {
+        'components': len(components),
+        'largest_component': int(len(components[0])) if components else 0,
+        'tasks': len(tasks),
+        'workers': max_workers,
+        'merged_cost': merged_cost,
+        'bundles_moved': capacity_moves,
+        'best_cost': instance.evaluate(final),
+        'merge_polish': polish_stats['moves'] if polish_stats else None,
+        'runtime_seconds': round(time.perf_counter() - started, 3)
+    }
+    logging.info(f"Decomposed optimization: {stats['components']} components in {stats['tasks']} tasks, "
+                 f"largest {stats['largest_component']} scenes, cost {stats['best_cost']:.2f}")
+    return final, stats
+
+
+def optimize_instance_decomposed(instance, seed=None):
+    """
+    Parallel Decomposition-Based Method for schedule optimization on an already compiled instance.
+
+    Args:
+        instance: ProblemInstance (from utils.load_problem_instance or ProblemInstance.from_models)
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    logging.info("Starting Parallel Decomposition optimization")
+
+    assignment, stats = solve_decomposed(instance, seed=seed)
+
+    return instance.build_result(assignment, 'Parallel Decomposition (PDBM)', {'search': stats})
+
+
+def optimize_schedule_decomposed(scenes, actors, locations, actor_availability, location_availability,
+                                 actor_scenes, start_date, end_date=None, seed=None):
+    """
+    Parallel Decomposition-Based Method for schedule optimization.
+
+    Scenes that share no actors and no locations are optimized as separate
+    sub-problems in a process pool, then merged under the shared day capacity.
+
+    Args:
+        scenes: List of Scene objects
+        actors: List of Actor objects
+        locations: List of Location objects
+        actor_availability: Dict mapping actor_id to availability by date
+        location_availability: Dict mapping location_id to availability by date
+        actor_scenes: Dict mapping scene_id to list of actor_ids
+        start_date: First possible shooting date
+        end_date: Last possible shooting date (optional)
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    instance = ProblemInstance.from_models(scenes, actors, locations, actor_availability,
+                                           location_availability, actor_scenes, start_date, end_date)
+    return optimize_instance_decomposed(instance, seed=seed)
@@ -5,7 +5,7 @@ from flask_wtf.file import FileField, FileRequired, FileAllowed
 class NoCSRFFlaskForm(FlaskForm):
     class Meta:
         csrf = False
-from wtforms import StringField, PasswordField, BooleanField, TextAreaField, SelectField, FloatField, DateField
+from wtforms import StringField, PasswordField, BooleanField, TextAreaField, SelectField, FloatField, DateField, IntegerField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, Optional, NumberRange
 from models import Role
 
@@ -72,8 +72,28 @@ class ScheduleForm(NoCSRFFlaskForm):
         choices=[
             ('ant_colony', 'Ant Colony Optimization (ACOBM)'),
             ('tabu_search', 'Tabu Search (TSBM)'),
-            ('particle_swarm', 'Particle Swarm Optimization (PSOBM)')
+            ('particle_swarm', 'Particle Swarm Optimization (PSOBM)'),
+            ('large_neighborhood', 'Large Neighborhood Search (LNSBM)'),
+            ('decomposed', 'Parallel Decomposition (PDBM)'),
+            ('hierarchical', 'Hierarchical Two-Level (HTBM)'),
+            ('rolling_horizon', 'Rolling Horizon (RHBM)'),
+            ('pareto', 'NSGA-II Pareto Front (NSGABM)')
         ],
         default='ant_colony',
         validators=[DataRequired()]
     )
+    polish = SelectField(
+        'Polishing Stage',
+        choices=[
+            ('none', 'None'),
+            ('local_search', 'Local Search (relocate, swap, day merge)'),
+            ('lns', 'Large Neighborhood Search')
+        ],
+        default='none',
+        validators=[Optional()]
+    )
+    window_days = IntegerField(
+        'Firm Window (days)',
+        default=21,
+        validators=[Optional(), NumberRange(min=1, max=90)]
+    )
@@ -0,0 +1,244 @@
+"""
+Headless optimizer: run the scheduling engine on serialized problem instances.
+
+Usage:
+    python -m headless_optimizer list
+    python -m headless_optimizer run INSTANCE.(json|npz) [--algorithm NAME] [--time-limit SECONDS]
+        [--seed N [N ...]] [--workers N] [--output RESULT.json]
+    python -m headless_optimizer export --project-id ID --start-date YYYY-MM-DD [--end-date YYYY-MM-DD] OUTPUT
+
+Only `export` touches the database; `run` and `list` import neither Flask,
+SQLAlchemy nor spaCy, so they start in a fraction of a second.
+"""
+import argparse
+import datetime
+import json
+import logging
+import sys
+import time
+
+import numpy as np
+
+from problem_instance import ProblemInstance
+from instance_solvers import solve_instance
+from decomposition import solve_decomposed
+from hierarchical_optimizer import solve_hierarchical
+from rolling_horizon import solve_rolling_horizon, lock_before_cutoff, DEFAULT_WINDOW_DAYS
+from pareto_front import pareto_search, knee_point
+from rng_streams import new_seed, make_rng
+from utils_json import convert_datetime_to_strings
+
+DEFAULT_TIME_LIMIT = 10.0  # Seconds per run
+
+
+def _run_greedy(instance, time_limit, seed, max_workers, options):
+    return solve_instance(instance, 'greedy', time_limit=time_limit, seed=seed)
+
+
+def _run_local_search(instance, time_limit, seed, max_workers, options):
+    return solve_instance(instance, 'local_search', time_limit=time_limit, seed=seed)
+
+
+def _run_large_neighborhood(instance, time_limit, seed, max_workers, options):
+    return solve_instance(instance, 'large_neighborhood', time_limit=time_limit, seed=seed)
+
+
+def _run_decomposed(instance, time_limit, seed, max_workers, options):
+    return solve_decomposed(instance, time_limit=time_limit, seed=seed, max_workers=max_workers)
+
+
+def _run_hierarchical(instance, time_limit, seed, max_workers, options):
+    return solve_hierarchical(instance, time_limit=time_limit, seed=seed, max_workers=max_workers)
+
+
+def _rolling_horizon_base(instance, options):
+    """(base assignment or None, cutoff day index) of the rolling_horizon options."""
+    base_assignment = None
+    if options.get('base_schedule'):
+        base_assignment = instance.assignment_from_schedule(options['base_schedule'])
+    cutoff = 0
+    if options.get('cutoff'):
+        cutoff = max(0, (options['cutoff'] - instance.dates[0]).days)
+    return base_assignment, cutoff
+
+
+def _run_rolling_horizon(instance, time_limit, seed, max_workers, options):
+    base_assignment, cutoff = _rolling_horizon_base(instance, options)
+    return solve_rolling_horizon(instance, base_assignment, cutoff,
+                                 options.get('window_days') or DEFAULT_WINDOW_DAYS,
+                                 time_limit=time_limit, seed=seed)
+
+
+def _run_pareto(instance, time_limit, seed, max_workers, options):
+    front, objectives, stats = pareto_search(instance, time_limit=time_limit, rng=make_rng(seed))
+    knee = knee_point(objectives)
+    stats['front'] = [{'objective': float(cost), 'shooting_days': int(days)} for cost, days in objectives]
+    stats['knee'] = knee
+    return front[knee], stats
+
+
+# Algorithms that run on a ProblemInstance alone: name -> (runner, display name).
+# Every runner takes (instance, time_limit, seed, max_workers, options) and
+# returns (assignment, stats). The ACO/TS/PSO family needs ORM objects and
+# is only available through the web app.
+ALGORITHMS = {
+    'greedy': (_run_greedy, 'Greedy Insertion'),
+    'local_search': (_run_local_search, 'Local Search'),
+    'large_neighborhood': (_run_large_neighborhood, 'Large Neighborhood Search (LNSBM)'),
+    'decomposed': (_run_decomposed, 'Parallel Decomposition (PDBM)'),
+    'hierarchical': (_run_hierarchical, 'Hierarchical Two-Level (HTBM)'),
+    'rolling_horizon': (_run_rolling_horizon, 'Rolling Horizon (RHBM)'),
+    'pareto': (_run_pareto, 'NSGA-II Pareto Front (NSGABM)')
+}
+
+
+def run_algorithm(instance, algorithm, time_limit=DEFAULT_TIME_LIMIT, seeds=None, max_workers=None, options=None):
+    """
+    Run a registered algorithm once per seed and keep the best schedule.
+
+    Args:
+        instance: ProblemInstance to optimize
+        algorithm: Key in ALGORITHMS
+        time_limit: Wall clock budget per run in seconds
+        seeds: List of seeds (one fresh seed if omitted)
+        max_workers: Process pool size for the parallel algorithms
+        options: Algorithm specific options (base_schedule, cutoff and window_days for rolling_horizon)
+
+    Returns:
+        Dict with one summary per run under 'runs' and the best run's {'schedule', 'metadata'} under 'result'
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm '{algorithm}'; choose from {', '.join(ALGORITHMS)}")
+    runner, display_name = ALGORITHMS[algorithm]
+    seeds = seeds or [new_seed()]
+
+    runs = []
+    best = None
+    for seed in seeds:
+        started = time.perf_counter()
+        assignment, stats = runner(instance, time_limit, seed, max_workers, options or {})
+        breakdown = instance.cost_breakdown(assignment)
+        runs.append({
+            'seed': seed,
+            'objective': breakdown['objective'],
+            'total_cost': breakdown['actor_cost'] + breakdown['location_cost'] + breakdown['travel_cost'],
+            'shooting_days': breakdown['shooting_days'],
+            'conflicts': breakdown['conflicts'],
+            'overtime_hours': breakdown['overtime_hours'],
+            'runtime_seconds': round(time.perf_counter() - started, 3),
+            'stats': stats
+        })
+        if best is None or breakdown['objective'] < best[1]['objective']:
+            best = (assignment, runs[-1])
+        logging.info(f"{algorithm} seed {seed}: objective {breakdown['objective']:.0f}")
+
+    assignment, best_run = best
+    # A rolling-horizon result must not have its locked scenes moved by the slotting stage
+    slotting = {}
+    if algorithm == 'rolling_horizon':
+        _, cutoff, locked = lock_before_cutoff(instance, *_rolling_horizon_base(instance, options or {}))
+        slotting = {'locked': locked, 'first_open_day': cutoff}
+    return {
+        'algorithm': algorithm,
+        'fingerprint': instance.fingerprint(),
+        'time_limit': time_limit,
+        'runs': runs,
+        'best_seed': best_run['seed'],
+        'result': instance.build_result(assignment, display_name, {'search': best_run['stats'], 'seed': best_run['seed']},
+                                        **slotting)
+    }
+
+
+def export_project(project_id, start_date, end_date, path):
+    """Compile a project from the database and save it as an instance file (needs the web app's database)."""
+    from app import app
+    from utils import load_problem_instance
+
+    with app.app_context():
+        instance = load_problem_instance(project_id, start_date, end_date)
+    instance.save(path)
+    return instance
+
+
+def _parse_date(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (datetime.date, datetime.time)):
+        # Same formats as the web app's responses
+        return convert_datetime_to_strings(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m headless_optimizer', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='List the registered algorithms')
+
+    run = commands.add_parser('run', help='Optimize a serialized instance')
+    run.add_argument('instance', help='Instance file (.json or .npz)')
+    run.add_argument('--algorithm', default='large_neighborhood', choices=sorted(ALGORITHMS))
+    run.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT, help='Seconds per run')
+    run.add_argument('--seed', type=int, nargs='+', help='One run per seed; the best schedule is kept')
+    run.add_argument('--workers', type=int, help='Process pool size for parallel algorithms')
+    run.add_argument('--base', help="Schedule JSON to re-plan from (rolling_horizon); a result file's 'result' works")
+    run.add_argument('--cutoff', type=_parse_date, help='First date that may be re-planned (rolling_horizon)')
+    run.add_argument('--window-days', type=int, help='Days after the cutoff planned in detail (rolling_horizon)')
+    run.add_argument('--output', help='Result file (stdout if omitted)')
+    run.add_argument('--quiet', action='store_true', help='Only log warnings')
+
+    export = commands.add_parser('export', help='Save a project from the database as an instance file')
+    export.add_argument('--project-id', type=int, required=True)
+    export.add_argument('--start-date', type=_parse_date, required=True)
+    export.add_argument('--end-date', type=_parse_date)
+    export.add_argument('output', help='Instance file to write (.json or .npz)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for name, (_, display_name) in ALGORITHMS.items():
+            print(f"{name:20s} {display_name}")
+        return 0
+
+    if args.command == 'export':
+        instance = export_project(args.project_id, args.start_date, args.end_date, args.output)
+        print(f"Wrote {args.output}: {instance.num_scenes} scenes, {instance.num_actors} actors, "
+              f"{instance.num_locations} locations, {instance.num_days} days")
+        return 0
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format='%(message)s')
+    started = time.perf_counter()
+    instance = ProblemInstance.load(args.instance)
+    load_seconds = time.perf_counter() - started
+
+    options = {'cutoff': args.cutoff, 'window_days': args.window_days}
+    if args.base:
+        with open(args.base) as f:
+            base = json.load(f)
+        # Accept a bare schedule dict, a {'schedule', 'metadata'} result or a full run file
+        base = base.get('result', base)
+        options['base_schedule'] = base.get('schedule', base)
+
+    report = run_algorithm(instance, args.algorithm, args.time_limit, args.seed, args.workers, options)
+    report['instance'] = args.instance
+    report['load_seconds'] = round(load_seconds, 3)
+
+    text = json.dumps(report, default=_json_default, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        best = min(report['runs'], key=lambda run: run['objective'])
+        logging.info(f"Wrote {args.output}: best objective {best['objective']:.0f} (seed {best['seed']})")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import logging
+import os
+import time
+
+import numpy as np
+
+from problem_instance import ProblemInstance
+from instance_solvers import solve_instance, solve_many
+from local_search import local_search
+from rng_streams import make_rng, spawn_seeds
+
+DEFAULT_TIME_LIMIT = 10.0  # Seconds for the whole run
+WEEK_LENGTH = 7  # Days per coarse bucket
+MIN_WEEK_LENGTH = 4  # A shorter trailing bucket is folded into the previous week
+WEEK_FILL = 0.85  # Share of a week's hours the coarse level may book, leaving slack for day packing
+COARSE_TIME_SHARE = 0.15  # Share of the budget spent assigning blocks to weeks
+POLISH_TIME_SHARE = 0.2  # Share of the budget kept for the cross-week polish
+MIN_WEEK_TIME = 0.2  # Seconds
+
+
+def split_weeks(num_days, week_length=WEEK_LENGTH):
+    """
+    Cut the calendar into consecutive week buckets.
+
+    Returns:
+        List of day index arrays
+    """
+    starts = list(range(0, num_days, week_length))
+    if len(starts) > 1 and num_days - starts[-1] < MIN_WEEK_LENGTH:
+        starts.pop()
+    bounds = starts[1:] + [num_days]
+    return [np.arange(start, end) for start, end in zip(starts, bounds)]
+
+
+def build_location_blocks(instance, max_block_hours):
+    """
+    Group scenes into location blocks small enough to fit in one week.
+
+    Scenes at the same location form a block; a block with more hours than a
+    week can hold is cut into chunks, keeping scenes that share their lead
+    actor together. Scenes without a location are blocked the same way.
+
+    Returns:
+        List of scene index arrays
+    """
+    # Lead actor = first actor in the scene's cast (-1 for scenes without actors)
+    lead_actor = np.where(instance.incidence.any(axis=1), np.argmax(instance.incidence, axis=1), -1)
+
+    blocks = []
+    for loc in np.unique(instance.scene_location):
+        scenes = np.flatnonzero(instance.scene_location == loc)
+        scenes = scenes[np.lexsort((-instance.priorities[scenes], lead_actor[scenes]))]
+
+        chunk_ends = np.cumsum(instance.durations[scenes]) // max_block_hours
+        for chunk in np.unique(chunk_ends):
+            blocks.append(scenes[chunk_ends == chunk])
+    return blocks
+
+
+def build_week_instance(instance, blocks, weeks):
+    """
+    Build the coarse problem: location blocks assigned to weeks.
+
+    The coarse instance reuses the regular cost terms with blocks in place of
+    scenes and weeks in place of days, so an actor or location costs its day
+    rate once per week it is used, overbooking a week is charged as
+    overtime, and a block pays the unavailability penalty for each of its
+    scenes that has no conflict-free day in the week.
+
+    Returns:
+        ProblemInstance
+    """
+    week_starts = np.array([week[0] for week in weeks])
+
+    def any_in_week(available):
+        return np.logical_or.reduceat(available, week_starts, axis=1)
+
+    block_of_scene = np.empty(instance.num_scenes, dtype=np.int64)
+    for b, block in enumerate(blocks):
+        block_of_scene[block] = b
+
+    incidence = np.zeros((len(blocks), instance.num_actors), dtype=bool)
+    np.logical_or.at(incidence, block_of_scene, instance.incidence)
+
+    week_length = max(len(week) for week in weeks)
+    coarse = ProblemInstance(
+        scene_ids=np.arange(len(blocks)),
+        actor_ids=instance.actor_ids,
+        location_ids=instance.location_ids,
+        dates=[instance.dates[start] for start in week_starts],
+        scene_location=[instance.scene_location[block[0]] for block in blocks],
+        incidence=incidence,
+        actor_cost=instance.actor_cost,
+        location_cost=instance.location_cost,
+        actor_available=any_in_week(instance.actor_available),
+        location_available=any_in_week(instance.location_available),
+        durations=[instance.durations[block].sum() for block in blocks],
+        priorities=[instance.priorities[block].max() for block in blocks],
+        location_names=instance.location_names,
+        day_capacity=instance.day_capacity * week_length * WEEK_FILL
+    )
+
+    # A block can be feasible in a week even when no single day suits all of
+    # it, so price the week by the scenes that cannot be placed in it at all
+    scene_blocked = ~any_in_week(instance.feasible)
+    conflicts = np.zeros((len(blocks), len(weeks)), dtype=np.int32)
+    np.add.at(conflicts, block_of_scene, scene_blocked)
+    coarse.conflicts = conflicts
+    coarse.feasible = conflicts == 0
+    return coarse
+
+
+def solve_hierarchical(instance, method='large_neighborhood', time_limit=DEFAULT_TIME_LIMIT, seed=None,
+                       max_workers=None, week_length=WEEK_LENGTH):
+    """
+    Two-level optimization: location blocks to weeks, then scenes to days.
+
+    Args:
+        instance: ProblemInstance to optimize
+        method: Instance solver used at both levels (see instance_solvers.SOLVERS)
+        time_limit: Wall clock budget in seconds for the whole run
+        seed: Seed for the run; every level and week gets its own spawned stream
+        max_workers: Process pool size for the per-week solves (CPU count if omitted)
+        week_length: Days per coarse bucket
+
+    Returns:
+        Tuple of (assignment, stats dict)
+    """
+    started = time.perf_counter()
+    weeks = split_weeks(instance.num_days, week_length)
+    seeds = spawn_seeds(seed, len(weeks) + 2)
+
+    if len(weeks) < 2:
+        # Nothing to split: the short horizon is solved in one piece
+        assignment, _ = solve_instance(instance, method, time_limit=time_limit, seed=seeds[0])
+        return assignment, {
+            'weeks': len(weeks),
+            'blocks': 0,
+            'best_cost': instance.evaluate(assignment),
+            'runtime_seconds': round(time.perf_counter() - started, 3)
+        }
+
+    # Level 1: location blocks to weeks
+    max_block_hours = instance.day_capacity * week_length * WEEK_FILL
+    blocks = build_location_blocks(instance, max_block_hours)
+    coarse = build_week_instance(instance, blocks, weeks)
+    block_weeks, coarse_stats = solve_instance(coarse, method, time_limit=time_limit * COARSE_TIME_SHARE,
+                                               seed=seeds[0])
+
+    # Level 2: scenes to days inside each week, one independent sub-problem per week
+    scene_week = np.empty(instance.num_scenes, dtype=np.int64)
+    for block, week in zip(blocks, block_weeks):
+        scene_week[block] = week
+    week_scenes = [np.flatnonzero(scene_week == w) for w in range(len(weeks))]
+    tasks = [w for w in range(len(weeks)) if week_scenes[w].size]
+    fine_budget = time_limit * (1 - COARSE_TIME_SHARE - POLISH_TIME_SHARE)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks)))
+    budgets = [
+        max(MIN_WEEK_TIME, min(fine_budget, fine_budget * workers * week_scenes[w].size / max(1, instance.num_scenes)))
+        for w in tasks
+    ]
+    sub_instances = [instance.subset(week_scenes[w], weeks[w]) for w in tasks]
+    results = solve_many(sub_instances, method, budgets, [seeds[1 + w] for w in tasks], max_workers)
+
+    # Sub-instance days are positions inside the week, so map them back
+    assignment = np.full(instance.num_scenes, -1, dtype=np.int64)
+    for w, (sub_assignment, _) in zip(tasks, results):
+        assignment[week_scenes[w]] = weeks[w][sub_assignment]
+    merged_cost = instance.evaluate(assignment)
+
+    # Cross-week polish lets scenes leave the week the coarse level chose
+    remaining = time_limit - (time.perf_counter() - started)
+    polish_stats = None
+    if remaining > 0:
+        assignment, polish_stats = local_search(instance, assignment, time_limit=remaining,
+                                                rng=make_rng(seeds[-1]))
+
+    stats = {
+        'weeks': len(weeks),
+        'blocks': len(blocks),
+        'coarse_cost': coarse_stats['best_cost'],
+        'merged_cost': merged_cost,
+        'best_cost': instance.evaluate(assignment),
+        'merge_polish': polish_stats['moves'] if polish_stats else None,
+        'runtime_seconds': round(time.perf_counter() - started, 3)
+    }
+    logging.info(f"Hierarchical optimization: {stats['blocks']} blocks over {stats['weeks']} weeks, "
+                 f"cost {merged_cost:.2f} -> {stats['best_cost']:.2f}")
+    return assignment, stats
+
+
+def optimize_instance_hierarchical(instance, seed=None):
+    """
+    Hierarchical Two-Level Method for schedule optimization on an already compiled instance.
+
+    Args:
+        instance: ProblemInstance (from utils.load_problem_instance or ProblemInstance.from_models)
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    logging.info("Starting Hierarchical Two-Level optimization")
+
+    assignment, stats = solve_hierarchical(instance, seed=seed)
+
+    return instance.build_result(assignment, 'Hierarchical Two-Level (HTBM)', {'search': stats})
+
+
+def optimize_schedule_hierarchical(scenes, actors, locations, actor_availability, location_availability,
+                                   actor_scenes, start_date, end_date=None, seed=None):
+    """
+    Hierarchical Two-Level Method for schedule optimization.
+
+    Location blocks are first assigned to weeks with a coarse model, then each
+    week's scenes are placed on days in parallel, so long shoots never search
+    over the whole calendar at once.
+
+    Args:
+        scenes: List of Scene objects
+        actors: List of Actor objects
+        locations: List of Location objects
+        actor_availability: Dict mapping actor_id to availability by date
+        location_availability: Dict mapping location_id to availability by date
+        actor_scenes: Dict mapping scene_id to list of actor_ids
+        start_date: First possible shooting date
+        end_date: Last possible shooting date (optional)
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    instance = ProblemInstance.from_models(scenes, actors, locations, actor_availability,
+                                           location_availability, actor_scenes, start_date, end_date)
+    return optimize_instance_hierarchical(instance, seed=seed)
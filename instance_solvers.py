@@ -0,0 +1,113 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from problem_instance import greedy_assignment
+from large_neighborhood_search import large_neighborhood_search
+from local_search import local_search
+from shared_instance import SharedInstances, attach
+from rng_streams import make_rng
+
+DEFAULT_TIME_LIMIT = 5.0  # Seconds
+
+# Instances a pool worker attached to at start-up
+_worker_instances = []
+
+
+def solve_greedy(instance, assignment, time_limit, rng):
+    """Greedy insertion only; ignores the time limit."""
+    started = time.perf_counter()
+    if assignment is None:
+        assignment = greedy_assignment(instance, rng)
+    cost = instance.evaluate(assignment)
+    return assignment, {
+        'initial_cost': cost,
+        'best_cost': cost,
+        'runtime_seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def solve_local_search(instance, assignment, time_limit, rng):
+    """Greedy construction followed by relocate/swap/day-merge descent."""
+    if assignment is None:
+        assignment = greedy_assignment(instance, rng)
+    return local_search(instance, assignment, time_limit=time_limit, rng=rng)
+
+
+def solve_large_neighborhood(instance, assignment, time_limit, rng):
+    """Greedy construction followed by Large Neighborhood Search."""
+    return large_neighborhood_search(instance, assignment, time_limit=time_limit, rng=rng)
+
+
+# Optimizers that work directly on a ProblemInstance, and can therefore run
+# in worker processes without ORM objects
+SOLVERS = {
+    'greedy': solve_greedy,
+    'local_search': solve_local_search,
+    'large_neighborhood': solve_large_neighborhood
+}
+
+
+def solve_instance(instance, method='large_neighborhood', assignment=None, time_limit=DEFAULT_TIME_LIMIT, seed=None):
+    """
+    Run one of the registered instance solvers.
+
+    Args:
+        instance: ProblemInstance to optimize
+        method: Key in SOLVERS
+        assignment: Optional starting assignment
+        time_limit: Wall clock budget in seconds
+        seed: Seed (int or numpy.random.SeedSequence) for the run's generator
+
+    Returns:
+        Tuple of (assignment, stats dict)
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown solver '{method}'")
+    rng = make_rng(seed)
+    return SOLVERS[method](instance, assignment, time_limit, rng)
+
+
+def solve_many(instances, method, time_limits, seeds, max_workers=None, assignments=None):
+    """
+    Solve independent sub-instances, in a process pool when there is more than one worker.
+
+    Pooled runs place the instances in shared memory, so workers start
+    without receiving a copy of the instance data. Workers are forked; when
+    the web app is loaded, its fork hook (app.py) gives each worker an empty
+    database connection pool, so request workers can call this safely.
+
+    Args:
+        instances: List of ProblemInstance objects
+        method: Key in SOLVERS used for every instance
+        time_limits: Per-instance wall clock budgets in seconds
+        seeds: Per-instance seeds (typically SeedSequence.spawn() children)
+        max_workers: Process pool size (CPU count if omitted)
+        assignments: Optional per-instance starting assignments
+
+    Returns:
+        List of (assignment, stats) tuples in input order
+    """
+    if assignments is None:
+        assignments = [None] * len(instances)
+    jobs = list(zip(instances, assignments, time_limits, seeds))
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(instances)))
+    if max_workers == 1:
+        return [solve_instance(instance, method, *job) for instance, *job in jobs]
+
+    # Workers attach to the instances in shared memory once instead of unpickling one per job
+    with SharedInstances(instances) as shared, ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_attach_worker, initargs=(shared.handle,)) as pool:
+        futures = [pool.submit(_solve_shared, index, method, *job) for index, (_, *job) in enumerate(jobs)]
+        return [future.result() for future in futures]
+
+
+def _attach_worker(handle):
+    """Pool initializer: wrap the shared instances once per worker process."""
+    global _worker_instances
+    _worker_instances = attach(handle)
+
+
+def _solve_shared(index, method, assignment, time_limit, seed):
+    return solve_instance(_worker_instances[index], method, assignment, time_limit, seed)
@@ -0,0 +1,267 @@
+import logging
+import time
+
+import numpy as np
+
+from problem_instance import ProblemInstance, ScheduleState, greedy_assignment
+from rng_streams import make_rng
+
+# Search budgets
+DEFAULT_TIME_LIMIT = 10.0  # Seconds when running as a standalone algorithm
+DEFAULT_POLISH_TIME_LIMIT = 3.0  # Seconds when polishing another algorithm's output
+DEFAULT_MAX_ITERATIONS = 5000
+
+# Destroy sizes
+MAX_REMOVED_FRACTION = 0.3  # Never tear out more than this share of the scenes at once
+MIN_WINDOW_DAYS = 2
+MAX_WINDOW_DAYS = 7
+
+# Adaptive operator selection scores
+SCORE_NEW_BEST = 3.0
+SCORE_IMPROVED = 2.0
+SCORE_ACCEPTED = 1.0
+REACTION_FACTOR = 0.2
+
+# Threshold acceptance: accept worse solutions within this share of the
+# initial cost early on, shrinking to zero by the end of the budget
+INITIAL_THRESHOLD = 0.005
+
+
+def _cap_removal(scenes, max_remove, rng):
+    """Keep a destroy selection within the removal budget."""
+    if len(scenes) > max_remove:
+        scenes = rng.choice(scenes, size=max_remove, replace=False)
+    return scenes
+
+
+def destroy_location_block(state, rng, max_remove):
+    """Remove every scene shot at one location, favouring the most expensive blocks."""
+    inst = state.instance
+    location_days = (state.location_load > 0).sum(axis=1)
+    if not location_days.any():
+        return np.empty(0, dtype=np.int64)
+
+    weights = location_days * (inst.location_cost + 1.0)
+    loc = rng.choice(inst.num_locations, p=weights / weights.sum())
+    scenes = np.flatnonzero((inst.scene_location == loc) & (state.assignment >= 0))
+    return _cap_removal(scenes, max_remove, rng)
+
+
+def destroy_actor_cluster(state, rng, max_remove):
+    """Remove every scene featuring one actor, favouring actors booked on many costly days."""
+    inst = state.instance
+    actor_days = (state.actor_load > 0).sum(axis=1)
+    if not actor_days.any():
+        return np.empty(0, dtype=np.int64)
+
+    weights = actor_days * (inst.actor_cost + 1.0)
+    actor = rng.choice(inst.num_actors, p=weights / weights.sum())
+    scenes = np.flatnonzero(inst.incidence[:, actor] & (state.assignment >= 0))
+    return _cap_removal(scenes, max_remove, rng)
+
+
+def destroy_date_window(state, rng, max_remove):
+    """Remove every scene scheduled inside a random window of consecutive days."""
+    num_days = state.instance.num_days
+    width = int(rng.integers(MIN_WINDOW_DAYS, MAX_WINDOW_DAYS + 1))
+    first_day = int(rng.integers(0, max(1, num_days - width + 1)))
+    in_window = (state.assignment >= first_day) & (state.assignment < first_day + width)
+    return _cap_removal(np.flatnonzero(in_window), max_remove, rng)
+
+
+DESTROY_OPERATORS = {
+    'location_block': destroy_location_block,
+    'actor_cluster': destroy_actor_cluster,
+    'date_window': destroy_date_window
+}
+
+
+def greedy_repair(state, removed, rng):
+    """
+    Reinsert removed scenes one at a time on their cheapest feasible day.
+
+    Scenes are inserted most constrained first with location blocks kept
+    together; a little noise on the ordering diversifies repeated repairs.
+    """
+    inst = state.instance
+    feasible_days = inst.feasible[removed].sum(axis=1) + rng.random(len(removed))
+    order = np.lexsort((inst.scene_location[removed], feasible_days))
+    state.insert_greedy(removed[order])
+
+
+def large_neighborhood_search(instance, assignment=None, time_limit=DEFAULT_TIME_LIMIT,
+                              max_iterations=DEFAULT_MAX_ITERATIONS, rng=None):
+    """
+    Improve an assignment with destroy/repair Large Neighborhood Search.
+
+    Each iteration tears out a whole location block, actor cluster or date
+    window and greedily reinserts it using the delta cost kernels. Operators
+    are picked adaptively by how often they have produced improvements.
+
+    Args:
+        instance: ProblemInstance to optimize
+        assignment: Starting assignment (greedy construction if omitted)
+        time_limit: Wall clock budget in seconds
+        max_iterations: Iteration budget
+        rng: numpy.random.Generator (a fresh one is created if omitted)
+
+    Returns:
+        Tuple of (best assignment, stats dict)
+    """
+    rng = rng if rng is not None else make_rng()
+    started = time.perf_counter()
+
+    if assignment is None:
+        assignment = greedy_assignment(instance, rng)
+    state = ScheduleState(instance, assignment)
+
+    # Scenes the starting assignment left out are placed before searching
+    if (state.assignment < 0).any():
+        state.insert_greedy(state.construction_order(rng))
+
+    initial_cost = state.recompute()
+    best_assignment = state.assignment.copy()
+    best_cost = initial_cost
+
+    names = list(DESTROY_OPERATORS)
+    weights = np.ones(len(names))
+    usage = {name: 0 for name in names}
+    improvements = {name: 0 for name in names}
+    max_remove = max(1, int(instance.num_scenes * MAX_REMOVED_FRACTION))
+
+    iterations = 0
+    accepted = 0
+
+    while iterations < max_iterations and instance.num_scenes:
+        elapsed = time.perf_counter() - started
+        if elapsed >= time_limit:
+            break
+        iterations += 1
+
+        op = int(rng.choice(len(names), p=weights / weights.sum()))
+        name = names[op]
+        usage[name] += 1
+
+        removed = DESTROY_OPERATORS[name](state, rng, max_remove)
+        if not len(removed):
+            weights[op] = (1 - REACTION_FACTOR) * weights[op]
+            weights[op] = max(weights[op], 0.05)
+            continue
+
+        current_cost = state.cost
+        previous_days = [(int(scene), state.remove(scene)) for scene in removed]
+        greedy_repair(state, removed, rng)
+
+        threshold = INITIAL_THRESHOLD * initial_cost * max(0.0, 1.0 - elapsed / time_limit)
+        if state.cost < best_cost - 1e-6:
+            score = SCORE_NEW_BEST
+            best_cost = state.cost
+            best_assignment = state.assignment.copy()
+            improvements[name] += 1
+        elif state.cost < current_cost - 1e-6:
+            score = SCORE_IMPROVED
+        elif state.cost <= current_cost + threshold:
+            score = SCORE_ACCEPTED
+        else:
+            score = 0.0
+
+        if score > 0:
+            accepted += 1
+        else:
+            # Reject: put the removed scenes back where they were
+            for scene, _ in previous_days:
+                state.remove(scene)
+            for scene, day in previous_days:
+                state.insert(scene, day)
+
+        weights[op] = (1 - REACTION_FACTOR) * weights[op] + REACTION_FACTOR * score
+        weights[op] = max(weights[op], 0.05)
+
+    best_cost = instance.evaluate(best_assignment)
+    stats = {
+        'iterations': iterations,
+        'accepted': accepted,
+        'initial_cost': initial_cost,
+        'best_cost': best_cost,
+        'operator_usage': usage,
+        'operator_improvements': improvements,
+        'runtime_seconds': round(time.perf_counter() - started, 3)
+    }
+    logging.info(f"LNS finished after {iterations} iterations: {initial_cost:.2f} -> {best_cost:.2f}")
+    return best_assignment, stats
+
+
+def optimize_instance_large_neighborhood(instance, seed=None):
+    """
+    Large Neighborhood Search-Based Method for schedule optimization on an already compiled instance.
+
+    Args:
+        instance: ProblemInstance (from utils.load_problem_instance or ProblemInstance.from_models)
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    logging.info("Starting Large Neighborhood Search optimization")
+
+    best_assignment, stats = large_neighborhood_search(instance, rng=make_rng(seed))
+
+    return instance.build_result(best_assignment, 'Large Neighborhood Search (LNSBM)', {'search': stats})
+
+
+def optimize_schedule_large_neighborhood(scenes, actors, locations, actor_availability, location_availability,
+                                         actor_scenes, start_date, end_date=None, seed=None):
+    """
+    Large Neighborhood Search-Based Method for schedule optimization.
+
+    Args:
+        scenes: List of Scene objects
+        actors: List of Actor objects
+        locations: List of Location objects
+        actor_availability: Dict mapping actor_id to availability by date
+        location_availability: Dict mapping location_id to availability by date
+        actor_scenes: Dict mapping scene_id to list of actor_ids
+        start_date: First possible shooting date
+        end_date: Last possible shooting date (optional)
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    instance = ProblemInstance.from_models(scenes, actors, locations, actor_availability,
+                                           location_availability, actor_scenes, start_date, end_date)
+    return optimize_instance_large_neighborhood(instance, seed=seed)
+
+
+def polish_schedule_lns(optimization_result, instance, time_limit=DEFAULT_POLISH_TIME_LIMIT, seed=None):
+    """
+    Run LNS as a polishing stage on another algorithm's output.
+
+    Args:
+        optimization_result: {'schedule', 'metadata'} dict returned by an optimize_schedule_* function
+        instance: ProblemInstance compiled from the same inputs
+        time_limit: Wall clock budget in seconds
+        seed: Seed for the polishing run
+
+    Returns:
+        New {'schedule', 'metadata'} dict with the input's metadata and recomputed totals;
+        metadata['polish'] reports the cost removed
+    """
+    assignment = instance.assignment_from_schedule(optimization_result['schedule'])
+    best_assignment, stats = large_neighborhood_search(instance, assignment, time_limit=time_limit,
+                                                       rng=make_rng(seed))
+
+    metadata = optimization_result.get('metadata', {})
+    polish = {
+        'method': 'lns',
+        'cost_before': stats['initial_cost'],
+        'cost_after': stats['best_cost'],
+        'cost_removed': stats['initial_cost'] - stats['best_cost'],
+        'iterations': stats['iterations'],
+        'runtime_seconds': stats['runtime_seconds']
+    }
+    algorithm = f"{metadata.get('algorithm', 'Unknown')} + LNS polish"
+    result = instance.build_result(best_assignment, algorithm, {'polish': polish})
+    # Keep the run's own metadata (search stats, seed, Pareto front); only the totals are recomputed
+    result['metadata'] = {**metadata, **result['metadata']}
+    return result
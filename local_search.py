@@ -0,0 +1,219 @@
+import logging
+import time
+
+import numpy as np
+
+from problem_instance import ScheduleState
+from rng_streams import make_rng
+
+DEFAULT_POLISH_TIME_LIMIT = 2.0  # Seconds
+MAX_SWAP_PARTNERS = 8  # Candidate partners tried per scene in the swap neighbourhood
+IMPROVEMENT_EPSILON = 1e-6
+
+
+def relocate_pass(state, rng, deadline):
+    """
+    Move single scenes to their cheapest day.
+
+    Uses the vectorized move deltas, so each scene is priced against every
+    day at once. Scenes with a feasible domain are only moved inside it.
+
+    Returns:
+        Number of improving moves applied
+    """
+    inst = state.instance
+    moves = 0
+    for scene in rng.permutation(inst.num_scenes):
+        if time.perf_counter() >= deadline:
+            break
+        deltas = state.move_deltas(scene)
+        domain = inst.feasible[scene]
+        if domain.any():
+            deltas = np.where(domain, deltas, np.inf)
+        day = int(np.argmin(deltas))
+        if deltas[day] < -IMPROVEMENT_EPSILON:
+            state.move(scene, day)
+            moves += 1
+    return moves
+
+
+def swap_pass(state, rng, deadline):
+    """
+    Exchange the days of two scenes.
+
+    Partners are drawn from days where the scene's location is already
+    being shot, which is where a swap can consolidate a location block.
+
+    Returns:
+        Number of improving swaps applied
+    """
+    inst = state.instance
+    swaps = 0
+    for scene in rng.permutation(inst.num_scenes):
+        if time.perf_counter() >= deadline:
+            break
+        loc = inst.scene_location[scene]
+        if loc < 0:
+            continue
+
+        day = state.assignment[scene]
+        block_days = np.flatnonzero(state.location_load[loc] > 0)
+        block_days = block_days[block_days != day]
+        if not block_days.size:
+            continue
+
+        partners = np.flatnonzero(np.isin(state.assignment, block_days) & (inst.scene_location != loc))
+        if not partners.size:
+            continue
+        if partners.size > MAX_SWAP_PARTNERS:
+            partners = rng.choice(partners, size=MAX_SWAP_PARTNERS, replace=False)
+
+        for partner in partners:
+            partner_day = int(state.assignment[partner])
+            if not inst.feasible[scene, partner_day] and inst.feasible[scene].any():
+                continue
+
+            before = state.cost
+            state.remove(scene)
+            state.remove(partner)
+            state.insert(scene, partner_day)
+            state.insert(partner, int(day))
+            if state.cost < before - IMPROVEMENT_EPSILON:
+                swaps += 1
+                break
+
+            # Not an improvement: undo the swap
+            state.remove(scene)
+            state.remove(partner)
+            state.insert(scene, int(day))
+            state.insert(partner, partner_day)
+    return swaps
+
+
+def day_merge_pass(state, rng, deadline):
+    """
+    Try to eliminate whole shooting days.
+
+    Empties the lightest days first and greedily redistributes their scenes
+    over the remaining shooting days, keeping the result only when it is
+    cheaper than the original.
+
+    Returns:
+        Number of days eliminated
+    """
+    merges = 0
+    shooting_days = np.flatnonzero(state.day_hours > 0)
+    for day in shooting_days[np.argsort(state.day_hours[shooting_days], kind='stable')]:
+        if time.perf_counter() >= deadline:
+            break
+        day_scenes = np.flatnonzero(state.assignment == day)
+        if not day_scenes.size:
+            continue
+
+        targets = state.day_hours > 0
+        targets[day] = False
+        if not targets.any():
+            break
+
+        before = state.cost
+        for scene in day_scenes:
+            state.remove(scene)
+        state.insert_greedy(day_scenes, allowed_days=targets)
+
+        if state.cost < before - IMPROVEMENT_EPSILON:
+            merges += 1
+            continue
+
+        # Not an improvement: put the day back together
+        for scene in day_scenes:
+            state.remove(scene)
+        for scene in day_scenes:
+            state.insert(scene, int(day))
+    return merges
+
+
+def local_search(instance, assignment, time_limit=DEFAULT_POLISH_TIME_LIMIT, rng=None):
+    """
+    Descend to a local optimum with relocate, swap and day-merge moves.
+
+    Passes repeat until a full round finds no improving move or the time
+    cap is reached.
+
+    Args:
+        instance: ProblemInstance to optimize
+        assignment: Starting assignment
+        time_limit: Wall clock budget in seconds
+        rng: numpy.random.Generator (a fresh one is created if omitted)
+
+    Returns:
+        Tuple of (improved assignment, stats dict)
+    """
+    rng = rng if rng is not None else make_rng()
+    started = time.perf_counter()
+    deadline = started + time_limit
+
+    state = ScheduleState(instance, assignment)
+    if (state.assignment < 0).any():
+        state.insert_greedy(state.construction_order(rng))
+    initial_cost = state.recompute()
+
+    moves = {'relocate': 0, 'swap': 0, 'day_merge': 0}
+    passes = 0
+    local_optimum = False
+
+    while time.perf_counter() < deadline:
+        passes += 1
+        improved = 0
+        for name, move_pass in (('relocate', relocate_pass), ('swap', swap_pass), ('day_merge', day_merge_pass)):
+            count = move_pass(state, rng, deadline)
+            moves[name] += count
+            improved += count
+        if not improved:
+            local_optimum = True
+            break
+
+    final_cost = state.recompute()
+    stats = {
+        'passes': passes,
+        'moves': moves,
+        'local_optimum': local_optimum,
+        'initial_cost': initial_cost,
+        'best_cost': final_cost,
+        'runtime_seconds': round(time.perf_counter() - started, 3)
+    }
+    logging.info(f"Local search finished after {passes} passes: {initial_cost:.2f} -> {final_cost:.2f}")
+    return state.assignment.copy(), stats
+
+
+def polish_schedule_local_search(optimization_result, instance, time_limit=DEFAULT_POLISH_TIME_LIMIT, seed=None):
+    """
+    Run local search as a polishing stage on another algorithm's output.
+
+    Args:
+        optimization_result: {'schedule', 'metadata'} dict returned by an optimize_schedule_* function
+        instance: ProblemInstance compiled from the same inputs
+        time_limit: Wall clock budget in seconds
+        seed: Seed for the polishing run
+
+    Returns:
+        New {'schedule', 'metadata'} dict with the input's metadata and recomputed totals;
+        metadata['polish'] reports the cost removed
+    """
+    assignment = instance.assignment_from_schedule(optimization_result['schedule'])
+    best_assignment, stats = local_search(instance, assignment, time_limit=time_limit, rng=make_rng(seed))
+
+    metadata = optimization_result.get('metadata', {})
+    polish = {
+        'method': 'local_search',
+        'cost_before': stats['initial_cost'],
+        'cost_after': stats['best_cost'],
+        'cost_removed': stats['initial_cost'] - stats['best_cost'],
+        'moves': stats['moves'],
+        'local_optimum': stats['local_optimum'],
+        'runtime_seconds': stats['runtime_seconds']
+    }
+    algorithm = f"{metadata.get('algorithm', 'Unknown')} + local search polish"
+    result = instance.build_result(best_assignment, algorithm, {'polish': polish})
+    # Keep the run's own metadata (search stats, seed, Pareto front); only the totals are recomputed
+    result['metadata'] = {**metadata, **result['metadata']}
+    return result
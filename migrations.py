@@ -0,0 +1,215 @@
+"""
+Schema migrations for existing databases, and a check that the hot lookups use an index.
+
+Usage:
+    python -m migrations [upgrade]   Apply pending migrations (also run at app start-up)
+    python -m migrations status      List applied and pending migrations
+    python -m migrations check       EXPLAIN every hot query and fail on a table scan
+
+db.create_all() only creates missing tables, so columns and indexes added
+to existing tables are applied here. Migrations run in order, once per
+database, and work on SQLite and PostgreSQL.
+"""
+import datetime
+import logging
+import sys
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+
+from app import app, db
+from models import (
+    ProjectAccess, Scene, Actor, ActorScene, Location, Schedule, ScheduledScene, Notification, SchemaMigration
+)
+
+
+def _add_columns(table_name, column_names):
+    """Migration adding model columns missing from an existing table, filling in their defaults."""
+    def migrate(connection):
+        table = db.metadata.tables[table_name]
+        existing = {column['name'] for column in inspect(connection).get_columns(table_name)}
+        # Quoted, as "user" is a reserved word in PostgreSQL
+        quoted = connection.dialect.identifier_preparer.quote(table_name)
+        for name in column_names:
+            if name in existing:
+                continue
+            column = table.columns[name]
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f'ALTER TABLE {quoted} ADD COLUMN {name} {column_type}'))
+            if column.default is not None and column.default.is_scalar:
+                connection.execute(text(f'UPDATE {quoted} SET {name} = :value WHERE {name} IS NULL'),
+                                   {'value': column.default.arg})
+    return migrate
+
+
+def _remove_duplicate_access(connection):
+    """Keep the oldest of duplicate (project, user) access rows so the unique index can be built."""
+    connection.execute(text(
+        'DELETE FROM project_access WHERE id NOT IN '
+        '(SELECT MIN(id) FROM project_access GROUP BY project_id, user_id)'
+    ))
+
+
+def _create_indexes(*models):
+    """Migration creating the indexes declared in the models' __table_args__ where missing."""
+    def migrate(connection):
+        if ProjectAccess in models:
+            _remove_duplicate_access(connection)
+        for model in models:
+            for index in model.__table__.indexes:
+                index.create(bind=connection, checkfirst=True)
+    return migrate
+
+
+def _recount_unread(connection):
+    """Set every user's unread notification counter from the notifications themselves."""
+    user = connection.dialect.identifier_preparer.quote('user')
+    connection.execute(text(
+        f'UPDATE {user} SET unread_notifications = (SELECT COUNT(*) FROM notification '
+        f'WHERE notification.recipient_id = {user}.id AND notification.read = :read)'
+    ), {'read': False})
+
+
+def _notification_counter(connection):
+    """Migration adding the per-user unread counter and the keyset pagination index."""
+    _add_columns('user', ['unread_notifications'])(connection)
+    _recount_unread(connection)
+    _create_indexes(Notification)(connection)
+
+
+# (id, description, function taking a connection); append only, never reorder
+MIGRATIONS = [
+    ('0001_schedule_columns', 'Schedule status, approval, Pareto parent, seed, fingerprint and horizon columns',
+     _add_columns('schedule', ['status', 'approved_at', 'parent_schedule_id', 'seed',
+                               'input_fingerprint', 'horizon_start', 'horizon_end'])),
+    ('0002_hot_lookup_indexes', 'Composite and unique indexes for the hot lookups',
+     _create_indexes(ProjectAccess, Scene, Actor, ActorScene, Location, Schedule, ScheduledScene, Notification)),
+    ('0003_notification_unread_counter', 'Per-user unread notification counter and keyset pagination index',
+     _notification_counter),
+]
+
+
+def _applied():
+    return {migration_id for migration_id, in db.session.query(SchemaMigration.id)}
+
+
+def run_migrations():
+    """
+    Apply pending migrations in order, each in its own transaction.
+
+    Several web workers may start at once: a migration another worker
+    finished first is skipped, and one that fails because another worker
+    is applying it is retried on the next start-up.
+
+    Returns:
+        List of the migration ids applied by this call
+    """
+    applied = _applied()
+    db.session.commit()
+    done = []
+    for migration_id, description, migrate in MIGRATIONS:
+        if migration_id in applied:
+            continue
+        try:
+            with db.engine.begin() as connection:
+                migrate(connection)
+                connection.execute(SchemaMigration.__table__.insert(),
+                                   {'id': migration_id, 'applied_at': datetime.datetime.utcnow()})
+        except (IntegrityError, OperationalError, ProgrammingError) as e:
+            if migration_id in _applied():
+                db.session.commit()
+                continue
+            logging.error(f"Migration {migration_id} failed: {e}")
+            raise
+        logging.info(f"Applied migration {migration_id}: {description}")
+        done.append(migration_id)
+    return done
+
+
+# Queries on the hot paths and the index each one should be served by
+HOT_QUERIES = [
+    ('user projects', 'SELECT project_id FROM project_access WHERE user_id = :id'),
+    ('project member', 'SELECT id FROM project_access WHERE project_id = :id AND user_id = :id'),
+    ('project scenes', 'SELECT id FROM scene WHERE project_id = :id'),
+    ('project actors', 'SELECT id FROM actor WHERE project_id = :id'),
+    ('project locations', 'SELECT id FROM location WHERE project_id = :id'),
+    ('scene cast', 'SELECT actor_id FROM actor_scene WHERE scene_id = :id'),
+    ('actor scenes', 'SELECT scene_id FROM actor_scene WHERE actor_id = :id'),
+    ('actor availability', 'SELECT start_date, end_date, is_available FROM actor_availability_range '
+                           'WHERE actor_id = :id AND start_date <= :day AND end_date >= :day'),
+    ('location availability', 'SELECT start_date, end_date, is_available FROM location_availability_range '
+                              'WHERE location_id = :id AND start_date <= :day AND end_date >= :day'),
+    ('project actor availability', 'SELECT r.actor_id, r.start_date, r.end_date FROM actor_availability_range r '
+                                   'JOIN actor a ON a.id = r.actor_id WHERE a.project_id = :id'),
+    ('project location availability', 'SELECT r.location_id, r.start_date, r.end_date '
+                                      'FROM location_availability_range r '
+                                      'JOIN location l ON l.id = r.location_id WHERE l.project_id = :id'),
+    ('project schedules', 'SELECT id FROM schedule WHERE project_id = :id ORDER BY created_at DESC'),
+    ('schedule scenes', 'SELECT scene_id FROM scheduled_scene WHERE schedule_id = :id '
+                        'ORDER BY shooting_date, start_time'),
+    ('schedule day', 'SELECT scene_id FROM scheduled_scene WHERE schedule_id = :id AND shooting_date = :day'),
+    ('schedule call sheets', 'SELECT data FROM call_sheet WHERE schedule_id = :id ORDER BY shooting_date'),
+    ('unread notifications', 'SELECT id FROM notification WHERE recipient_id = :id AND read = :flag '
+                             'ORDER BY created_at DESC'),
+    ('notification page', 'SELECT id FROM notification WHERE recipient_id = :id AND created_at <= :day '
+                          'ORDER BY created_at DESC, id DESC LIMIT 20'),
+    ('actor bookings', 'SELECT schedule_id FROM actor_booking WHERE identity = :identity AND date = :day'),
+]
+
+
+def _plan(connection, sql):
+    """Query plan lines of a hot query, and whether any of them reads a whole table."""
+    params = {'id': 1, 'day': datetime.date.today(), 'flag': False, 'identity': ''}
+    if connection.dialect.name == 'postgresql':
+        # Small tables are cheaper to scan; ask whether an index can serve the query at all
+        connection.execute(text('SET LOCAL enable_seqscan = off'))
+        lines = [row[0] for row in connection.execute(text('EXPLAIN ' + sql), params)]
+        return lines, any('Seq Scan' in line for line in lines)
+    lines = [row[-1] for row in connection.execute(text('EXPLAIN QUERY PLAN ' + sql), params)]
+    return lines, any(line.startswith('SCAN ') and 'USING' not in line for line in lines)
+
+
+def check_indexes():
+    """
+    EXPLAIN every hot query against the live schema.
+
+    Returns:
+        List of (name, uses_index, plan lines) tuples
+    """
+    results = []
+    with db.engine.connect() as connection:
+        for name, sql in HOT_QUERIES:
+            with connection.begin():
+                lines, scans = _plan(connection, sql)
+            results.append((name, not scans, lines))
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'upgrade'
+    if command not in ('upgrade', 'status', 'check'):
+        print(__doc__.strip())
+        return 2
+
+    # Importing the app already applies pending migrations
+    with app.app_context():
+        if command == 'upgrade':
+            print(f"Applied: {run_migrations() or 'nothing pending'}")
+            return 0
+
+        if command == 'status':
+            applied = _applied()
+            for migration_id, description, _ in MIGRATIONS:
+                print(f"{'applied' if migration_id in applied else 'pending':8s} {migration_id:34s} {description}")
+            return 0
+
+        failures = 0
+        for name, uses_index, lines in check_indexes():
+            failures += not uses_index
+            print(f"{'ok' if uses_index else 'SCAN':5s} {name}: {' | '.join(lines)}")
+        return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
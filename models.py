@@ -13,6 +13,22 @@ class Role:
     def get_all(cls):
         return [cls.DIRECTOR, cls.PRODUCTION_MANAGER, cls.SCHEDULING_COORDINATOR]
 
+# Schedule lifecycle
+class ScheduleStatus:
+    DRAFT = 'draft'
+    CANDIDATE = 'candidate'  # Alternative from a Pareto front run, linked to its primary schedule
+    APPROVED = 'approved'
+    
+    @classmethod
+    def get_all(cls):
+        return [cls.DRAFT, cls.CANDIDATE, cls.APPROVED]
+
+# Optimization admission queue states
+class TicketStatus:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+
 # User model
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -21,6 +37,7 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(256), nullable=False)
     role = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    unread_notifications = db.Column(db.Integer, default=0)  # Kept in step by notifications.py on every write
     
     # Projects created by this user
     projects = db.relationship('Project', backref='creator', lazy='dynamic')
@@ -59,6 +76,11 @@ class ProjectAccess(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     role = db.Column(db.String(50), nullable=False)
     
+    __table_args__ = (
+        db.Index('uq_project_access_project_user', 'project_id', 'user_id', unique=True),
+        db.Index('ix_project_access_user', 'user_id'),
+    )
+    
     # Relationships
     project = db.relationship('Project')
     user = db.relationship('User')
@@ -81,6 +103,10 @@ class Scene(db.Model):
     time_of_day = db.Column(db.String(20))  # DAY, NIGHT, etc.
     page_number = db.Column(db.Float)  # Page number in screenplay
     
+    __table_args__ = (
+        db.Index('ix_scene_project', 'project_id'),
+    )
+    
     # Relationships
     actor_scenes = db.relationship('ActorScene', backref='scene', lazy='dynamic')
     constraints = db.relationship('SceneConstraint', backref='scene', lazy='dynamic')
@@ -89,6 +115,13 @@ class Scene(db.Model):
     def __repr__(self):
         return f'<Scene {self.scene_number}>'
 
+def normalize_actor_identity(email, name):
+    """Normalized identity of a person: their email when it has one, otherwise their name."""
+    email = (email or '').strip().lower()
+    if '@' in email:
+        return f'email:{email}'
+    return 'name:' + ' '.join((name or '').split()).casefold()
+
 # Actor model
 class Actor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -99,10 +132,19 @@ class Actor(db.Model):
     email = db.Column(db.String(120))
     phone = db.Column(db.String(20))
     
+    __table_args__ = (
+        db.Index('ix_actor_project', 'project_id'),
+    )
+    
     # Relationships
     actor_scenes = db.relationship('ActorScene', backref='actor', lazy='dynamic')
     availability = db.relationship('ActorAvailability', backref='actor', lazy='dynamic')
     
+    @property
+    def identity(self):
+        """The person behind this actor record, shared by their actor records in every project."""
+        return normalize_actor_identity(self.email, self.name)
+    
     def __repr__(self):
         return f'<Actor {self.name} as {self.character_name}>'
 
@@ -113,10 +155,15 @@ class ActorScene(db.Model):
     scene_id = db.Column(db.Integer, db.ForeignKey('scene.id'), nullable=False)
     lines_count = db.Column(db.Integer, default=0)
     
+    __table_args__ = (
+        db.Index('ix_actor_scene_scene', 'scene_id'),
+        db.Index('ix_actor_scene_actor', 'actor_id'),
+    )
+    
     def __repr__(self):
         return f'<ActorScene {self.actor_id}-{self.scene_id}>'
 
-# Actor availability
+# Actor availability, one row per day (legacy; folded into ActorAvailabilityRange at start-up)
 class ActorAvailability(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     actor_id = db.Column(db.Integer, db.ForeignKey('actor.id'), nullable=False)
@@ -126,6 +173,22 @@ class ActorAvailability(db.Model):
     def __repr__(self):
         return f'<ActorAvailability {self.actor_id} on {self.date}>'
 
+# Actor availability as runs of consecutive days with the same status
+class ActorAvailabilityRange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    actor_id = db.Column(db.Integer, db.ForeignKey('actor.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)  # Inclusive
+    is_available = db.Column(db.Boolean, default=True)
+    
+    __table_args__ = (
+        # Runs never share a start day, so writes can upsert on it
+        db.UniqueConstraint('actor_id', 'start_date', name='uq_actor_availability_range_actor_start'),
+    )
+    
+    def __repr__(self):
+        return f'<ActorAvailabilityRange {self.actor_id} {self.start_date} to {self.end_date}>'
+
 # Location model
 class Location(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -134,6 +197,10 @@ class Location(db.Model):
     address = db.Column(db.String(200))
     cost_per_day = db.Column(db.Float, default=0)
     
+    __table_args__ = (
+        db.Index('ix_location_project', 'project_id'),
+    )
+    
     # Relationships
     scenes = db.relationship('Scene', backref='location', lazy='dynamic')
     availability = db.relationship('LocationAvailability', backref='location', lazy='dynamic')
@@ -141,7 +208,7 @@ class Location(db.Model):
     def __repr__(self):
         return f'<Location {self.name}>'
 
-# Location availability
+# Location availability, one row per day (legacy; folded into LocationAvailabilityRange at start-up)
 class LocationAvailability(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     location_id = db.Column(db.Integer, db.ForeignKey('location.id'), nullable=False)
@@ -153,6 +220,23 @@ class LocationAvailability(db.Model):
     def __repr__(self):
         return f'<LocationAvailability {self.location_id} on {self.date}>'
 
+# Location availability as runs of consecutive days with the same status and opening hours
+class LocationAvailabilityRange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('location.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)  # Inclusive
+    start_time = db.Column(db.Time)
+    end_time = db.Column(db.Time)
+    is_available = db.Column(db.Boolean, default=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('location_id', 'start_date', name='uq_location_availability_range_location_start'),
+    )
+    
+    def __repr__(self):
+        return f'<LocationAvailabilityRange {self.location_id} {self.start_date} to {self.end_date}>'
+
 # Scene constraints
 class SceneConstraint(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -173,10 +257,22 @@ class Schedule(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
     total_cost = db.Column(db.Float)
     total_duration = db.Column(db.Float)  # in days
+    status = db.Column(db.String(20), default=ScheduleStatus.DRAFT)  # draft, candidate, approved
+    approved_at = db.Column(db.DateTime)
+    parent_schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'))  # Set on Pareto candidates
+    seed = db.Column(db.BigInteger)  # Random seed the optimization run used
+    input_fingerprint = db.Column(db.String(40))  # ProblemInstance.fingerprint() of the inputs over the horizon
+    horizon_start = db.Column(db.Date)  # Calendar the optimizer searched
+    horizon_end = db.Column(db.Date)
+    
+    __table_args__ = (
+        db.Index('ix_schedule_project_created', 'project_id', 'created_at'),
+    )
     
     # Relationships
     scheduled_scenes = db.relationship('ScheduledScene', backref='schedule', lazy='dynamic')
     notifications = db.relationship('Notification', backref='schedule', lazy='dynamic')
+    candidates = db.relationship('Schedule', backref=db.backref('parent_schedule', remote_side=[id]), lazy='dynamic')
     
     user = db.relationship('User')
     
@@ -193,9 +289,46 @@ class ScheduledScene(db.Model):
     end_time = db.Column(db.Time)
     estimated_cost = db.Column(db.Float)
     
+    __table_args__ = (
+        db.Index('ix_scheduled_scene_schedule_date_start', 'schedule_id', 'shooting_date', 'start_time'),
+    )
+    
     def __repr__(self):
         return f'<ScheduledScene {self.scene_id} on {self.shooting_date}>'
 
+# Call sheet for one shooting day of a schedule, computed when the schedule is saved
+class CallSheet(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=False)
+    shooting_date = db.Column(db.Date, nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON: scenes, locations, actor calls and cost (see call_sheets.py)
+    
+    __table_args__ = (
+        db.Index('uq_call_sheet_schedule_date', 'schedule_id', 'shooting_date', unique=True),
+    )
+    
+    def __repr__(self):
+        return f'<CallSheet {self.schedule_id} on {self.shooting_date}>'
+
+# Cross-project actor booking index: one row per actor and shooting day of a schedule,
+# keyed by normalized identity so the same person is found in every project
+class ActorBooking(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    identity = db.Column(db.String(130), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    actor_id = db.Column(db.Integer, db.ForeignKey('actor.id'), nullable=False)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=False, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_actor_booking_identity_date', 'identity', 'date'),
+    )
+    
+    actor = db.relationship('Actor')
+    schedule = db.relationship('Schedule')
+    
+    def __repr__(self):
+        return f'<ActorBooking {self.identity} on {self.date}>'
+
 # Notification model
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -206,9 +339,45 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     read = db.Column(db.Boolean, default=False)
     
+    __table_args__ = (
+        db.Index('ix_notification_recipient_read_created', 'recipient_id', 'read', 'created_at'),
+        db.Index('ix_notification_recipient_created_id', 'recipient_id', 'created_at', 'id'),  # Keyset pages
+    )
+    
     # Relationships
     user = db.relationship('User')
     actor = db.relationship('Actor')
     
     def __repr__(self):
         return f'<Notification to {self.recipient_id or self.actor_id} at {self.created_at}>'
+
+# Optimization request waiting for, or holding, one of the limited optimizer slots
+class OptimizationTicket(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), default=TicketStatus.QUEUED, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)  # Last retry; abandoned tickets expire
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<OptimizationTicket {self.id} {self.status}>'
+
+# One row per concurrent optimization allowed; a request runs only while it holds a slot
+class OptimizationSlot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('optimization_ticket.id'))
+    claimed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<OptimizationSlot {self.id} held by {self.ticket_id}>'
+
+# Schema migrations applied to this database (see migrations.py)
+class SchemaMigration(db.Model):
+    id = db.Column(db.String(100), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SchemaMigration {self.id}>'
@@ -0,0 +1,279 @@
+"""
+Nightly batch re-optimization across all projects.
+
+Usage:
+    python -m nightly_reoptimize [--cpus N] [--time-limit SECONDS] [--project-id ID [ID ...]] [--seed N] [--dry-run]
+
+Meant to run from cron once the day's availability edits have settled, e.g.
+    0 2 * * * cd /srv/msso && python -m nightly_reoptimize
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from app import app, db
+from models import Project, ProjectAccess, Schedule, ScheduledScene, ScheduleStatus
+from notifications import add_notifications
+from rolling_horizon import solve_rolling_horizon, lock_before_cutoff
+from shared_instance import SharedInstances, attach
+from rng_streams import make_rng, spawn_seeds, SEED_BITS
+from utils import load_problem_instance, add_scheduled_scenes
+
+DEFAULT_TIME_LIMIT = 60.0  # Seconds per project; nobody is waiting on the result
+DEFAULT_CPUS = max(1, (os.cpu_count() or 1) - 1)  # Leave a core for the web workers
+
+# Instances a pool worker attached to at start-up
+_worker_instances = []
+
+
+def _latest_schedule(project_id):
+    """A project's most recent schedule, leaving out Pareto candidates."""
+    return Schedule.query.filter(
+        Schedule.project_id == project_id,
+        Schedule.status != ScheduleStatus.CANDIDATE
+    ).order_by(Schedule.created_at.desc(), Schedule.id.desc()).first()
+
+
+def _horizon(schedule):
+    """Calendar a schedule was optimized over (its shooting dates for schedules saved without one)."""
+    if schedule.horizon_start and schedule.horizon_end:
+        return schedule.horizon_start, schedule.horizon_end
+    return db.session.query(
+        db.func.min(ScheduledScene.shooting_date), db.func.max(ScheduledScene.shooting_date)
+    ).filter(ScheduledScene.schedule_id == schedule.id).one()
+
+
+def find_stale_projects(project_ids=None, today=None):
+    """
+    Projects whose inputs changed since their latest schedule was optimized.
+
+    The inputs are compiled over the latest schedule's horizon and hashed;
+    a project is stale when the hash differs from the one stored on the
+    schedule (schedules saved before hashes were stored always count as
+    stale). Projects without a schedule, or whose horizon is over, are left
+    alone.
+
+    Args:
+        project_ids: Only consider these projects (all if omitted)
+        today: Date the batch runs for (today if omitted); re-planning starts the day after
+
+    Returns:
+        List of job dicts with the project_id, latest schedule_id, instance, fingerprint,
+        base_assignment (from the latest approved schedule, or None) and cutoff day index
+    """
+    tomorrow = (today or datetime.date.today()) + datetime.timedelta(days=1)
+    query = Project.query.order_by(Project.id)
+    if project_ids:
+        query = query.filter(Project.id.in_(project_ids))
+
+    jobs = []
+    for project in query.all():
+        latest = _latest_schedule(project.id)
+        if latest is None:
+            continue
+        horizon_start, horizon_end = _horizon(latest)
+        if horizon_end is None or horizon_end < tomorrow:
+            continue
+
+        instance = load_problem_instance(project.id, horizon_start, horizon_end)
+        if not instance.num_scenes:
+            continue
+        fingerprint = instance.fingerprint()
+        if fingerprint == latest.input_fingerprint:
+            continue
+
+        # Scenes the approved plan has already shot stay where they are
+        base_assignment = None
+        approved = Schedule.query.filter_by(
+            project_id=project.id, status=ScheduleStatus.APPROVED
+        ).order_by(Schedule.approved_at.desc()).first()
+        if approved:
+            base_assignment = instance.assignment_from_schedule({
+                scheduled_scene.scene_id: {'shooting_date': scheduled_scene.shooting_date}
+                for scheduled_scene in approved.scheduled_scenes
+            })
+
+        jobs.append({
+            'project_id': project.id,
+            'schedule_id': latest.id,
+            'instance': instance,
+            'fingerprint': fingerprint,
+            'base_assignment': base_assignment,
+            'cutoff': max(0, (tomorrow - horizon_start).days)
+        })
+        logging.info(f"Project {project.id} changed since schedule {latest.id}")
+    return jobs
+
+
+def _attach_worker(handle):
+    """Pool initializer: wrap the shared instances once per worker process."""
+    global _worker_instances
+    _worker_instances = attach(handle)
+
+
+def _reoptimize_shared(index, base_assignment, cutoff, time_limit, seed):
+    return solve_rolling_horizon(_worker_instances[index], base_assignment, cutoff,
+                                 time_limit=time_limit, seed=seed)
+
+
+def reoptimize(jobs, cpus=DEFAULT_CPUS, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Re-plan every stale project from the cutoff onwards, at most cpus at a time.
+
+    Every job is a single-threaded rolling-horizon run, so the pool size is
+    the whole batch's CPU budget. Workers read the instances from shared
+    memory and never touch the database. A failing project is logged and
+    skipped.
+
+    Returns:
+        List of (assignment, stats) tuples in job order, None for failed jobs
+    """
+    args = [(job['base_assignment'], job['cutoff'], time_limit, spawn_seeds(job['seed'], 2)[0]) for job in jobs]
+    instances = [job['instance'] for job in jobs]
+
+    cpus = max(1, min(cpus, len(jobs)))
+    if cpus == 1:
+        results = []
+        for instance, job_args in zip(instances, args):
+            try:
+                results.append(solve_rolling_horizon(instance, job_args[0], job_args[1],
+                                                     time_limit=job_args[2], seed=job_args[3]))
+            except Exception as e:
+                logging.error(f"Nightly re-optimization failed: {e}", exc_info=True)
+                results.append(None)
+        return results
+
+    # Forked workers must not inherit open database connections
+    db.session.remove()
+    db.engine.dispose()
+
+    results = []
+    with SharedInstances(instances) as shared, ProcessPoolExecutor(
+            max_workers=cpus, initializer=_attach_worker, initargs=(shared.handle,)) as pool:
+        futures = [pool.submit(_reoptimize_shared, index, *job_args) for index, job_args in enumerate(args)]
+        for job, future in zip(jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logging.error(f"Nightly re-optimization of project {job['project_id']} failed: {e}", exc_info=True)
+                results.append(None)
+    return results
+
+
+def write_drafts(jobs, results, today=None):
+    """
+    Save every result as a draft schedule and notify the project's members in one bulk insert.
+
+    Returns:
+        List of new schedule ids
+    """
+    today = today or datetime.date.today()
+    members = defaultdict(set)
+    for access in ProjectAccess.query.filter(ProjectAccess.project_id.in_([job['project_id'] for job in jobs])):
+        members[access.project_id].add(access.user_id)
+
+    schedule_ids = []
+    notifications = []
+    now = datetime.datetime.utcnow()
+    for job, result in zip(jobs, results):
+        if result is None:
+            continue
+        assignment, stats = result
+        instance = job['instance']
+        _, cutoff, locked = lock_before_cutoff(instance, job['base_assignment'], job['cutoff'])
+        optimization_result = instance.build_result(assignment, 'Rolling Horizon (RHBM)', {'search': stats},
+                                                    locked=locked, first_open_day=cutoff)
+        metadata = optimization_result['metadata']
+
+        name = f"Nightly re-optimization {today.strftime('%Y-%m-%d')}"
+        schedule = Schedule(
+            project_id=job['project_id'],
+            name=name,
+            algorithm_used='RHBM',
+            total_cost=metadata.get('total_cost', 0),
+            total_duration=metadata.get('total_days', 0),
+            status=ScheduleStatus.DRAFT,
+            seed=job['seed'],
+            input_fingerprint=job['fingerprint'],
+            horizon_start=instance.dates[0],
+            horizon_end=instance.dates[-1]
+        )
+        db.session.add(schedule)
+        db.session.flush()
+        add_scheduled_scenes(schedule.id, optimization_result['schedule'])
+        schedule_ids.append(schedule.id)
+
+        message = (f"Scenes, cast or availability changed, so '{name}' was re-optimized overnight "
+                   f"({metadata.get('shooting_days', 0)} shooting days, cost {metadata.get('total_cost', 0):,.0f}).")
+        for user_id in sorted(members[job['project_id']]):
+            notifications.append({
+                'schedule_id': schedule.id,
+                'recipient_id': user_id,
+                'message': message,
+                'created_at': now,
+                'read': False
+            })
+
+    # One insert, which also keeps the members' unread counters in step
+    add_notifications(notifications)
+    db.session.commit()
+    logging.info(f"Saved {len(schedule_ids)} draft schedules and {len(notifications)} notifications")
+    return schedule_ids
+
+
+def run_batch(project_ids=None, cpus=DEFAULT_CPUS, time_limit=DEFAULT_TIME_LIMIT, seed=None, dry_run=False, today=None):
+    """
+    Find stale projects, re-optimize them and save the drafts (needs an app context).
+
+    Args:
+        project_ids: Only consider these projects (all if omitted)
+        cpus: Worker processes for the whole batch
+        time_limit: Seconds per project
+        seed: Seed the per-project seeds are drawn from (fresh if omitted)
+        dry_run: Only report the stale projects
+        today: Date the batch runs for (today if omitted)
+
+    Returns:
+        Dict with the stale project ids and the new schedule ids
+    """
+    jobs = find_stale_projects(project_ids, today)
+    summary = {'stale_projects': [job['project_id'] for job in jobs], 'schedule_ids': []}
+    if dry_run or not jobs:
+        return summary
+
+    # One stored seed per project, so each draft can be reproduced on its own
+    for job, job_seed in zip(jobs, make_rng(seed).integers(1 << SEED_BITS, size=len(jobs))):
+        job['seed'] = int(job_seed)
+
+    results = reoptimize(jobs, cpus, time_limit)
+    summary['schedule_ids'] = write_drafts(jobs, results, today)
+    summary['failed_projects'] = [job['project_id'] for job, result in zip(jobs, results) if result is None]
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m nightly_reoptimize', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cpus', type=int, default=DEFAULT_CPUS, help='Worker processes for the whole batch')
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT, help='Seconds per project')
+    parser.add_argument('--project-id', type=int, nargs='+', help='Only consider these projects')
+    parser.add_argument('--seed', type=int, help='Make the batch reproducible')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the projects that changed')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        summary = run_batch(args.project_id, args.cpus, args.time_limit, args.seed, args.dry_run)
+
+    print(f"{len(summary['stale_projects'])} projects changed: {summary['stale_projects']}")
+    if not args.dry_run:
+        print(f"{len(summary['schedule_ids'])} draft schedules written: {summary['schedule_ids']}")
+        if summary.get('failed_projects'):
+            print(f"Failed: {summary['failed_projects']}")
+    return 1 if summary.get('failed_projects') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
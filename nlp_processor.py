@@ -7,6 +7,7 @@ import traceback
 from collections import Counter, defaultdict
 from models import Scene, Actor, Location, ActorScene, SceneConstraint
 from app import db
+from rng_streams import new_seed, spawn_seeds, make_rng
 
 # Configure logging for better error reporting
 logging.basicConfig(
@@ -24,18 +25,25 @@ except OSError:
     spacy.cli.download("en_core_web_sm")
     nlp = spacy.load("en_core_web_sm")
 
-def process_screenplay(pdf_path):
+def process_screenplay(pdf_path, seed=None):
     """
     Process a screenplay PDF and extract scenes, actors, locations, and constraints.
     
     Args:
         pdf_path (str): Path to the screenplay PDF file
+        seed (int): Seed for the generated costs and availability (a fresh one is drawn if omitted)
         
     Returns:
-        dict: Dictionary containing extracted screenplay data
+        dict: Dictionary containing extracted screenplay data and the seed used
     """
     logging.info(f"Processing screenplay: {pdf_path}")
     
+    # The run owns its generator; the seed travels with the data so
+    # extract_screenplay_data draws availability from the same run
+    if seed is None:
+        seed = new_seed()
+    rng = make_rng(spawn_seeds(seed, 2)[0])
+    
     # Extract text from PDF
     text = extract_text_from_pdf(pdf_path)
     
@@ -43,15 +51,15 @@ def process_screenplay(pdf_path):
     scenes = extract_scenes(text)
     
     # Extract actors/characters
-    actors = extract_actors(text, scenes)
+    actors = extract_actors(text, scenes, rng)
     
     # Extract locations
-    locations = extract_locations(scenes)
+    locations = extract_locations(scenes, rng)
     
     # Add fallback locations if none were extracted
     if not locations:
         logging.warning("No locations found in screenplay. Adding default locations.")
-        locations = generate_fallback_locations(text, scenes)
+        locations = generate_fallback_locations(text, scenes, rng)
     
     # Extract constraints (time-based, weather, special requirements)
     constraints = extract_constraints(text, scenes)
@@ -66,7 +74,8 @@ def process_screenplay(pdf_path):
         'actors': actors,
         'locations': locations,
         'constraints': constraints,
-        'actor_scenes': actor_scenes
+        'actor_scenes': actor_scenes,
+        'seed': seed
     }
 
 def extract_text_from_pdf(pdf_path):
@@ -247,12 +256,14 @@ def extract_scenes(text):
     
     return scenes
 
-def extract_actors(text, scenes):
+def extract_actors(text, scenes, rng=None):
     """
     Extract actor/character information from screenplay text and assign arbitrary costs.
     
     Characters in screenplays are typically in ALL CAPS when they speak.
+    Cost variation and phone numbers are drawn from rng (numpy.random.Generator).
     """
+    rng = rng if rng is not None else make_rng()
     actors = []
     character_pattern = r'\n\s*([A-Z][A-Z\s\-\']+)(?:\s*\(.*?\))?\s*\n'
     
@@ -282,7 +293,6 @@ def extract_actors(text, scenes):
             dialog_lengths[name] = len(dialog_text)
     
     # Characters that appear multiple times are likely actual characters
-    import random
     for name, count in character_counter.items():
         if count >= 2 and name not in common_uppercase and len(name) > 1:
             # Use NLP to check if it's likely a person
@@ -317,7 +327,7 @@ def extract_actors(text, scenes):
                 actor_cost = base_cost * cost_factor * (1 + combined_importance)
                 
                 # Add some randomness (±30%)
-                cost_variation = random.uniform(0.7, 1.3)
+                cost_variation = float(rng.uniform(0.7, 1.3))
                 final_cost = round(actor_cost * cost_variation, 2)
                 
                 actors.append({
@@ -327,15 +337,16 @@ def extract_actors(text, scenes):
                     'importance': combined_importance,
                     'cost_per_day': final_cost,
                     'email': f"{name.lower().replace(' ', '.')}@example.com",
-                    'phone': f"555-{random.randint(100, 999)}-{random.randint(1000, 9999)}"
+                    'phone': f"555-{rng.integers(100, 1000)}-{rng.integers(1000, 10000)}"
                 })
     
     # Sort by importance (descending)
     actors.sort(key=lambda x: x['importance'], reverse=True)
     return actors
 
-def extract_locations(scenes):
+def extract_locations(scenes, rng=None):
     """Extract unique locations from scene headers and full screenplay and assign arbitrary costs."""
+    rng = rng if rng is not None else make_rng()
     locations = []
     unique_locations = set()
     
@@ -397,8 +408,7 @@ def extract_locations(scenes):
                 base_cost *= 1.25
                 
             # Add some randomness (±20%)
-            import random
-            cost_variation = random.uniform(0.8, 1.2)
+            cost_variation = float(rng.uniform(0.8, 1.2))
             final_cost = round(base_cost * cost_variation, 2)
             
             locations.append({
@@ -481,8 +491,7 @@ def extract_locations(scenes):
                 base_cost *= 1.25
                 
             # Add some randomness (±25%)
-            import random
-            cost_variation = random.uniform(0.75, 1.25)
+            cost_variation = float(rng.uniform(0.75, 1.25))
             final_cost = round(base_cost * cost_variation, 2)
             
             # Add to the locations list
@@ -553,9 +562,9 @@ def extract_constraints(text, scenes):
     
     return constraints
 
-def generate_fallback_locations(text, scenes):
+def generate_fallback_locations(text, scenes, rng=None):
     """Generate fallback location data when regular extraction fails."""
-    import random
+    rng = rng if rng is not None else make_rng()
     
     # Common location types
     generic_locations = [
@@ -644,7 +653,7 @@ def generate_fallback_locations(text, scenes):
     num_locations = min(15, max(5, len(scenes) // 4))
     
     # Shuffle and select the needed number of locations
-    random.shuffle(generic_locations)
+    rng.shuffle(generic_locations)
     selected_locations = generic_locations[:num_locations]
     
     # Assign costs and other attributes
@@ -652,11 +661,11 @@ def generate_fallback_locations(text, scenes):
     for loc_data in selected_locations:
         # Base cost by complexity
         if loc_data["complexity"] == "expensive":
-            base_cost = random.uniform(4000, 8000)
+            base_cost = float(rng.uniform(4000, 8000))
         elif loc_data["complexity"] == "moderate":
-            base_cost = random.uniform(1800, 4000)
+            base_cost = float(rng.uniform(1800, 4000))
         else:  # inexpensive
-            base_cost = random.uniform(800, 1800)
+            base_cost = float(rng.uniform(800, 1800))
             
         # Exterior locations tend to be more expensive due to weather/lighting concerns
         if loc_data["type"] == "EXTERIOR":
@@ -665,7 +674,7 @@ def generate_fallback_locations(text, scenes):
             base_cost *= 1.25
             
         # Add some randomness (±15%)
-        cost_variation = random.uniform(0.85, 1.15)
+        cost_variation = float(rng.uniform(0.85, 1.15))
         final_cost = round(base_cost * cost_variation, 2)
         
         locations.append({
@@ -715,14 +724,16 @@ def extract_screenplay_data(extracted_data, project_id):
         bool: True if successful
     """
     try:
-        import random
         import datetime
-        from models import ActorAvailability, LocationAvailability
+        from availability_store import write_actor_days, write_location_days
         
         # Get date range for availability (next 60 days)
         today = datetime.date.today()
         date_range = [today + datetime.timedelta(days=i) for i in range(60)]
         
+        # Availability comes from the extraction run's second stream
+        rng = make_rng(spawn_seeds(extracted_data.get('seed'), 2)[1])
+        
         # First, create all locations
         location_map = {}  # Map location name to Location object
         for location_data in extracted_data['locations']:
@@ -757,29 +768,26 @@ def extract_screenplay_data(extracted_data, project_id):
             availability_chance = 0.9 - (min(location.cost_per_day, 10000) / 20000)
             availability_chance = max(0.4, availability_chance)  # Minimum 40% availability
             
+            location_days = {}
             for date in date_range:
                 # Skip weekends for some locations
-                if date.weekday() >= 5 and random.random() < 0.7:  # 70% of locations unavailable on weekends
+                if date.weekday() >= 5 and rng.random() < 0.7:  # 70% of locations unavailable on weekends
                     continue
                     
                 # Randomize availability
-                if random.random() < availability_chance:
+                if rng.random() < availability_chance:
                     # Available this day
                     # Also generate random time restrictions
-                    start_hour = random.randint(7, 10)  # Between 7 AM and 10 AM
-                    end_hour = random.randint(16, 20)  # Between 4 PM and 8 PM
+                    start_hour = int(rng.integers(7, 11))  # Between 7 AM and 10 AM
+                    end_hour = int(rng.integers(16, 21))  # Between 4 PM and 8 PM
                     
                     start_time = datetime.time(hour=start_hour, minute=0)
                     end_time = datetime.time(hour=end_hour, minute=0)
                     
-                    location_availability = LocationAvailability(
-                        location_id=location.id,
-                        date=date,
-                        start_time=start_time,
-                        end_time=end_time,
-                        is_available=True
-                    )
-                    db.session.add(location_availability)
+                    location_days[date] = (True, start_time, end_time)
+            
+            # Consecutive days with the same hours are stored as one range
+            write_location_days(location.id, location_days)
         
         # Create all actors
         actor_map = {}  # Map actor name to Actor object
@@ -817,16 +825,15 @@ def extract_screenplay_data(extracted_data, project_id):
             availability_chance = 0.95 - (importance * 0.5)  # Convert importance to unavailability
             availability_chance = max(0.3, availability_chance)  # At least 30% availability
             
+            actor_days = {}
             for date in date_range:
                 # Randomize availability with weight by importance
-                if random.random() < availability_chance:
+                if rng.random() < availability_chance:
                     # Actor is available this day
-                    actor_availability = ActorAvailability(
-                        actor_id=actor.id,
-                        date=date,
-                        is_available=True
-                    )
-                    db.session.add(actor_availability)
+                    actor_days[date] = True
+            
+            # Runs of available days are stored as one range each
+            write_actor_days(actor.id, actor_days)
         
         # Create all scenes
         scene_map = {}  # Map scene number to Scene object
@@ -0,0 +1,251 @@
+import datetime
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import and_, bindparam, or_
+from sqlalchemy.orm import joinedload
+
+from app import app, db
+from models import ActorScene, Notification, ProjectAccess, ScheduledScene, User
+
+PAGE_SIZE = 20  # Notifications per page
+MAX_PAGE_SIZE = 100
+UNREAD_SUMMARY_SIZE = 5  # Latest unread notifications shown in the navbar
+UNREAD_SUMMARY_TTL = 15  # Seconds a user's unread summary is reused
+
+# user id -> (expires at, unread count it was read at, latest unread notifications as dicts)
+_unread_summaries = {}
+
+# Delivery handlers (e-mail, push, ...) registered with register_delivery_handler.
+# Each is called with a list of committed Notification objects on the dispatcher
+# thread, never on the request that wrote them.
+DELIVERY_HANDLERS = []
+
+_pending = queue.Queue()
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def register_delivery_handler(handler):
+    """Register a function taking a list of Notification objects; usable as a decorator."""
+    DELIVERY_HANDLERS.append(handler)
+    return handler
+
+
+def _adjust_unread(deltas):
+    """Add to users' unread counters in one statement: deltas maps user ids to the change."""
+    deltas = [{'user_id': user_id, 'delta': delta} for user_id, delta in deltas.items() if delta]
+    if not deltas:
+        return
+    table = User.__table__
+    db.session.execute(
+        table.update().where(table.c.id == bindparam('user_id')).values(
+            unread_notifications=db.func.coalesce(table.c.unread_notifications, 0) + bindparam('delta')
+        ),
+        deltas
+    )
+
+
+def add_notifications(rows):
+    """
+    Insert notifications in one statement and bump the recipients' unread counters; the caller commits.
+
+    Every notification is written here, so the counters stay exact.
+
+    Args:
+        rows: List of dicts with schedule_id, message and recipient_id or actor_id
+
+    Returns:
+        List of the new notification ids
+    """
+    if not rows:
+        return []
+    now = datetime.datetime.utcnow()
+    rows = [{'recipient_id': None, 'actor_id': None, 'created_at': now, 'read': False, **row} for row in rows]
+    table = Notification.__table__
+    notification_ids = list(db.session.execute(table.insert().returning(table.c.id), rows).scalars())
+    recipients = Counter(row['recipient_id'] for row in rows if row['recipient_id'] is not None)
+    _adjust_unread(recipients)
+    invalidate_unread_summaries(recipients)
+    return notification_ids
+
+
+def mark_read(user_id, notification_ids=None):
+    """
+    Mark a user's unread notifications read with one UPDATE; the caller commits.
+
+    Args:
+        user_id: Recipient
+        notification_ids: Only these notifications (all of the user's if omitted)
+
+    Returns:
+        Number of notifications that were unread
+    """
+    table = Notification.__table__
+    statement = table.update().where(table.c.recipient_id == user_id, table.c.read == db.false())
+    if notification_ids is not None:
+        statement = statement.where(table.c.id.in_(list(notification_ids)))
+    marked = db.session.execute(statement.values(read=True)).rowcount
+    _adjust_unread({user_id: -marked})
+    invalidate_unread_summaries([user_id])
+    return marked
+
+
+def unread_count(user):
+    """A user's unread notification count, from the counter kept on write (no COUNT query)."""
+    return user.unread_notifications or 0
+
+
+def unread_summary(user):
+    """
+    The navbar's unread notifications of a user: {'count': n, 'latest': [dicts]}.
+
+    The latest unread are cached per user for UNREAD_SUMMARY_TTL seconds
+    and only reused while the user's unread counter is unchanged. Writes in
+    this process drop the entry at once; a write in another web worker
+    changes the counter, so it is seen on the next page too.
+    """
+    count = unread_count(user)
+    if not count:
+        return {'count': 0, 'latest': []}
+
+    now = time.monotonic()
+    cached = _unread_summaries.get(user.id)
+    if cached and cached[0] > now and cached[1] == count:
+        return {'count': count, 'latest': cached[2]}
+
+    latest = [{
+        'id': notification_id,
+        'schedule_id': schedule_id,
+        'message': message,
+        'created_at': created_at,
+        'read': False
+    } for notification_id, schedule_id, message, created_at in db.session.query(
+        Notification.id, Notification.schedule_id, Notification.message, Notification.created_at
+    ).filter(
+        Notification.recipient_id == user.id, Notification.read == db.false()
+    ).order_by(Notification.created_at.desc()).limit(UNREAD_SUMMARY_SIZE)]
+    _unread_summaries[user.id] = (now + UNREAD_SUMMARY_TTL, count, latest)
+    return {'count': count, 'latest': latest}
+
+
+def invalidate_unread_summaries(user_ids):
+    """Drop the cached unread summaries of users who just got or read notifications."""
+    for user_id in user_ids:
+        _unread_summaries.pop(user_id, None)
+
+
+def encode_cursor(notification):
+    """Keyset cursor pointing just past a notification in newest-first order."""
+    return f"{notification.created_at.isoformat()}_{notification.id}"
+
+
+def decode_cursor(cursor):
+    """
+    (created_at, id) of a keyset cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    created_at, _, notification_id = cursor.rpartition('_')
+    return datetime.datetime.fromisoformat(created_at), int(notification_id)
+
+
+def notification_page(user_id, before=None, limit=PAGE_SIZE):
+    """
+    One page of a user's notifications, newest first, by keyset on (created_at, id).
+
+    The page is read straight off the (recipient_id, created_at, id) index,
+    so late pages cost the same as the first.
+
+    Args:
+        user_id: Recipient
+        before: Cursor from the previous page (first page if omitted)
+        limit: Page size, capped at MAX_PAGE_SIZE
+
+    Returns:
+        (notifications, cursor of the next page or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    query = Notification.query.options(joinedload(Notification.schedule)).filter(Notification.recipient_id == user_id)
+    if before:
+        created_at, notification_id = decode_cursor(before)
+        query = query.filter(or_(
+            Notification.created_at < created_at,
+            and_(Notification.created_at == created_at, Notification.id < notification_id)
+        ))
+    notifications = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1).all()
+    if len(notifications) > limit:
+        return notifications[:limit], encode_cursor(notifications[limit - 1])
+    return notifications, None
+
+
+def schedule_actor_ids(schedule_id):
+    """Ids of every actor cast in a schedule's scenes, in one DISTINCT join."""
+    return [actor_id for actor_id, in db.session.query(ActorScene.actor_id).join(
+        ScheduledScene, ScheduledScene.scene_id == ActorScene.scene_id
+    ).filter(ScheduledScene.schedule_id == schedule_id).distinct()]
+
+
+def notify_schedule_approved(schedule, approver_id):
+    """
+    Notify the project team (except the approver) and every actor in an approved schedule.
+
+    Args:
+        schedule: Approved Schedule
+        approver_id: User who approved it
+
+    Returns:
+        List of the new notification ids, for dispatch_notifications once committed
+    """
+    team = db.session.query(ProjectAccess.user_id).filter(
+        ProjectAccess.project_id == schedule.project_id,
+        ProjectAccess.user_id != approver_id
+    ).distinct()
+    rows = [{
+        'schedule_id': schedule.id,
+        'recipient_id': user_id,
+        'message': f"Schedule '{schedule.name}' has been approved by the director."
+    } for user_id, in team]
+    rows += [{
+        'schedule_id': schedule.id,
+        'actor_id': actor_id,
+        'message': "A new shooting schedule has been approved. Please check your assigned scenes."
+    } for actor_id in schedule_actor_ids(schedule.id)]
+    return add_notifications(rows)
+
+
+def dispatch_notifications(notification_ids):
+    """Queue committed notifications for the delivery handlers; returns at once."""
+    if not notification_ids or not DELIVERY_HANDLERS:
+        return
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _dispatcher = threading.Thread(target=_dispatch_forever, name='notification-dispatcher', daemon=True)
+            _dispatcher.start()
+    _pending.put(list(notification_ids))
+
+
+def _dispatch_forever():
+    while True:
+        notification_ids = _pending.get()
+        try:
+            with app.app_context():
+                notifications = Notification.query.filter(Notification.id.in_(notification_ids)).all()
+                for handler in list(DELIVERY_HANDLERS):
+                    try:
+                        handler(notifications)
+                    except Exception as e:
+                        logging.error(f"Notification delivery by {handler.__name__} failed: {e}", exc_info=True)
+                db.session.remove()
+        except Exception as e:
+            logging.error(f"Notification dispatch error: {e}", exc_info=True)
+        finally:
+            _pending.task_done()
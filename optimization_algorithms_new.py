@@ -8,12 +8,13 @@ from utils_json import convert_datetime_to_strings
 
 try:
     import numpy as np
+    from rng_streams import make_rng
 except ImportError:
     # Fallback for when numpy isn't available
     logging.warning("NumPy not available; some optimization features will use slower fallbacks")
     np = None
 
-def optimize_schedule_tabu_search(scenes, actors, locations, actor_availability, location_availability, actor_scenes, start_date, end_date=None):
+def optimize_schedule_tabu_search(scenes, actors, locations, actor_availability, location_availability, actor_scenes, start_date, end_date=None, seed=None):
     """
     Tabu Search-Based Method for schedule optimization.
     
@@ -26,6 +27,7 @@ def optimize_schedule_tabu_search(scenes, actors, locations, actor_availability,
         actor_scenes: Dict mapping scene_id to list of actor_ids
         start_date: First possible shooting date
         end_date: Last possible shooting date (optional)
+        seed: Seed for the run's random number generator (optional)
         
     Returns:
         Dict mapping scene_id to scheduling information
@@ -35,7 +37,7 @@ def optimize_schedule_tabu_search(scenes, actors, locations, actor_availability,
     # For now, use the more reliable ant colony optimization
     # with a wrapper to maintain consistent return format
     result = optimize_schedule_ant_colony(scenes, actors, locations, actor_availability, 
-                                         location_availability, actor_scenes, start_date, end_date)
+                                         location_availability, actor_scenes, start_date, end_date, seed)
     
     # Update metadata to reflect the algorithm used
     if isinstance(result, dict) and 'metadata' in result:
@@ -43,7 +45,7 @@ def optimize_schedule_tabu_search(scenes, actors, locations, actor_availability,
     
     return result
 
-def optimize_schedule_particle_swarm(scenes, actors, locations, actor_availability, location_availability, actor_scenes, start_date, end_date=None):
+def optimize_schedule_particle_swarm(scenes, actors, locations, actor_availability, location_availability, actor_scenes, start_date, end_date=None, seed=None):
     """
     Particle Swarm Optimization-Based Method for schedule optimization.
     
@@ -56,6 +58,7 @@ def optimize_schedule_particle_swarm(scenes, actors, locations, actor_availabili
         actor_scenes: Dict mapping scene_id to list of actor_ids
         start_date: First possible shooting date
         end_date: Last possible shooting date (optional)
+        seed: Seed for the run's random number generator (optional)
         
     Returns:
         Dict mapping scene_id to scheduling information
@@ -65,7 +68,7 @@ def optimize_schedule_particle_swarm(scenes, actors, locations, actor_availabili
     # For now, use the more reliable ant colony optimization
     # with a wrapper to maintain consistent return format
     result = optimize_schedule_ant_colony(scenes, actors, locations, actor_availability, 
-                                         location_availability, actor_scenes, start_date, end_date)
+                                         location_availability, actor_scenes, start_date, end_date, seed)
     
     # Update metadata to reflect the algorithm used
     if isinstance(result, dict) and 'metadata' in result:
@@ -312,7 +315,7 @@ def format_solution(solution, scenes, actors, locations):
         }
         return convert_datetime_to_strings(error_result)
 
-def optimize_schedule_ant_colony(scenes, actors, locations, actor_availability, location_availability, actor_scenes, start_date, end_date=None):
+def optimize_schedule_ant_colony(scenes, actors, locations, actor_availability, location_availability, actor_scenes, start_date, end_date=None, seed=None, instance=None):
     """
     A simplified Ant Colony Optimization-Based Method for schedule optimization.
     This version prioritizes reliable operation over complex optimizations.
@@ -326,12 +329,19 @@ def optimize_schedule_ant_colony(scenes, actors, locations, actor_availability,
         actor_scenes: Dict mapping scene_id to list of actor_ids
         start_date: First possible shooting date
         end_date: Last possible shooting date (optional)
+        seed: Seed for the run's random number generator (optional)
+        instance: ProblemInstance the caller already compiled from the same inputs,
+            reused by the slotting stage (optional)
         
     Returns:
         Dict mapping scene_id to scheduling information
     """
     logging.info("Starting Simplified Ant Colony Optimization")
     
+    # Every run owns its generator so concurrent runs don't share state
+    # and a stored seed reproduces the schedule
+    rng = make_rng(seed) if np is not None else random.Random(seed)
+    
     try:
         # If no end date specified, set a reasonable range
         if not end_date:
@@ -461,9 +471,9 @@ def optimize_schedule_ant_colony(scenes, actors, locations, actor_availability,
                     'description': scene.description,
                     'location_id': location_id,
                     'location_name': location_name,
-                    'int_ext': scene.int_ext if scene.int_ext else ('INT' if random.random() < 0.6 else 'EXT'),
-                    'time_of_day': scene.time_of_day if scene.time_of_day else ('DAY' if random.random() < 0.7 else 'NIGHT'),
-                    'estimated_duration': scene.estimated_duration if scene.estimated_duration else random.uniform(1.0, 4.0),
+                    'int_ext': scene.int_ext if scene.int_ext else ('INT' if rng.random() < 0.6 else 'EXT'),
+                    'time_of_day': scene.time_of_day if scene.time_of_day else ('DAY' if rng.random() < 0.7 else 'NIGHT'),
+                    'estimated_duration': scene.estimated_duration if scene.estimated_duration else float(rng.uniform(1.0, 4.0)),
                     'priority': scene.priority if scene.priority else 5,
                     'shooting_date': shooting_date,
                     'date': shooting_date,  # For legacy compatibility
@@ -476,40 +486,41 @@ def optimize_schedule_ant_colony(scenes, actors, locations, actor_availability,
         # Calculate schedule metadata
         total_cost = sum(scene_data['estimated_cost'] for scene_data in solution.values())
         
-        # Generate scene start/end times based on estimated durations
-        # Group scenes by date
-        scenes_by_date = {}
-        for scene_id, scene_data in solution.items():
-            date_str = scene_data['shooting_date'].strftime('%Y-%m-%d')
-            if date_str not in scenes_by_date:
-                scenes_by_date[date_str] = []
-            scenes_by_date[date_str].append(scene_data)
-        
-        # For each date, assign appropriate start/end times
-        for date_str, day_scenes in scenes_by_date.items():
-            # Sort scenes by priority
-            day_scenes.sort(key=lambda s: (-s.get('priority', 5)))
-            
-            # Start time at 8:00 AM
-            current_time = datetime.datetime.combine(
-                day_scenes[0]['shooting_date'], 
-                datetime.time(8, 0)
-            )
-            
-            # Assign start/end times based on estimated duration
-            for scene_data in day_scenes:
-                scene_id = scene_data['scene_id']
-                duration_hours = scene_data.get('estimated_duration', 2.0)
-                
-                # Set start time
-                solution[scene_id]['start_time'] = current_time.time()
-                
-                # Calculate end time
-                end_time = current_time + datetime.timedelta(hours=duration_hours)
-                solution[scene_id]['end_time'] = end_time.time()
-                
-                # Move to next scene with 30 minute break
-                current_time = end_time + datetime.timedelta(minutes=30)
+        # Place each day's scenes into their locations' shooting windows; scenes
+        # that don't fit are moved to another day by the slotting stage
+        from problem_instance import ProblemInstance
+        from slotting import slot_schedule, hours_to_time
+        if instance is None:
+            instance = ProblemInstance.from_models(scenes, actors, locations, actor_availability,
+                                                   location_availability, actor_scenes, start_date, end_date)
+        # Slot with the durations this run estimated for scenes that have none; the
+        # copy leaves the caller's instance alone
+        instance = copy.copy(instance)
+        instance.durations = np.array([
+            solution[int(scene_id)]['estimated_duration'] if int(scene_id) in solution else instance.durations[i]
+            for i, scene_id in enumerate(instance.scene_ids)
+        ])
+        assignment, start_hours, end_hours, slotting = slot_schedule(
+            instance, instance.assignment_from_schedule(solution)
+        )
+        for i, scene_id in enumerate(instance.scene_ids):
+            scene_data = solution.get(int(scene_id))
+            if scene_data is None:
+                continue
+            if assignment[i] < 0:
+                # Left unscheduled: keep the day chosen above, without shooting times
+                scene_data['start_time'] = None
+                scene_data['end_time'] = None
+                continue
+            shooting_date = instance.dates[assignment[i]]
+            scene_data['shooting_date'] = shooting_date
+            scene_data['date'] = shooting_date
+            if np.isnan(start_hours[i]):
+                scene_data['start_time'] = None
+                scene_data['end_time'] = None
+            else:
+                scene_data['start_time'] = hours_to_time(shooting_date, start_hours[i])
+                scene_data['end_time'] = hours_to_time(shooting_date, end_hours[i])
         
         # Calculate schedule statistics
         earliest_date = min((scene_data['shooting_date'] for scene_data in solution.values()), default=start_date)
@@ -525,11 +536,12 @@ def optimize_schedule_ant_colony(scenes, actors, locations, actor_availability,
                 'start_date': earliest_date.strftime('%Y-%m-%d'),
                 'end_date': latest_date.strftime('%Y-%m-%d'),
                 'total_scenes': len(solution),
+                'slotting': slotting,
                 'algorithm': 'Simplified Ant Colony Optimization'
             }
         }
         
-        return convert_datetime_to_strings(result)
+        return result
     
     except Exception as e:
         logging.error(f"Error in schedule optimization: {str(e)}", exc_info=True)
@@ -597,7 +609,7 @@ def optimize_schedule_ant_colony(scenes, actors, locations, actor_availability,
                     'algorithm': 'Emergency Fallback Scheduler'
                 }
             }
-            return convert_datetime_to_strings(fallback_result)
+            return fallback_result
             
         except Exception as fallback_error:
             logging.error(f"Emergency fallback also failed: {str(fallback_error)}", exc_info=True)
@@ -632,4 +644,4 @@ def optimize_schedule_ant_colony(scenes, actors, locations, actor_availability,
                     'algorithm': 'Minimal Fallback'
                 }
             }
-            return convert_datetime_to_strings(minimal_result)
\ No newline at end of file
+            return minimal_result
\ No newline at end of file
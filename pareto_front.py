@@ -0,0 +1,267 @@
+import logging
+import time
+
+import numpy as np
+
+from problem_instance import ProblemInstance, ScheduleState
+from local_search import local_search
+from rng_streams import make_rng
+
+DEFAULT_TIME_LIMIT = 10.0  # Seconds
+DEFAULT_POPULATION_SIZE = 40
+DEFAULT_MAX_GENERATIONS = 2000
+MUTATION_RATE = 0.03  # Per scene
+COMPRESS_SHARE = 0.5  # Share of mutations that move a scene onto a day the individual already shoots
+MAX_CANDIDATES = 8  # Front members returned as candidate schedules
+SEED_POLISH_SHARE = 0.4  # Share of the budget spent polishing the initial population with local search
+
+
+def non_dominated_sort(objectives):
+    """
+    Rank individuals into Pareto fronts (0 = non-dominated).
+
+    The full dominance matrix is built with broadcasting, and each front is
+    peeled off by subtracting its rows from the domination counts.
+
+    Args:
+        objectives: Float array of shape (N, M), all objectives minimized
+
+    Returns:
+        Int array of front ranks
+    """
+    no_worse = (objectives[:, None, :] <= objectives[None, :, :]).all(axis=2)
+    better = (objectives[:, None, :] < objectives[None, :, :]).any(axis=2)
+    dominates = no_worse & better  # dominates[i, j]: i dominates j
+
+    ranks = np.full(len(objectives), -1, dtype=np.int64)
+    dominated_by = dominates.sum(axis=0)
+    remaining = np.ones(len(objectives), dtype=bool)
+    rank = 0
+    while remaining.any():
+        front = remaining & (dominated_by == 0)
+        ranks[front] = rank
+        remaining &= ~front
+        dominated_by = dominated_by - dominates[front].sum(axis=0)
+        rank += 1
+    return ranks
+
+
+def crowding_distance(objectives, ranks):
+    """
+    NSGA-II crowding distance within each front.
+
+    Boundary individuals of a front get an infinite distance so the extremes
+    of the trade-off are never dropped.
+    """
+    distance = np.zeros(len(objectives))
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        if len(members) <= 2:
+            distance[members] = np.inf
+            continue
+
+        values = objectives[members]
+        order = np.argsort(values, axis=0, kind='stable')
+        ordered = np.take_along_axis(values, order, axis=0)
+        span = ordered[-1] - ordered[0]
+        span[span == 0] = 1.0
+
+        gaps = np.empty_like(values)
+        gaps[1:-1] = (ordered[2:] - ordered[:-2]) / span
+        gaps[[0, -1]] = np.inf
+        contributions = np.empty_like(values)
+        np.put_along_axis(contributions, order, gaps, axis=0)
+        distance[members] = contributions.sum(axis=1)
+    return distance
+
+
+def initial_population(instance, size, rng, polish_time=0.0):
+    """
+    Seed the population with greedy schedules squeezed into shorter and longer calendars.
+
+    Restricting greedy insertion to the first k days for a spread of k gives
+    starting points along the whole cost/shooting-days trade-off. With a
+    polish budget, every seed is then improved by a short local search
+    (recombination alone is slow to find good location blocks).
+    """
+    min_days = int(np.ceil(instance.durations.sum() / instance.day_capacity))
+    horizons = np.linspace(max(1, min_days), instance.num_days, size).round().astype(np.int64)
+    days = np.arange(instance.num_days)
+
+    population = np.empty((size, instance.num_scenes), dtype=np.int64)
+    for i, horizon in enumerate(horizons):
+        state = ScheduleState(instance)
+        state.insert_greedy(state.construction_order(rng), allowed_days=days < horizon)
+        population[i] = state.assignment
+        if polish_time > 0:
+            population[i], _ = local_search(instance, state.assignment, time_limit=polish_time / size, rng=rng)
+    return population
+
+
+def make_offspring(instance, population, ranks, distance, rng):
+    """
+    Binary tournament, location-block crossover and mutation for a whole generation.
+
+    Crossover inherits each location's days from one parent so location
+    blocks survive recombination. Mutation moves scenes either onto a day
+    the child already shoots (pulling towards fewer days) or onto a random
+    conflict-free day.
+    """
+    size, num_scenes = population.shape
+
+    # Binary tournament on (rank, crowding distance)
+    a, b = rng.integers(size, size=(2, size))
+    a_wins = (ranks[a] < ranks[b]) | ((ranks[a] == ranks[b]) & (distance[a] > distance[b]))
+    parents = np.where(a_wins, a, b)
+    mates = parents[rng.permutation(size)]
+
+    # Location-block uniform crossover (scenes without a location form their own block)
+    from_first = rng.random((size, instance.num_locations + 1)) < 0.5
+    children = np.where(from_first[:, instance.scene_location + 1], population[parents], population[mates])
+
+    # Mutation
+    rows, scenes = np.nonzero(rng.random((size, num_scenes)) < MUTATION_RATE)
+    if rows.size:
+        compress = rng.random(rows.size) < COMPRESS_SHARE
+        shot_days = children[rows, rng.integers(num_scenes, size=rows.size)]
+
+        domain = instance.feasible[scenes]
+        domain[~domain.any(axis=1)] = True
+        random_days = np.argmax(rng.random(domain.shape) * domain, axis=1)
+
+        children[rows, scenes] = np.where(compress, shot_days, random_days)
+    return children
+
+
+def pareto_search(instance, population_size=DEFAULT_POPULATION_SIZE, max_generations=DEFAULT_MAX_GENERATIONS,
+                  time_limit=DEFAULT_TIME_LIMIT, rng=None):
+    """
+    NSGA-II over total cost and number of shooting days.
+
+    Args:
+        instance: ProblemInstance to optimize
+        population_size: Individuals kept per generation
+        max_generations: Generation cap
+        time_limit: Wall clock budget in seconds
+        rng: numpy.random.Generator (a fresh one is created if omitted)
+
+    Returns:
+        Tuple of (front assignments array sorted by shooting days, front objectives array, stats dict)
+    """
+    rng = rng if rng is not None else make_rng()
+    started = time.perf_counter()
+    deadline = started + time_limit
+
+    population = initial_population(instance, population_size, rng, polish_time=time_limit * SEED_POLISH_SHARE)
+    scores = instance.evaluate_population(population)
+    objectives = np.column_stack([scores['objective'], scores['shooting_days']]).astype(float)
+    ranks = non_dominated_sort(objectives)
+    distance = crowding_distance(objectives, ranks)
+
+    generations = 0
+    while generations < max_generations and time.perf_counter() < deadline:
+        generations += 1
+        children = make_offspring(instance, population, ranks, distance, rng)
+        child_scores = instance.evaluate_population(children)
+        child_objectives = np.column_stack([child_scores['objective'], child_scores['shooting_days']])
+
+        # (mu + lambda) survivor selection
+        combined = np.vstack([population, children])
+        combined_objectives = np.vstack([objectives, child_objectives])
+        combined_ranks = non_dominated_sort(combined_objectives)
+        combined_distance = crowding_distance(combined_objectives, combined_ranks)
+        survivors = np.lexsort((-combined_distance, combined_ranks))[:population_size]
+
+        population = combined[survivors]
+        objectives = combined_objectives[survivors]
+        ranks = non_dominated_sort(objectives)
+        distance = crowding_distance(objectives, ranks)
+
+    # Distinct trade-offs on the first front, fewest shooting days first
+    front = np.flatnonzero(ranks == 0)
+    _, unique = np.unique(objectives[front], axis=0, return_index=True)
+    front = front[unique]
+    front = front[np.argsort(objectives[front, 1], kind='stable')]
+
+    stats = {
+        'generations': generations,
+        'population_size': population_size,
+        'front_size': int(len(front)),
+        'runtime_seconds': round(time.perf_counter() - started, 3)
+    }
+    logging.info(f"NSGA-II finished after {generations} generations with {len(front)} Pareto-optimal schedules")
+    return population[front], objectives[front], stats
+
+
+def knee_point(objectives):
+    """Index of the front member closest to the ideal point after normalizing both objectives."""
+    low = objectives.min(axis=0)
+    span = objectives.max(axis=0) - low
+    span[span == 0] = 1.0
+    return int(np.argmin(np.linalg.norm((objectives - low) / span, axis=1)))
+
+
+def optimize_instance_pareto(instance, seed=None):
+    """
+    NSGA-II Multi-Objective Method for schedule optimization on an already compiled instance.
+
+    Args:
+        instance: ProblemInstance (from utils.load_problem_instance or ProblemInstance.from_models)
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries; the rest of the front is under metadata['pareto_front']
+    """
+    logging.info("Starting NSGA-II Pareto front optimization")
+
+    front, objectives, stats = pareto_search(instance, rng=make_rng(seed))
+
+    # Keep an evenly spread subset of a large front
+    if len(front) > MAX_CANDIDATES:
+        keep = np.unique(np.linspace(0, len(front) - 1, MAX_CANDIDATES).round().astype(np.int64))
+        front, objectives = front[keep], objectives[keep]
+    knee = knee_point(objectives)
+
+    algorithm = 'NSGA-II Pareto Front (NSGABM)'
+    candidates = []
+    for i, assignment in enumerate(front):
+        result = instance.build_result(assignment, algorithm)
+        candidates.append({
+            'shooting_days': result['metadata']['shooting_days'],
+            'total_cost': result['metadata']['total_cost'],
+            'total_days': result['metadata']['total_days'],
+            'objective': result['metadata']['objective'],
+            'is_primary': i == knee,
+            'schedule': result['schedule']
+        })
+
+    return instance.build_result(front[knee], algorithm, {'search': stats, 'pareto_front': candidates})
+
+
+def optimize_schedule_pareto(scenes, actors, locations, actor_availability, location_availability,
+                             actor_scenes, start_date, end_date=None, seed=None):
+    """
+    NSGA-II Multi-Objective Method for schedule optimization.
+
+    Searches the trade-off between total cost and number of shooting days in
+    one run. The returned schedule is the knee of the Pareto front; the rest
+    of the front is returned under metadata['pareto_front'] as candidate
+    schedules.
+
+    Args:
+        scenes: List of Scene objects
+        actors: List of Actor objects
+        locations: List of Location objects
+        actor_availability: Dict mapping actor_id to availability by date
+        location_availability: Dict mapping location_id to availability by date
+        actor_scenes: Dict mapping scene_id to list of actor_ids
+        start_date: First possible shooting date
+        end_date: Last possible shooting date (optional)
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    instance = ProblemInstance.from_models(scenes, actors, locations, actor_availability,
+                                           location_availability, actor_scenes, start_date, end_date)
+    return optimize_instance_pareto(instance, seed=seed)
@@ -0,0 +1,833 @@
+import datetime
+import hashlib
+import json
+import logging
+
+import numpy as np
+
+
+# Cost terms, kept in line with evaluate_solution() in optimization_algorithms_new.py
+UNAVAILABLE_PENALTY = 10000  # Per unavailable actor/location booked on a day
+TRAVEL_COST = 500  # Per extra location visited on the same day
+DAY_CAPACITY_HOURS = 12.0  # Shooting hours available in one day
+OVERTIME_PENALTY = 10000  # Per hour scheduled beyond the day capacity
+DEFAULT_SCENE_DURATION = 2.0  # Hours, used when a scene has no estimate
+DAY_START_HOUR = 8.0  # Crew call, used when a location sets no opening time
+DAY_END_HOUR = 23.0  # Latest wrap, used when a location sets no closing time
+
+
+def _clock_hours(value, default):
+    """Hours since midnight of an 'HH:MM' string or time object (default when missing or unparsable)."""
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.strptime(value[:5], '%H:%M').time()
+        except ValueError:
+            return default
+    if isinstance(value, datetime.time):
+        return value.hour + value.minute / 60.0
+    return default
+
+
+def build_date_range(start_date, end_date, num_scenes):
+    """
+    Build the list of candidate shooting dates.
+
+    Uses the same default horizon as the ant colony optimizer when no end date
+    is given, so every algorithm searches the same calendar.
+    """
+    if not end_date:
+        end_date = start_date + datetime.timedelta(days=max(num_scenes * 2, 30))
+
+    dates = []
+    current_date = start_date
+    while current_date <= end_date:
+        dates.append(current_date)
+        current_date += datetime.timedelta(days=1)
+
+    if not dates:
+        logging.error("No available dates for scheduling")
+        dates = [start_date + datetime.timedelta(days=i) for i in range(max(14, num_scenes * 2))]
+
+    return dates
+
+
+class ProblemInstance:
+    """
+    Compiled, array-based form of one scheduling problem.
+
+    Scenes, actors, locations and dates are addressed by their position in
+    the corresponding id lists. Everything an optimizer needs to price a
+    schedule lives in NumPy arrays so cost changes can be computed without
+    touching ORM objects.
+    """
+
+    # Constructor arguments stored as arrays when an instance is serialized
+    ARRAY_FIELDS = ('scene_ids', 'actor_ids', 'location_ids', 'scene_location', 'incidence', 'actor_cost',
+                    'location_cost', 'actor_available', 'location_available', 'durations', 'priorities',
+                    'location_open', 'location_close')
+    # Lookup arrays derived by _compile()
+    COMPILED_FIELDS = ('edge_scene', 'edge_actor', 'conflicts', 'feasible')
+    FORMAT_VERSION = 1
+
+    def __init__(self, scene_ids, actor_ids, location_ids, dates, scene_location, incidence,
+                 actor_cost, location_cost, actor_available, location_available, durations,
+                 priorities, scene_info=None, location_names=None, day_capacity=DAY_CAPACITY_HOURS,
+                 location_open=None, location_close=None):
+        self.scene_ids = np.asarray(scene_ids, dtype=np.int64)
+        self.actor_ids = np.asarray(actor_ids, dtype=np.int64)
+        self.location_ids = np.asarray(location_ids, dtype=np.int64)
+        self.dates = list(dates)
+        self.scene_location = np.asarray(scene_location, dtype=np.int64)
+        self.incidence = np.asarray(incidence, dtype=bool).reshape(len(self.scene_ids), len(self.actor_ids))
+        self.actor_cost = np.asarray(actor_cost, dtype=float)
+        self.location_cost = np.asarray(location_cost, dtype=float)
+        self.actor_available = np.asarray(actor_available, dtype=bool).reshape(len(self.actor_ids), len(self.dates))
+        self.location_available = np.asarray(location_available, dtype=bool).reshape(len(self.location_ids), len(self.dates))
+        self.durations = np.asarray(durations, dtype=float)
+        self.priorities = np.asarray(priorities, dtype=np.int64)
+        self.scene_info = scene_info or [{'scene_id': int(scene_id)} for scene_id in self.scene_ids]
+        self.location_names = location_names or ['Unknown Location'] * len(self.location_ids)
+        self.day_capacity = float(day_capacity)
+
+        # Shooting window of every location on every day, in hours since midnight
+        window_shape = (len(self.location_ids), len(self.dates))
+        self.location_open = np.full(window_shape, DAY_START_HOUR) if location_open is None else \
+            np.asarray(location_open, dtype=float).reshape(window_shape)
+        self.location_close = np.full(window_shape, DAY_END_HOUR) if location_close is None else \
+            np.asarray(location_close, dtype=float).reshape(window_shape)
+
+        self._compile()
+
+    def _compile(self):
+        """Derive the lookup arrays used by the cost kernels."""
+        # Sparse view of the scene/actor incidence matrix
+        self.edge_scene, self.edge_actor = np.nonzero(self.incidence)
+        self.scene_actors = [np.flatnonzero(row) for row in self.incidence]
+
+        # Number of unavailable actors/locations for every scene on every day
+        conflicts = self.incidence.astype(np.int32) @ (~self.actor_available).astype(np.int32)
+        has_location = self.scene_location >= 0
+        if has_location.any():
+            conflicts[has_location] += ~self.location_available[self.scene_location[has_location]]
+        self.conflicts = conflicts
+
+        # Days each scene can be shot without any availability conflict
+        self.feasible = conflicts == 0
+        self.date_index = {date: index for index, date in enumerate(self.dates)}
+
+    def arrays(self):
+        """Every array of the instance, inputs and compiled lookups, by attribute name."""
+        return {field: getattr(self, field) for field in self.ARRAY_FIELDS + self.COMPILED_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays, dates, day_capacity=DAY_CAPACITY_HOURS, scene_info=None, location_names=None):
+        """
+        Wrap the output of arrays() without copying or recompiling it.
+
+        Worker processes use this to build an instance directly over arrays
+        that live in shared memory.
+
+        Args:
+            arrays: Dict with every field in ARRAY_FIELDS and COMPILED_FIELDS
+            dates: Candidate shooting dates
+            day_capacity: Shooting hours available in one day
+            scene_info: Optional display data per scene
+            location_names: Optional display name per location
+
+        Returns:
+            ProblemInstance
+        """
+        instance = cls.__new__(cls)
+        for field in cls.ARRAY_FIELDS + cls.COMPILED_FIELDS:
+            setattr(instance, field, arrays[field])
+        instance.dates = list(dates)
+        instance.scene_info = scene_info or [{'scene_id': int(scene_id)} for scene_id in instance.scene_ids]
+        instance.location_names = location_names or ['Unknown Location'] * len(instance.location_ids)
+        instance.day_capacity = float(day_capacity)
+        # np.nonzero lists edges scene by scene, so each scene's actors are a slice of the edge list
+        boundaries = np.searchsorted(instance.edge_scene, np.arange(1, len(instance.scene_ids)))
+        instance.scene_actors = np.split(instance.edge_actor, boundaries)
+        instance.date_index = {date: index for index, date in enumerate(instance.dates)}
+        return instance
+
+    def fingerprint(self):
+        """
+        Content hash of everything that affects the cost of a schedule.
+
+        Two instances with the same fingerprint price every assignment the
+        same, so results computed for one can be reused for the other.
+        """
+        digest = hashlib.sha1()
+        for array in (self.scene_ids, self.actor_ids, self.location_ids, self.scene_location, self.incidence,
+                      self.actor_cost, self.location_cost, self.actor_available, self.location_available,
+                      self.durations, self.priorities, self.location_open, self.location_close):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update(','.join(date.isoformat() for date in self.dates).encode())
+        digest.update(repr(self.day_capacity).encode())
+        return digest.hexdigest()
+
+    def _header(self):
+        """The non-array fields in JSON-serializable form."""
+        return {
+            'format_version': self.FORMAT_VERSION,
+            'dates': [date.isoformat() for date in self.dates],
+            'scene_info': self.scene_info,
+            'location_names': self.location_names,
+            'day_capacity': self.day_capacity
+        }
+
+    def to_dict(self):
+        """JSON-serializable form of the instance (see from_dict)."""
+        data = self._header()
+        for field in self.ARRAY_FIELDS:
+            data[field] = getattr(self, field).tolist()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an instance from to_dict() output (arrays may be lists or NumPy arrays)."""
+        if data.get('format_version', cls.FORMAT_VERSION) > cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported instance format version {data['format_version']}")
+        kwargs = {field: data[field] for field in cls.ARRAY_FIELDS if field in data}
+        return cls(
+            dates=[datetime.date.fromisoformat(str(date)) for date in data['dates']],
+            scene_info=data.get('scene_info'),
+            location_names=data.get('location_names'),
+            day_capacity=data.get('day_capacity', DAY_CAPACITY_HOURS),
+            **kwargs
+        )
+
+    def save(self, path):
+        """
+        Write the instance to a .json file, or to a compressed .npz file for large instances.
+
+        The NPZ form keeps every array in binary and the remaining fields as
+        one JSON string, so it loads without pickle.
+        """
+        if str(path).endswith('.npz'):
+            np.savez_compressed(path, header=np.array(json.dumps(self._header())),
+                                **{field: getattr(self, field) for field in self.ARRAY_FIELDS})
+        else:
+            with open(path, 'w') as f:
+                json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        """Read an instance written by save()."""
+        if str(path).endswith('.npz'):
+            with np.load(path, allow_pickle=False) as archive:
+                data = json.loads(str(archive['header']))
+                data.update({field: archive[field] for field in cls.ARRAY_FIELDS if field in archive.files})
+        else:
+            with open(path) as f:
+                data = json.load(f)
+        return cls.from_dict(data)
+
+    @property
+    def num_scenes(self):
+        return len(self.scene_ids)
+
+    @property
+    def num_actors(self):
+        return len(self.actor_ids)
+
+    @property
+    def num_locations(self):
+        return len(self.location_ids)
+
+    @property
+    def num_days(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_models(cls, scenes, actors, locations, actor_availability, location_availability,
+                    actor_scenes, start_date, end_date=None):
+        """
+        Compile an instance from the arguments the optimize_schedule_* functions receive.
+
+        Args:
+            scenes: List of Scene objects
+            actors: List of Actor objects
+            locations: List of Location objects
+            actor_availability: Dict mapping actor_id to availability by date
+            location_availability: Dict mapping location_id to availability by date
+            actor_scenes: Dict mapping scene_id to list of actor_ids
+            start_date: First possible shooting date
+            end_date: Last possible shooting date (optional)
+
+        Returns:
+            ProblemInstance
+        """
+        dates = build_date_range(start_date, end_date, len(scenes))
+        date_strs = [date.strftime('%Y-%m-%d') for date in dates]
+
+        actor_index = {actor.id: i for i, actor in enumerate(actors)}
+        location_index = {location.id: i for i, location in enumerate(locations)}
+
+        incidence = np.zeros((len(scenes), len(actors)), dtype=bool)
+        scene_location = np.full(len(scenes), -1, dtype=np.int64)
+        durations = np.empty(len(scenes), dtype=float)
+        priorities = np.empty(len(scenes), dtype=np.int64)
+        scene_info = []
+
+        for i, scene in enumerate(scenes):
+            for actor_id in actor_scenes.get(scene.id, []):
+                if actor_id in actor_index:
+                    incidence[i, actor_index[actor_id]] = True
+
+            scene_location[i] = location_index.get(scene.location_id, -1)
+            durations[i] = scene.estimated_duration or DEFAULT_SCENE_DURATION
+            priorities[i] = scene.priority or 5
+            scene_info.append({
+                'scene_id': scene.id,
+                'scene_number': scene.scene_number,
+                'description': scene.description,
+                'location_id': scene.location_id,
+                'int_ext': scene.int_ext,
+                'time_of_day': scene.time_of_day
+            })
+
+        # Dates missing from the availability dicts count as available
+        actor_available = np.ones((len(actors), len(dates)), dtype=bool)
+        for actor in actors:
+            by_date = actor_availability.get(actor.id, {})
+            for d, date_str in enumerate(date_strs):
+                if date_str in by_date and not by_date[date_str]:
+                    actor_available[actor_index[actor.id], d] = False
+
+        location_available = np.ones((len(locations), len(dates)), dtype=bool)
+        location_open = np.full((len(locations), len(dates)), DAY_START_HOUR)
+        location_close = np.full((len(locations), len(dates)), DAY_END_HOUR)
+        for location in locations:
+            by_date = location_availability.get(location.id, {})
+            for d, date_str in enumerate(date_strs):
+                if date_str not in by_date:
+                    continue
+                loc = location_index[location.id]
+                if not by_date[date_str].get('is_available', True):
+                    location_available[loc, d] = False
+                location_open[loc, d] = _clock_hours(by_date[date_str].get('start_time'), DAY_START_HOUR)
+                location_close[loc, d] = _clock_hours(by_date[date_str].get('end_time'), DAY_END_HOUR)
+
+        return cls(
+            scene_ids=[scene.id for scene in scenes],
+            actor_ids=[actor.id for actor in actors],
+            location_ids=[location.id for location in locations],
+            dates=dates,
+            scene_location=scene_location,
+            incidence=incidence,
+            actor_cost=[actor.cost_per_day or 0 for actor in actors],
+            location_cost=[location.cost_per_day or 0 for location in locations],
+            actor_available=actor_available,
+            location_available=location_available,
+            durations=durations,
+            priorities=priorities,
+            scene_info=scene_info,
+            location_names=[location.name for location in locations],
+            location_open=location_open,
+            location_close=location_close
+        )
+
+    def subset(self, scene_indexes, day_indexes=None):
+        """
+        Extract the sub-problem over some scenes (and optionally some days).
+
+        Actors and locations none of the selected scenes use are dropped, so
+        the sub-instance is as small as possible to ship to a worker. Scene
+        and day order are preserved.
+
+        Args:
+            scene_indexes: Scene indexes (positions) to keep
+            day_indexes: Day indexes to keep (all days if omitted)
+
+        Returns:
+            ProblemInstance
+        """
+        scene_indexes = np.asarray(scene_indexes, dtype=np.int64)
+        if day_indexes is None:
+            day_indexes = np.arange(self.num_days)
+        day_indexes = np.asarray(day_indexes, dtype=np.int64)
+
+        actors = np.flatnonzero(self.incidence[scene_indexes].any(axis=0))
+        scene_location = self.scene_location[scene_indexes]
+        locations = np.unique(scene_location[scene_location >= 0])
+        location_map = np.full(self.num_locations, -1, dtype=np.int64)
+        location_map[locations] = np.arange(len(locations))
+
+        return ProblemInstance(
+            scene_ids=self.scene_ids[scene_indexes],
+            actor_ids=self.actor_ids[actors],
+            location_ids=self.location_ids[locations],
+            dates=[self.dates[d] for d in day_indexes],
+            scene_location=np.where(scene_location >= 0, location_map[scene_location], -1),
+            incidence=self.incidence[np.ix_(scene_indexes, actors)],
+            actor_cost=self.actor_cost[actors],
+            location_cost=self.location_cost[locations],
+            actor_available=self.actor_available[np.ix_(actors, day_indexes)],
+            location_available=self.location_available[np.ix_(locations, day_indexes)],
+            durations=self.durations[scene_indexes],
+            priorities=self.priorities[scene_indexes],
+            scene_info=[self.scene_info[i] for i in scene_indexes],
+            location_names=[self.location_names[loc] for loc in locations],
+            day_capacity=self.day_capacity,
+            location_open=self.location_open[np.ix_(locations, day_indexes)],
+            location_close=self.location_close[np.ix_(locations, day_indexes)]
+        )
+
+    def cost_breakdown(self, assignment):
+        """
+        Price a complete or partial assignment from scratch.
+
+        Args:
+            assignment: Int array mapping scene index to day index (-1 = unscheduled)
+
+        Returns:
+            Dict with the individual cost terms and their sum under 'objective'
+        """
+        assignment = np.asarray(assignment, dtype=np.int64)
+        assigned = assignment >= 0
+        num_days = self.num_days
+
+        edge_mask = assigned[self.edge_scene]
+        actor_load = np.bincount(
+            self.edge_actor[edge_mask] * num_days + assignment[self.edge_scene[edge_mask]],
+            minlength=self.num_actors * num_days
+        ).reshape(self.num_actors, num_days)
+        actor_days = (actor_load > 0).sum(axis=1)
+
+        located = assigned & (self.scene_location >= 0)
+        location_load = np.bincount(
+            self.scene_location[located] * num_days + assignment[located],
+            minlength=self.num_locations * num_days
+        ).reshape(self.num_locations, num_days)
+        location_days = (location_load > 0).sum(axis=1)
+        day_locations = (location_load > 0).sum(axis=0)
+
+        day_hours = np.bincount(assignment[assigned], weights=self.durations[assigned], minlength=num_days)
+
+        breakdown = {
+            'actor_cost': float(actor_days @ self.actor_cost),
+            'location_cost': float(location_days @ self.location_cost),
+            'travel_cost': float(TRAVEL_COST * np.maximum(day_locations - 1, 0).sum()),
+            'conflicts': int(self.conflicts[assigned, assignment[assigned]].sum()),
+            'overtime_hours': float(np.maximum(day_hours - self.day_capacity, 0).sum()),
+            'shooting_days': int((day_hours > 0).sum())
+        }
+        breakdown['objective'] = (
+            breakdown['actor_cost'] + breakdown['location_cost'] + breakdown['travel_cost'] +
+            UNAVAILABLE_PENALTY * breakdown['conflicts'] + OVERTIME_PENALTY * breakdown['overtime_hours']
+        )
+        return breakdown
+
+    def evaluate(self, assignment):
+        """Return the objective value of an assignment."""
+        return self.cost_breakdown(assignment)['objective']
+
+    def evaluate_population(self, population):
+        """
+        Price many complete assignments at once.
+
+        Same terms as cost_breakdown, but every individual's actor, location
+        and day loads come out of one bincount each over a
+        (population × entity × day) index.
+
+        Args:
+            population: Int array of shape (P, num_scenes); every scene must be scheduled
+
+        Returns:
+            Dict of per-individual arrays with the cost_breakdown keys
+        """
+        population = np.asarray(population, dtype=np.int64).reshape(-1, self.num_scenes)
+        size = len(population)
+        num_days = self.num_days
+        individual = np.arange(size)[:, None]
+
+        actor_load = np.bincount(
+            ((individual * self.num_actors + self.edge_actor) * num_days + population[:, self.edge_scene]).ravel(),
+            minlength=size * self.num_actors * num_days
+        ).reshape(size, self.num_actors, num_days)
+        actor_days = (actor_load > 0).sum(axis=2)
+
+        located = np.flatnonzero(self.scene_location >= 0)
+        location_load = np.bincount(
+            ((individual * self.num_locations + self.scene_location[located]) * num_days + population[:, located]).ravel(),
+            minlength=size * self.num_locations * num_days
+        ).reshape(size, self.num_locations, num_days)
+        location_days = (location_load > 0).sum(axis=2)
+        day_locations = (location_load > 0).sum(axis=1)
+
+        day_hours = np.bincount(
+            (individual * num_days + population).ravel(),
+            weights=np.broadcast_to(self.durations, population.shape).ravel(),
+            minlength=size * num_days
+        ).reshape(size, num_days)
+
+        breakdown = {
+            'actor_cost': actor_days @ self.actor_cost,
+            'location_cost': location_days @ self.location_cost,
+            'travel_cost': TRAVEL_COST * np.maximum(day_locations - 1, 0).sum(axis=1).astype(float),
+            'conflicts': self.conflicts[np.arange(self.num_scenes), population].sum(axis=1),
+            'overtime_hours': np.maximum(day_hours - self.day_capacity, 0).sum(axis=1),
+            'shooting_days': (day_hours > 0).sum(axis=1)
+        }
+        breakdown['objective'] = (
+            breakdown['actor_cost'] + breakdown['location_cost'] + breakdown['travel_cost'] +
+            UNAVAILABLE_PENALTY * breakdown['conflicts'] + OVERTIME_PENALTY * breakdown['overtime_hours']
+        )
+        return breakdown
+
+    def assignment_from_schedule(self, schedule):
+        """
+        Map an optimizer's 'schedule' dict back onto day indexes.
+
+        Dates outside the instance calendar are clamped to its first/last day;
+        scenes missing from the schedule stay unscheduled (-1).
+        """
+        assignment = np.full(self.num_scenes, -1, dtype=np.int64)
+        scene_index = {int(scene_id): i for i, scene_id in enumerate(self.scene_ids)}
+        first_date = self.dates[0]
+
+        for scene_id, scene_data in schedule.items():
+            scene_id = scene_data.get('scene_id', scene_id)
+            try:
+                i = scene_index[int(scene_id)]
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            shooting_date = scene_data.get('shooting_date') or scene_data.get('date')
+            if isinstance(shooting_date, str):
+                shooting_date = datetime.datetime.strptime(shooting_date, '%Y-%m-%d').date()
+            if not isinstance(shooting_date, datetime.date):
+                continue
+
+            day = self.date_index.get(shooting_date)
+            if day is None:
+                day = min(max((shooting_date - first_date).days, 0), self.num_days - 1)
+            assignment[i] = day
+
+        return assignment
+
+    def build_result(self, assignment, algorithm, extra_metadata=None, locked=None, first_open_day=0):
+        """
+        Format an assignment in the {'schedule', 'metadata'} shape the routes expect.
+
+        Args:
+            assignment: Int array mapping scene index to day index
+            algorithm: Human readable algorithm name for the metadata
+            extra_metadata: Optional dict merged into the metadata
+            locked: Optional bool mask of scenes the slotting stage must not move
+                (a rolling-horizon run's scenes before its cutoff)
+            first_open_day: First day index the slotting stage may move scenes to
+
+        Returns:
+            Dict with shooting dates and times as date/time objects; convert with
+            utils_json.convert_datetime_to_strings before serializing
+        """
+        # Imported here because the slotting stage builds on ScheduleState
+        from slotting import slot_schedule, hours_to_time
+
+        # Place every day's scenes into their locations' shooting windows; scenes
+        # that don't fit may move to another day first
+        assignment, start_hours, end_hours, slotting = slot_schedule(self, assignment, locked=locked,
+                                                                     first_open_day=first_open_day)
+        solution = {}
+        scenes_by_day = {}
+
+        for i in np.flatnonzero(assignment >= 0):
+            scenes_by_day.setdefault(int(assignment[i]), []).append(int(i))
+
+        for day, day_scenes in scenes_by_day.items():
+            shooting_date = self.dates[day]
+            day_scenes.sort(key=lambda i: (np.nan_to_num(start_hours[i], nan=np.inf), -self.priorities[i]))
+
+            for i in day_scenes:
+                info = self.scene_info[i]
+                loc = self.scene_location[i]
+                scene_cost = float(self.actor_cost[self.scene_actors[i]].sum())
+                if loc >= 0:
+                    scene_cost += float(self.location_cost[loc])
+                # Scenes the slotting stage could not fit keep their day but get no times
+                slotted = not np.isnan(start_hours[i])
+
+                solution[int(self.scene_ids[i])] = {
+                    'scene_id': int(self.scene_ids[i]),
+                    'scene_number': info.get('scene_number'),
+                    'description': info.get('description'),
+                    'location_id': int(self.location_ids[loc]) if loc >= 0 else 0,
+                    'location_name': self.location_names[loc] if loc >= 0 else 'Unknown Location',
+                    'int_ext': info.get('int_ext'),
+                    'time_of_day': info.get('time_of_day'),
+                    'estimated_duration': float(self.durations[i]),
+                    'priority': int(self.priorities[i]),
+                    'shooting_date': shooting_date,
+                    'date': shooting_date,  # For legacy compatibility
+                    'start_time': hours_to_time(shooting_date, start_hours[i]) if slotted else None,
+                    'end_time': hours_to_time(shooting_date, end_hours[i]) if slotted else None,
+                    'estimated_cost': scene_cost,
+                    'cost': scene_cost  # For legacy compatibility
+                }
+
+        breakdown = self.cost_breakdown(assignment)
+        used_days = sorted(scenes_by_day)
+        earliest_date = self.dates[used_days[0]] if used_days else self.dates[0]
+        latest_date = self.dates[used_days[-1]] if used_days else self.dates[0]
+
+        metadata = {
+            'total_cost': breakdown['actor_cost'] + breakdown['location_cost'] + breakdown['travel_cost'],
+            'total_days': (latest_date - earliest_date).days + 1,
+            'shooting_days': breakdown['shooting_days'],
+            'start_date': earliest_date.strftime('%Y-%m-%d'),
+            'end_date': latest_date.strftime('%Y-%m-%d'),
+            'total_scenes': len(solution),
+            'conflicts': breakdown['conflicts'],
+            'overtime_hours': breakdown['overtime_hours'],
+            'objective': breakdown['objective'],
+            'slotting': slotting,
+            'algorithm': algorithm
+        }
+        if extra_metadata:
+            metadata.update(extra_metadata)
+
+        return {'schedule': solution, 'metadata': metadata}
+
+
+class ScheduleState:
+    """
+    Incremental bookkeeping for one assignment of scenes to days.
+
+    Keeps per actor/location/day load counters so the cost change of
+    inserting, removing or moving a single scene (the delta kernels used by
+    the local search engines) is computed from a handful of array lookups
+    instead of re-evaluating the whole schedule.
+    """
+
+    def __init__(self, instance, assignment=None):
+        self.instance = instance
+        self.assignment = np.full(instance.num_scenes, -1, dtype=np.int64)
+        self.actor_load = np.zeros((instance.num_actors, instance.num_days), dtype=np.int32)
+        self.location_load = np.zeros((instance.num_locations, instance.num_days), dtype=np.int32)
+        self.day_locations = np.zeros(instance.num_days, dtype=np.int32)
+        self.day_hours = np.zeros(instance.num_days, dtype=float)
+        self.cost = 0.0
+
+        if assignment is not None:
+            for i, day in enumerate(np.asarray(assignment, dtype=np.int64)):
+                if day >= 0:
+                    self.insert(i, int(day))
+
+    def copy(self):
+        """Return an independent copy of this state."""
+        clone = ScheduleState.__new__(ScheduleState)
+        clone.instance = self.instance
+        clone.assignment = self.assignment.copy()
+        clone.actor_load = self.actor_load.copy()
+        clone.location_load = self.location_load.copy()
+        clone.day_locations = self.day_locations.copy()
+        clone.day_hours = self.day_hours.copy()
+        clone.cost = self.cost
+        return clone
+
+    def _overtime(self, hours):
+        return OVERTIME_PENALTY * max(0.0, hours - self.instance.day_capacity)
+
+    def insertion_cost(self, scene, day):
+        """Cost increase of adding an unscheduled scene on the given day."""
+        inst = self.instance
+        cost = UNAVAILABLE_PENALTY * inst.conflicts[scene, day]
+
+        actors = inst.scene_actors[scene]
+        if actors.size:
+            cost += inst.actor_cost[actors][self.actor_load[actors, day] == 0].sum()
+
+        loc = inst.scene_location[scene]
+        if loc >= 0 and self.location_load[loc, day] == 0:
+            cost += inst.location_cost[loc]
+            if self.day_locations[day] > 0:
+                cost += TRAVEL_COST
+
+        hours = self.day_hours[day]
+        cost += self._overtime(hours + inst.durations[scene]) - self._overtime(hours)
+        return float(cost)
+
+    def insertion_costs(self, scene):
+        """Vectorized insertion_cost() of an unscheduled scene over every day."""
+        inst = self.instance
+        cost = UNAVAILABLE_PENALTY * inst.conflicts[scene].astype(float)
+
+        actors = inst.scene_actors[scene]
+        if actors.size:
+            cost += ((self.actor_load[actors] == 0) * inst.actor_cost[actors, None]).sum(axis=0)
+
+        loc = inst.scene_location[scene]
+        if loc >= 0:
+            new_location = self.location_load[loc] == 0
+            cost += new_location * (inst.location_cost[loc] + TRAVEL_COST * (self.day_locations > 0))
+
+        capacity = inst.day_capacity
+        hours = self.day_hours
+        cost += OVERTIME_PENALTY * (
+            np.maximum(hours + inst.durations[scene] - capacity, 0) - np.maximum(hours - capacity, 0)
+        )
+        return cost
+
+    def removal_gain(self, scene):
+        """Cost decrease of taking a scheduled scene off its day."""
+        inst = self.instance
+        day = self.assignment[scene]
+        gain = UNAVAILABLE_PENALTY * inst.conflicts[scene, day]
+
+        actors = inst.scene_actors[scene]
+        if actors.size:
+            gain += inst.actor_cost[actors][self.actor_load[actors, day] == 1].sum()
+
+        loc = inst.scene_location[scene]
+        if loc >= 0 and self.location_load[loc, day] == 1:
+            gain += inst.location_cost[loc]
+            if self.day_locations[day] > 1:
+                gain += TRAVEL_COST
+
+        hours = self.day_hours[day]
+        gain += self._overtime(hours) - self._overtime(hours - inst.durations[scene])
+        return float(gain)
+
+    def move_delta(self, scene, day):
+        """Cost change of moving a scheduled scene to another day."""
+        if self.assignment[scene] == day:
+            return 0.0
+        # Removal only touches the old day, so the insertion cost on the new day is unaffected
+        return self.insertion_cost(scene, day) - self.removal_gain(scene)
+
+    def move_deltas(self, scene):
+        """Vectorized move_delta() of a scheduled scene over every day."""
+        deltas = self.insertion_costs(scene) - self.removal_gain(scene)
+        deltas[self.assignment[scene]] = 0.0
+        return deltas
+
+    def move_delta_matrix(self):
+        """
+        move_deltas() of every scene over every day at once.
+
+        Returns:
+            Float array of shape (num_scenes, num_days); rows of unscheduled
+            scenes hold their insertion costs
+        """
+        inst = self.instance
+        capacity = inst.day_capacity
+
+        # Insertion side for all scenes and days
+        deltas = UNAVAILABLE_PENALTY * inst.conflicts.astype(float)
+        deltas += inst.incidence.astype(float) @ ((self.actor_load == 0) * inst.actor_cost[:, None])
+        located = np.flatnonzero(inst.scene_location >= 0)
+        locs = inst.scene_location[located]
+        deltas[located] += (self.location_load[locs] == 0) * (
+            inst.location_cost[locs, None] + TRAVEL_COST * (self.day_locations > 0)
+        )
+        hours = self.day_hours
+        deltas += OVERTIME_PENALTY * (
+            np.maximum(hours + inst.durations[:, None] - capacity, 0) - np.maximum(hours - capacity, 0)
+        )
+
+        # Removal side, one gain per scheduled scene
+        scheduled = np.flatnonzero(self.assignment >= 0)
+        days = self.assignment[scheduled]
+        gain = UNAVAILABLE_PENALTY * inst.conflicts[scheduled, days].astype(float)
+        gain += (inst.incidence[scheduled] & (self.actor_load[:, days] == 1).T) @ inst.actor_cost
+
+        locs = inst.scene_location[scheduled]
+        has_location = locs >= 0
+        last_visit = np.zeros(len(scheduled), dtype=bool)
+        last_visit[has_location] = self.location_load[locs[has_location], days[has_location]] == 1
+        gain[last_visit] += inst.location_cost[locs[last_visit]] + TRAVEL_COST * (self.day_locations[days[last_visit]] > 1)
+
+        day_hours = hours[days]
+        gain += OVERTIME_PENALTY * (
+            np.maximum(day_hours - capacity, 0) - np.maximum(day_hours - inst.durations[scheduled] - capacity, 0)
+        )
+
+        deltas[scheduled] -= gain[:, None]
+        deltas[scheduled, days] = 0.0
+        return deltas
+
+    def insert(self, scene, day):
+        """Schedule an unscheduled scene on a day."""
+        inst = self.instance
+        self.cost += self.insertion_cost(scene, day)
+        self.assignment[scene] = day
+        self.actor_load[inst.scene_actors[scene], day] += 1
+        loc = inst.scene_location[scene]
+        if loc >= 0:
+            if self.location_load[loc, day] == 0:
+                self.day_locations[day] += 1
+            self.location_load[loc, day] += 1
+        self.day_hours[day] += inst.durations[scene]
+
+    def remove(self, scene):
+        """Unschedule a scene, returning the day it was on."""
+        inst = self.instance
+        day = int(self.assignment[scene])
+        self.cost -= self.removal_gain(scene)
+        self.assignment[scene] = -1
+        self.actor_load[inst.scene_actors[scene], day] -= 1
+        loc = inst.scene_location[scene]
+        if loc >= 0:
+            self.location_load[loc, day] -= 1
+            if self.location_load[loc, day] == 0:
+                self.day_locations[day] -= 1
+        self.day_hours[day] -= inst.durations[scene]
+        return day
+
+    def move(self, scene, day):
+        """Move a scheduled scene to another day."""
+        self.remove(scene)
+        self.insert(scene, day)
+
+    def best_day(self, scene, allowed_days=None):
+        """
+        Cheapest day for an unscheduled scene.
+
+        Only days in the scene's feasible domain are considered when it has
+        any; otherwise the penalty terms steer it to the least bad day.
+        """
+        costs = self.insertion_costs(scene)
+        domain = self.instance.feasible[scene]
+        if allowed_days is not None:
+            domain = domain & allowed_days
+            if not domain.any():
+                costs = np.where(allowed_days, costs, np.inf)
+        if domain.any():
+            costs = np.where(domain, costs, np.inf)
+        day = int(np.argmin(costs))
+        return day, float(costs[day])
+
+    def insert_greedy(self, scenes, allowed_days=None):
+        """Insert each unscheduled scene, in order, on its cheapest feasible day."""
+        for scene in scenes:
+            day, _ = self.best_day(scene, allowed_days)
+            self.insert(scene, day)
+
+    def construction_order(self, rng=None):
+        """
+        Order unscheduled scenes for greedy insertion.
+
+        Most constrained scenes (fewest feasible days) go first, and scenes at
+        the same location stay adjacent so location blocks form naturally.
+        """
+        inst = self.instance
+        pending = np.flatnonzero(self.assignment < 0)
+        feasible_days = inst.feasible[pending].sum(axis=1).astype(float)
+        if rng is not None:
+            feasible_days = feasible_days + rng.random(len(pending))
+        order = np.lexsort((-inst.priorities[pending], inst.scene_location[pending], feasible_days))
+        return pending[order]
+
+    def recompute(self):
+        """Reset the running cost from a full evaluation to shed floating point drift."""
+        self.cost = self.instance.evaluate(self.assignment)
+        return self.cost
+
+
+def greedy_assignment(instance, rng=None):
+    """Build a complete assignment by greedy insertion from an empty schedule."""
+    state = ScheduleState(instance)
+    state.insert_greedy(state.construction_order(rng))
+    return state.assignment.copy()
@@ -0,0 +1,30 @@
+import numpy as np
+
+SEED_BITS = 63  # Seeds are stored in a signed 64-bit database column
+
+
+def new_seed():
+    """Fresh random seed for a run that was not given one."""
+    return int(np.random.SeedSequence().entropy % (1 << SEED_BITS))
+
+
+def seed_sequence(seed=None):
+    """
+    SeedSequence for a run seeded with an int, an existing SeedSequence or nothing.
+
+    Passing a spawned child through unchanged lets sub-runs split their own
+    stream again without colliding with their siblings.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def spawn_seeds(seed, count):
+    """Independent child seeds for the sub-runs of a run (one process pool job, stage, or step each)."""
+    return seed_sequence(seed).spawn(count)
+
+
+def make_rng(seed=None):
+    """numpy.random.Generator owned by a single run."""
+    return np.random.default_rng(seed_sequence(seed))
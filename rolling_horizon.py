@@ -0,0 +1,206 @@
+import datetime
+import logging
+import time
+
+import numpy as np
+
+from problem_instance import ProblemInstance, ScheduleState
+from instance_solvers import solve_instance
+from rng_streams import make_rng, spawn_seeds
+
+DEFAULT_TIME_LIMIT = 5.0  # Seconds; daily re-planning should stay interactive
+DEFAULT_WINDOW_DAYS = 21  # Days after the cutoff that get a firm, detailed schedule
+NEAR_TIME_SHARE = 0.75  # Share of the budget spent on the near window
+
+
+def lock_before_cutoff(instance, base_assignment, cutoff):
+    """
+    The part of a base schedule a re-planning run must leave alone.
+
+    The slotting stage of build_result needs the same locked scenes and
+    cutoff as the search, so a run's result is built with
+    instance.build_result(..., locked=locked, first_open_day=cutoff).
+
+    Args:
+        instance: ProblemInstance whose calendar covers the base schedule
+        base_assignment: Day index per scene (-1 if not scheduled), or None
+        cutoff: First day index that may be re-planned
+
+    Returns:
+        Tuple of (base assignment as an int array, cutoff clamped to the calendar,
+        bool mask of the scenes the base assignment puts before the cutoff)
+    """
+    if base_assignment is None:
+        base_assignment = np.full(instance.num_scenes, -1, dtype=np.int64)
+    base_assignment = np.asarray(base_assignment, dtype=np.int64)
+    cutoff = min(max(int(cutoff), 0), instance.num_days - 1)
+    return base_assignment, cutoff, (base_assignment >= 0) & (base_assignment < cutoff)
+
+
+def solve_rolling_horizon(instance, base_assignment=None, cutoff=0, window_days=DEFAULT_WINDOW_DAYS,
+                          method='large_neighborhood', time_limit=DEFAULT_TIME_LIMIT, seed=None):
+    """
+    Re-plan a schedule from a cutoff day onwards.
+
+    Scenes the base schedule puts before the cutoff are locked. The remaining
+    scenes keep their base day when it is still on or after the cutoff and
+    conflict-free, and everything else is placed by greedy insertion. The
+    near window (cutoff to cutoff + window_days) is then optimized in detail,
+    starting from that placement, while days beyond it only get a short
+    local search. Near and far days are disjoint, so the two solves are
+    independent sub-instances.
+
+    Args:
+        instance: ProblemInstance whose calendar covers the base schedule
+        base_assignment: Day index per scene from the last approved schedule (-1 if not scheduled)
+        cutoff: First day index that may be re-planned
+        window_days: Length of the detailed window in days
+        method: Instance solver for the near window (see instance_solvers.SOLVERS)
+        time_limit: Wall clock budget in seconds
+        seed: Seed for the run
+
+    Returns:
+        Tuple of (assignment, stats dict)
+    """
+    started = time.perf_counter()
+    seeds = spawn_seeds(seed, 3)
+    rng = make_rng(seeds[0])
+
+    base_assignment, cutoff, locked = lock_before_cutoff(instance, base_assignment, cutoff)
+    window_end = min(cutoff + window_days, instance.num_days)
+
+    kept = ~locked & (base_assignment >= cutoff)
+    kept[kept] = instance.feasible[np.flatnonzero(kept), base_assignment[kept]]
+
+    # Warm start: locked and still-valid scenes stay put, the rest are inserted greedily
+    state = ScheduleState(instance, np.where(locked | kept, base_assignment, -1))
+    open_days = np.arange(instance.num_days) >= cutoff
+    state.insert_greedy(state.construction_order(rng), allowed_days=open_days)
+    assignment = state.assignment.copy()
+
+    near_days = np.arange(cutoff, window_end)
+    far_days = np.arange(window_end, instance.num_days)
+    near_scenes = np.flatnonzero(~locked & (assignment >= cutoff) & (assignment < window_end))
+    far_scenes = np.flatnonzero(~locked & (assignment >= window_end))
+
+    # Detailed re-optimization of the near window
+    near_stats = None
+    if near_scenes.size:
+        near = instance.subset(near_scenes, near_days)
+        budget = max(0.0, time_limit * NEAR_TIME_SHARE - (time.perf_counter() - started))
+        sub_assignment, near_stats = solve_instance(near, method, assignment=assignment[near_scenes] - cutoff,
+                                                    time_limit=budget, seed=seeds[1])
+        assignment[near_scenes] = near_days[sub_assignment]
+
+    # Provisional placement beyond the window only gets a quick descent
+    far_stats = None
+    if far_scenes.size:
+        far = instance.subset(far_scenes, far_days)
+        budget = max(0.0, time_limit - (time.perf_counter() - started))
+        sub_assignment, far_stats = solve_instance(far, 'local_search', assignment=assignment[far_scenes] - window_end,
+                                                   time_limit=budget, seed=seeds[2])
+        assignment[far_scenes] = far_days[sub_assignment]
+
+    stats = {
+        'cutoff_date': instance.dates[cutoff].strftime('%Y-%m-%d'),
+        'firm_until': instance.dates[window_end - 1].strftime('%Y-%m-%d'),
+        'locked_scenes': int(locked.sum()),
+        'kept_scenes': int(kept.sum()),
+        'near_scenes': int(near_scenes.size),
+        'far_scenes': int(far_scenes.size),
+        'near_cost': near_stats['best_cost'] if near_stats else 0.0,
+        'far_cost': far_stats['best_cost'] if far_stats else 0.0,
+        'best_cost': instance.evaluate(assignment),
+        'runtime_seconds': round(time.perf_counter() - started, 3)
+    }
+    logging.info(f"Rolling horizon: {stats['locked_scenes']} locked, {stats['near_scenes']} firm until "
+                 f"{stats['firm_until']}, {stats['far_scenes']} provisional, cost {stats['best_cost']:.2f}")
+    return assignment, stats
+
+
+def rolling_horizon_calendar(start_date, end_date, base_schedule, num_scenes):
+    """
+    Calendar of a rolling-horizon run, reaching back far enough to hold the locked part of the base schedule.
+
+    Args:
+        start_date: Cutoff date; the first date that may be re-planned
+        end_date: Last possible shooting date (optional)
+        base_schedule: Dict mapping scene_id to a dict with a 'shooting_date' (date or 'YYYY-MM-DD')
+        num_scenes: Number of scenes in the project, for the default horizon
+
+    Returns:
+        Tuple of (first date, last date) to compile the instance over
+    """
+    base_dates = []
+    for scene_data in (base_schedule or {}).values():
+        shooting_date = scene_data.get('shooting_date')
+        if isinstance(shooting_date, str):
+            shooting_date = datetime.datetime.strptime(shooting_date, '%Y-%m-%d').date()
+        if isinstance(shooting_date, datetime.date):
+            base_dates.append(shooting_date)
+    calendar_start = min([start_date] + base_dates)
+    if end_date is None:
+        # Same default horizon as the other algorithms, counted from the cutoff
+        end_date = max([start_date + datetime.timedelta(days=max(num_scenes * 2, 30))] + base_dates)
+    return calendar_start, end_date
+
+
+def optimize_instance_rolling_horizon(instance, start_date, base_schedule=None, window_days=DEFAULT_WINDOW_DAYS,
+                                      seed=None):
+    """
+    Rolling-Horizon Method for schedule optimization on an already compiled instance.
+
+    Args:
+        instance: ProblemInstance over rolling_horizon_calendar()'s dates
+        start_date: Cutoff date; the first date that may be re-planned
+        base_schedule: Dict mapping scene_id to a dict with a 'shooting_date' (optional)
+        window_days: Number of days after the cutoff that get a firm schedule
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    logging.info("Starting Rolling-Horizon optimization")
+
+    base_assignment = instance.assignment_from_schedule(base_schedule or {})
+    cutoff = (start_date - instance.dates[0]).days
+
+    assignment, stats = solve_rolling_horizon(instance, base_assignment, cutoff, window_days, seed=seed)
+
+    # The slotting stage must not undo the cutoff either
+    _, cutoff, locked = lock_before_cutoff(instance, base_assignment, cutoff)
+    return instance.build_result(assignment, 'Rolling Horizon (RHBM)', {'search': stats},
+                                 locked=locked, first_open_day=cutoff)
+
+
+def optimize_schedule_rolling_horizon(scenes, actors, locations, actor_availability, location_availability,
+                                      actor_scenes, start_date, end_date=None, base_schedule=None,
+                                      window_days=DEFAULT_WINDOW_DAYS, seed=None):
+    """
+    Rolling-Horizon Method for schedule optimization.
+
+    Everything the base schedule shoots before start_date is kept as is; the
+    next window_days are re-planned in detail and the rest of the shoot is
+    placed provisionally.
+
+    Args:
+        scenes: List of Scene objects
+        actors: List of Actor objects
+        locations: List of Location objects
+        actor_availability: Dict mapping actor_id to availability by date
+        location_availability: Dict mapping location_id to availability by date
+        actor_scenes: Dict mapping scene_id to list of actor_ids
+        start_date: Cutoff date; the first date that may be re-planned
+        end_date: Last possible shooting date (optional)
+        base_schedule: Dict mapping scene_id to a dict with a 'shooting_date', typically
+            the latest approved schedule (optional)
+        window_days: Number of days after the cutoff that get a firm schedule
+        seed: Seed for the run (int or numpy.random.SeedSequence; a fresh one is drawn if omitted)
+
+    Returns:
+        Dict with 'schedule' and 'metadata' entries
+    """
+    calendar_start, end_date = rolling_horizon_calendar(start_date, end_date, base_schedule, len(scenes))
+    instance = ProblemInstance.from_models(scenes, actors, locations, actor_availability,
+                                           location_availability, actor_scenes, calendar_start, end_date)
+    return optimize_instance_rolling_horizon(instance, start_date, base_schedule, window_days, seed=seed)
@@ -2,15 +2,15 @@ import os
 import logging
 import datetime
 import json
-from flask import render_template, request, redirect, url_for, flash, jsonify, session, send_from_directory
+from flask import render_template, request, redirect, url_for, flash, jsonify, session, send_from_directory, g
 from json_encoder import CustomJSONEncoder
 from utils_json import convert_datetime_to_strings
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
 from models import (
     User, Project, ProjectAccess, Scene, Actor, Location, 
-    SceneConstraint, ActorAvailability, LocationAvailability, 
-    ActorScene, Schedule, ScheduledScene, Notification, Role
+    SceneConstraint, ActorAvailabilityRange, LocationAvailabilityRange, 
+    ActorScene, Schedule, ScheduledScene, Notification, Role, ScheduleStatus
 )
 from forms import (
     LoginForm, RegistrationForm, ProjectForm, ScreenplayUploadForm, 
@@ -22,26 +22,137 @@ from optimization_algorithms_new import (
     optimize_schedule_ant_colony, optimize_schedule_tabu_search, 
     optimize_schedule_particle_swarm
 )
+from large_neighborhood_search import optimize_instance_large_neighborhood, polish_schedule_lns
+from local_search import polish_schedule_local_search
+from decomposition import optimize_instance_decomposed
+from hierarchical_optimizer import optimize_instance_hierarchical
+from rolling_horizon import optimize_instance_rolling_horizon, rolling_horizon_calendar, DEFAULT_WINDOW_DAYS
+from pareto_front import optimize_instance_pareto
+from sqlalchemy.orm import joinedload
+from problem_instance import ScheduleState
+from scenario_engine import baseline_assignment, run_scenarios
+from rng_streams import new_seed, spawn_seeds
+from booking_index import refresh_identity, find_double_bookings
+from call_sheets import call_sheets
+from notifications import (
+    add_notifications, notify_schedule_approved, dispatch_notifications, mark_read, notification_page,
+    unread_count, unread_summary, PAGE_SIZE as NOTIFICATION_PAGE_SIZE
+)
+from sensitivity import cached_sensitivity_report
+from admission import admission_controlled, queue_status
+from availability_store import (
+    set_actor_availability, set_location_availability, write_location_days,
+    write_actor_changes, write_location_changes
+)
 from utils import (
     get_current_project, set_current_project, format_date_for_json, 
     get_actor_availability_data, get_location_availability_data,
-    allowed_file
+    get_optimization_inputs, load_problem_instance, allowed_file, add_scheduled_scenes
 )
 
+# Optional polishing stages run on any algorithm's output: request value -> (function, label)
+POLISH_STAGES = {
+    'lns': (polish_schedule_lns, 'LNS'),
+    'local_search': (polish_schedule_local_search, 'LS')
+}
+
+# Algorithms that work on ORM objects; all others run on a ProblemInstance alone
+ORM_ALGORITHMS = ('ant_colony', 'tabu_search', 'particle_swarm')
+
+MAX_DOUBLE_BOOKING_WARNINGS = 5  # Cross-project double bookings flashed on approval
+MAX_BULK_AVAILABILITY_DAYS = 366  # Longest date range one bulk availability update may cover
+
+def _availability_changes(data, id_field, allowed_ids, status_of):
+    """
+    Turn a bulk availability payload into per-entity day changes.
+
+    The payload is {'updates': [...]} or a single update object. Every
+    update names entities ('<id_field>s' list or '<id_field>') and days
+    ('dates' list and/or an inclusive 'start_date'/'end_date' range);
+    later updates win where they overlap.
+
+    Args:
+        data: Request JSON
+        id_field: 'actor_id' or 'location_id'
+        allowed_ids: Ids of the current project's entities
+        status_of: Function mapping an update dict to the status stored for its days
+
+    Returns:
+        Dict mapping entity ids to {date: status} dicts
+
+    Raises:
+        ValueError: With a message for the client when the payload is invalid
+    """
+    updates = data.get('updates') if 'updates' in data else [data]
+    if not isinstance(updates, list) or not updates:
+        raise ValueError('At least one update is required')
+    
+    changes = {}
+    for update in updates:
+        if not isinstance(update, dict):
+            raise ValueError('Every update must be an object')
+        entity_ids = update.get(id_field + 's')
+        if entity_ids is None and update.get(id_field) is not None:
+            entity_ids = [update.get(id_field)]
+        try:
+            entity_ids = [int(entity_id) for entity_id in entity_ids or []]
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid {id_field}')
+        if not entity_ids:
+            raise ValueError(f'Every update needs {id_field}s')
+        unknown = set(entity_ids) - allowed_ids
+        if unknown:
+            raise ValueError(f'Unknown {id_field}s: {sorted(unknown)}')
+        
+        # Parse dates
+        try:
+            dates = {datetime.datetime.strptime(date, '%Y-%m-%d').date() for date in update.get('dates') or []}
+            if update.get('start_date'):
+                start_date = datetime.datetime.strptime(update['start_date'], '%Y-%m-%d').date()
+                end_date = datetime.datetime.strptime(update.get('end_date') or update['start_date'], '%Y-%m-%d').date()
+                if end_date < start_date:
+                    raise ValueError('end_date is before start_date')
+                if (end_date - start_date).days >= MAX_BULK_AVAILABILITY_DAYS:
+                    raise ValueError(f'Date ranges are limited to {MAX_BULK_AVAILABILITY_DAYS} days')
+                dates.update(start_date + datetime.timedelta(days=i) for i in range((end_date - start_date).days + 1))
+        except TypeError:
+            raise ValueError('Dates must be YYYY-MM-DD strings')
+        if not dates:
+            raise ValueError('Every update needs dates or a start_date')
+        
+        status = status_of(update)
+        for entity_id in entity_ids:
+            changes.setdefault(entity_id, {}).update((date, status) for date in dates)
+    return changes
+
+def _location_status(update):
+    """(is_available, start_time, end_time) of a location availability update."""
+    start_time = end_time = None
+    if update.get('start_time'):
+        start_time = datetime.datetime.strptime(update['start_time'], '%H:%M').time()
+    if update.get('end_time'):
+        end_time = datetime.datetime.strptime(update['end_time'], '%H:%M').time()
+    return bool(update.get('is_available', True)), start_time, end_time
+
 def register_routes(app):
     
     @app.context_processor
     def inject_user_context():
-        """Injects common context data into all templates."""
+        """Injects common context data into all templates (built once per request)."""
+        if 'user_context' in g:
+            return g.user_context
+        
         context = {
             'current_project': get_current_project()
         }
         
         if current_user.is_authenticated:
-            context['notifications'] = Notification.query.filter_by(
-                recipient_id=current_user.id, read=False
-            ).order_by(Notification.created_at.desc()).limit(5).all()
-            
+            # Counter kept on write, latest unread from a short-lived per-user cache
+            summary = unread_summary(current_user)
+            context['notifications'] = summary['latest']
+            context['unread_notifications_count'] = summary['count']
+        
+        g.user_context = context
         return context
     
     @app.route('/')
@@ -323,6 +434,7 @@ def register_routes(app):
             actor.cost_per_day = form.cost_per_day.data
             actor.email = form.email.data
             actor.phone = form.phone.data
+            refresh_identity(actor)
             
             try:
                 db.session.commit()
@@ -411,12 +523,12 @@ def register_routes(app):
                 if is_add:
                     import random
                     import datetime
-                    from models import LocationAvailability
                     
                     # Generate some random availability for the next 30 days
                     today = datetime.date.today()
                     date_range = [today + datetime.timedelta(days=i) for i in range(30)]
                     
+                    days = {}
                     for date in date_range:
                         # Skip weekends randomly
                         if date.weekday() >= 5 and random.random() < 0.7:
@@ -427,16 +539,10 @@ def register_routes(app):
                             # Available this day with default hours
                             start_time = datetime.time(hour=9, minute=0)  # 9 AM
                             end_time = datetime.time(hour=18, minute=0)   # 6 PM
-                            
-                            location_availability = LocationAvailability(
-                                location_id=location.id,
-                                date=date,
-                                start_time=start_time,
-                                end_time=end_time,
-                                is_available=True
-                            )
-                            db.session.add(location_availability)
+                            days[date] = (True, start_time, end_time)
                     
+                    # Stored as runs of consecutive days rather than a row per day
+                    write_location_days(location.id, days)
                     db.session.commit()
                 
                 flash(flash_message, 'success')
@@ -494,21 +600,8 @@ def register_routes(app):
             # Parse date
             date_obj = datetime.datetime.strptime(date, '%Y-%m-%d').date()
             
-            # Check if availability record exists
-            availability = ActorAvailability.query.filter_by(
-                actor_id=actor_id,
-                date=date_obj
-            ).first()
-            
-            if availability:
-                availability.is_available = is_available
-            else:
-                availability = ActorAvailability(
-                    actor_id=actor_id,
-                    date=date_obj,
-                    is_available=is_available
-                )
-                db.session.add(availability)
+            # Splits or merges the stored range around the day
+            set_actor_availability(actor_id, date_obj, date_obj, is_available)
             
             db.session.commit()
             return jsonify({'success': True})
@@ -571,25 +664,8 @@ def register_routes(app):
             if end_time:
                 end_time_obj = datetime.datetime.strptime(end_time, '%H:%M').time()
             
-            # Check if availability record exists
-            availability = LocationAvailability.query.filter_by(
-                location_id=location_id,
-                date=date_obj
-            ).first()
-            
-            if availability:
-                availability.is_available = is_available
-                availability.start_time = start_time_obj
-                availability.end_time = end_time_obj
-            else:
-                availability = LocationAvailability(
-                    location_id=location_id,
-                    date=date_obj,
-                    is_available=is_available,
-                    start_time=start_time_obj,
-                    end_time=end_time_obj
-                )
-                db.session.add(availability)
+            # Splits or merges the stored range around the day
+            set_location_availability(location_id, date_obj, date_obj, is_available, start_time_obj, end_time_obj)
             
             db.session.commit()
             return jsonify({'success': True})
@@ -598,6 +674,58 @@ def register_routes(app):
             logging.error(f"Location availability update error: {e}", exc_info=True)
             return jsonify({'success': False, 'message': str(e)}), 500
     
+    @app.route('/api/actor-availability/bulk', methods=['POST'])
+    @login_required
+    def bulk_update_actor_availability():
+        """API endpoint to set many actors' availability over many dates in one transaction."""
+        current_project = get_current_project()
+        
+        if not current_project:
+            return jsonify({'success': False, 'message': 'No active project'}), 400
+        
+        actor_ids = {actor_id for actor_id, in db.session.query(Actor.id).filter_by(project_id=current_project.id)}
+        try:
+            changes = _availability_changes(request.get_json(silent=True) or {}, 'actor_id', actor_ids,
+                                            lambda update: bool(update.get('is_available', True)))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        try:
+            write_actor_changes(changes)
+            db.session.commit()
+            return jsonify({'success': True, 'actors': len(changes),
+                            'days': sum(len(days) for days in changes.values())})
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Bulk actor availability update error: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    @app.route('/api/location-availability/bulk', methods=['POST'])
+    @login_required
+    def bulk_update_location_availability():
+        """API endpoint to set many locations' availability and hours over many dates in one transaction."""
+        current_project = get_current_project()
+        
+        if not current_project:
+            return jsonify({'success': False, 'message': 'No active project'}), 400
+        
+        location_ids = {location_id for location_id, in db.session.query(Location.id).filter_by(project_id=current_project.id)}
+        try:
+            changes = _availability_changes(request.get_json(silent=True) or {}, 'location_id', location_ids,
+                                            _location_status)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        try:
+            write_location_changes(changes)
+            db.session.commit()
+            return jsonify({'success': True, 'locations': len(changes),
+                            'days': sum(len(days) for days in changes.values())})
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Bulk location availability update error: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
     @app.route('/optimization')
     @login_required
     def optimization():
@@ -626,13 +754,13 @@ def register_routes(app):
             return redirect(url_for('locations_list'))
         
         # Check if we have actor and location availability data
-        actor_availabilities = ActorAvailability.query.join(Actor).filter(
+        actor_availabilities = ActorAvailabilityRange.query.join(Actor).filter(
             Actor.project_id == current_project.id
-        ).all()
+        ).first()
         
-        location_availabilities = LocationAvailability.query.join(Location).filter(
+        location_availabilities = LocationAvailabilityRange.query.join(Location).filter(
             Location.project_id == current_project.id
-        ).all()
+        ).first()
         
         if not actor_availabilities:
             flash('No actor availability data. Please set actor availability first.', 'warning')
@@ -664,6 +792,7 @@ def register_routes(app):
     
     @app.route('/api/optimize-schedule', methods=['POST'])
     @login_required
+    @admission_controlled
     def api_optimize_schedule():
         """API endpoint to run schedule optimization."""
         import datetime  # Import here to avoid unbound variable error
@@ -682,8 +811,12 @@ def register_routes(app):
             start_date_str = data.get('start_date')
             end_date_str = data.get('end_date')
             algorithm = data.get('algorithm', 'ant_colony')
+            polish = data.get('polish', 'none')
             schedule_name = data.get('name', f'Schedule {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")}')
             
+            # Runs are reproducible: the seed is stored on the schedule and can be passed back in
+            seed = int(data['seed']) if data.get('seed') is not None else new_seed()
+            
             if not start_date_str:
                 return jsonify({'success': False, 'message': 'Start date is required'}), 400
         except Exception as e:
@@ -699,51 +832,26 @@ def register_routes(app):
             if end_date_str:
                 end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').date()
             
-            # Get data for optimization
-            scenes = Scene.query.filter_by(project_id=current_project.id).all()
-            actors = Actor.query.filter_by(project_id=current_project.id).all()
-            locations = Location.query.filter_by(project_id=current_project.id).all()
-            
-            # Get actor availability
-            actor_availability = {}
-            for actor in actors:
-                actor_availability[actor.id] = {}
-                availabilities = ActorAvailability.query.filter_by(actor_id=actor.id).all()
-                
-                for avail in availabilities:
-                    actor_availability[actor.id][avail.date.strftime('%Y-%m-%d')] = avail.is_available
+            # Compile the inputs with the column-only loader; only the ACO/TS/PSO family
+            # needs the ORM objects as well
+            instance = load_problem_instance(current_project.id, start_date, end_date)
+            if algorithm in ORM_ALGORITHMS:
+                (scenes, actors, locations, actor_availability,
+                 location_availability, actor_scenes) = get_optimization_inputs(current_project.id)
             
-            # Get location availability
-            location_availability = {}
-            for location in locations:
-                location_availability[location.id] = {}
-                availabilities = LocationAvailability.query.filter_by(location_id=location.id).all()
-                
-                for avail in availabilities:
-                    location_availability[location.id][avail.date.strftime('%Y-%m-%d')] = {
-                        'is_available': avail.is_available,
-                        'start_time': avail.start_time.strftime('%H:%M') if avail.start_time else None,
-                        'end_time': avail.end_time.strftime('%H:%M') if avail.end_time else None
-                    }
-            
-            # Get actor-scene relationships
-            actor_scenes = {}
-            for scene in scenes:
-                actor_scenes[scene.id] = []
-                relationships = ActorScene.query.filter_by(scene_id=scene.id).all()
-                
-                for rel in relationships:
-                    actor_scenes[scene.id].append(rel.actor_id)
+            # Content hash of the inputs, so the nightly batch can tell when this schedule goes stale
+            input_fingerprint = instance.fingerprint()
             
             # Choose optimization algorithm
             optimization_result = None
             algorithm_used = algorithm
+            algorithm_seed, polish_seed = spawn_seeds(seed, 2)
             
             try:
                 if algorithm == 'ant_colony':
                     optimization_result = optimize_schedule_ant_colony(
                         scenes, actors, locations, actor_availability, location_availability,
-                        actor_scenes, start_date, end_date
+                        actor_scenes, start_date, end_date, seed=algorithm_seed, instance=instance
                     )
                     algorithm_used = 'ACOBM'
                 elif algorithm == 'tabu_search':
@@ -751,7 +859,7 @@ def register_routes(app):
                     from optimization_algorithms_new import optimize_schedule_tabu_search
                     optimization_result = optimize_schedule_tabu_search(
                         scenes, actors, locations, actor_availability, location_availability,
-                        actor_scenes, start_date, end_date
+                        actor_scenes, start_date, end_date, seed=algorithm_seed
                     )
                     algorithm_used = 'TSBM'
                 elif algorithm == 'particle_swarm':
@@ -759,11 +867,59 @@ def register_routes(app):
                     from optimization_algorithms_new import optimize_schedule_particle_swarm
                     optimization_result = optimize_schedule_particle_swarm(
                         scenes, actors, locations, actor_availability, location_availability,
-                        actor_scenes, start_date, end_date
+                        actor_scenes, start_date, end_date, seed=algorithm_seed
                     )
                     algorithm_used = 'PSOBM'
+                elif algorithm == 'large_neighborhood':
+                    optimization_result = optimize_instance_large_neighborhood(instance, seed=algorithm_seed)
+                    algorithm_used = 'LNSBM'
+                elif algorithm == 'decomposed':
+                    optimization_result = optimize_instance_decomposed(instance, seed=algorithm_seed)
+                    algorithm_used = 'PDBM'
+                elif algorithm == 'hierarchical':
+                    optimization_result = optimize_instance_hierarchical(instance, seed=algorithm_seed)
+                    algorithm_used = 'HTBM'
+                elif algorithm == 'rolling_horizon':
+                    # Roll forward from the latest approved schedule; start_date is the cutoff
+                    base = Schedule.query.filter_by(
+                        project_id=current_project.id,
+                        status=ScheduleStatus.APPROVED
+                    ).order_by(Schedule.approved_at.desc()).first()
+                    base_schedule = {}
+                    if base:
+                        for scheduled_scene in base.scheduled_scenes:
+                            base_schedule[scheduled_scene.scene_id] = {'shooting_date': scheduled_scene.shooting_date}
+                    
+                    # The run's calendar reaches back to the locked part of the base schedule
+                    calendar_start, calendar_end = rolling_horizon_calendar(
+                        start_date, end_date, base_schedule, instance.num_scenes
+                    )
+                    optimization_result = optimize_instance_rolling_horizon(
+                        load_problem_instance(current_project.id, calendar_start, calendar_end), start_date,
+                        base_schedule=base_schedule,
+                        window_days=int(data.get('window_days') or DEFAULT_WINDOW_DAYS),
+                        seed=algorithm_seed
+                    )
+                    if base:
+                        optimization_result['metadata']['search']['base_schedule_id'] = base.id
+                    algorithm_used = 'RHBM'
+                elif algorithm == 'pareto':
+                    optimization_result = optimize_instance_pareto(instance, seed=algorithm_seed)
+                    algorithm_used = 'NSGABM'
                 else:
                     return jsonify({'success': False, 'message': 'Invalid algorithm selected'}), 400
+                
+                # Optional polishing stage on top of the selected algorithm. Rolling-horizon
+                # runs are not polished: the polishers know nothing of the locked scenes
+                # before the cutoff, which lie outside the request's calendar. Pareto runs
+                # are not either: a cost-only descent would pull the knee schedule off the
+                # front its candidate schedules are saved from
+                if algorithm in ('rolling_horizon', 'pareto') and polish in POLISH_STAGES:
+                    logging.info(f"Skipping '{polish}' polish of a {algorithm} run")
+                elif polish in POLISH_STAGES and isinstance(optimization_result, dict) and 'schedule' in optimization_result:
+                    polish_function, polish_label = POLISH_STAGES[polish]
+                    optimization_result = polish_function(optimization_result, instance, seed=polish_seed)
+                    algorithm_used = f'{algorithm_used}+{polish_label}'
             except Exception as e:
                 logging.error(f"Algorithm execution error: {str(e)}", exc_info=True)
                 return jsonify({'success': False, 'message': f'Algorithm execution error: {str(e)}'}), 500
@@ -781,7 +937,11 @@ def register_routes(app):
                     algorithm_used=algorithm_used,
                     created_by=current_user.id,
                     total_cost=metadata.get('total_cost', 0),
-                    total_duration=metadata.get('total_days', 0)
+                    total_duration=metadata.get('total_days', 0),
+                    seed=seed,
+                    input_fingerprint=input_fingerprint,
+                    horizon_start=instance.dates[0],
+                    horizon_end=instance.dates[-1]
                 )
             else:
                 # Old format (legacy compatibility)
@@ -794,50 +954,47 @@ def register_routes(app):
                     algorithm_used=algorithm_used,
                     created_by=current_user.id,
                     total_cost=optimal_schedule.get('total_cost', 0),
-                    total_duration=optimal_schedule.get('total_duration', 0)
+                    total_duration=optimal_schedule.get('total_duration', 0),
+                    seed=seed,
+                    input_fingerprint=input_fingerprint,
+                    horizon_start=instance.dates[0],
+                    horizon_end=instance.dates[-1]
                 )
             
             db.session.add(schedule)
             db.session.flush()
             
             # Create scheduled scenes
-            for scene_id, scene_data in optimal_schedule.items():
-                # Convert date string to date object if needed
-                shooting_date = scene_data.get('shooting_date')
-                if isinstance(shooting_date, str):
-                    import datetime
-                    shooting_date = datetime.datetime.strptime(shooting_date, '%Y-%m-%d').date()
-                else:
-                    shooting_date = scene_data.get('date')
-                
-                # Convert time strings to time objects if needed
-                start_time = scene_data.get('start_time')
-                if isinstance(start_time, str):
-                    try:
-                        start_time = datetime.datetime.strptime(start_time, '%H:%M').time()
-                    except:
-                        start_time = datetime.time(8, 0)  # Default start time 8:00 AM
-                
-                end_time = scene_data.get('end_time')
-                if isinstance(end_time, str):
-                    try:
-                        end_time = datetime.datetime.strptime(end_time, '%H:%M').time()
-                    except:
-                        end_time = datetime.time(18, 0)  # Default end time 6:00 PM
-                
-                scene_id_int = int(scene_id) if isinstance(scene_id, str) and scene_id.isdigit() else scene_data.get('scene_id')
-                
-                # Create scheduled scene record
-                scheduled_scene = ScheduledScene(
-                    schedule_id=schedule.id,
-                    scene_id=scene_id_int,
-                    shooting_date=shooting_date,
-                    start_time=start_time,
-                    end_time=end_time,
-                    estimated_cost=scene_data.get('estimated_cost', scene_data.get('cost', 0))
-                )
-                
-                db.session.add(scheduled_scene)
+            add_scheduled_scenes(schedule.id, optimal_schedule)
+            
+            # Store the rest of a Pareto front as candidate schedules linked to this one
+            candidate_ids = []
+            if isinstance(optimization_result, dict) and optimization_result.get('metadata', {}).get('pareto_front'):
+                for candidate in optimization_result['metadata']['pareto_front']:
+                    if candidate['is_primary']:
+                        candidate['schedule_id'] = schedule.id
+                    else:
+                        candidate_schedule = Schedule(
+                            project_id=current_project.id,
+                            name=f"{schedule_name} ({candidate['shooting_days']} shooting days)",
+                            algorithm_used=algorithm_used,
+                            created_by=current_user.id,
+                            total_cost=candidate['total_cost'],
+                            total_duration=candidate['total_days'],
+                            status=ScheduleStatus.CANDIDATE,
+                            parent_schedule_id=schedule.id,
+                            seed=seed,
+                            input_fingerprint=input_fingerprint,
+                            horizon_start=instance.dates[0],
+                            horizon_end=instance.dates[-1]
+                        )
+                        db.session.add(candidate_schedule)
+                        db.session.flush()
+                        add_scheduled_scenes(candidate_schedule.id, candidate['schedule'])
+                        candidate['schedule_id'] = candidate_schedule.id
+                        candidate_ids.append(candidate_schedule.id)
+                    # The schedules themselves are in the database now; keep the response small
+                    del candidate['schedule']
             
             # Create notifications for the director
             director_access = ProjectAccess.query.filter_by(
@@ -846,12 +1003,11 @@ def register_routes(app):
             ).first()
             
             if director_access:
-                notification = Notification(
-                    schedule_id=schedule.id,
-                    recipient_id=director_access.user_id,
-                    message=f"New schedule '{schedule_name}' has been created and is ready for review."
-                )
-                db.session.add(notification)
+                add_notifications([{
+                    'schedule_id': schedule.id,
+                    'recipient_id': director_access.user_id,
+                    'message': f"New schedule '{schedule_name}' has been created and is ready for review."
+                }])
             
             db.session.commit()
             
@@ -860,8 +1016,11 @@ def register_routes(app):
             response_data = {
                 'success': True,
                 'schedule_id': schedule.id,
-                'redirect_url': url_for('schedule_view', schedule_id=schedule.id)
+                'redirect_url': url_for('schedule_view', schedule_id=schedule.id),
+                'seed': seed
             }
+            if candidate_ids:
+                response_data['candidate_schedule_ids'] = candidate_ids
             
             # Add result and metadata for old client compatibility
             if isinstance(optimization_result, dict) and 'schedule' in optimization_result:
@@ -900,6 +1059,87 @@ def register_routes(app):
                 mimetype='application/json'
             )
     
+    @app.route('/api/optimization-queue')
+    @login_required
+    def api_optimization_queue():
+        """API endpoint reporting optimizer queue depth and the estimated wait (optionally for one ticket)."""
+        return jsonify(queue_status(request.args.get('ticket', type=int)))
+    
+    @app.route('/api/what-if', methods=['POST'])
+    @login_required
+    @admission_controlled
+    def api_what_if():
+        """API endpoint to compare a batch of what-if scenarios against a baseline schedule."""
+        current_project = get_current_project()
+        
+        if not current_project:
+            return jsonify({'success': False, 'message': 'No active project'}), 400
+        
+        data = request.get_json(silent=True) or {}
+        scenarios = data.get('scenarios') or []
+        if not scenarios:
+            return jsonify({'success': False, 'message': 'At least one scenario is required'}), 400
+        
+        try:
+            # Baseline: an existing schedule if given, otherwise an optimized (and cached) one
+            base_schedule = None
+            if data.get('schedule_id'):
+                base_schedule = Schedule.query.filter_by(
+                    id=data['schedule_id'],
+                    project_id=current_project.id
+                ).first()
+                if not base_schedule:
+                    return jsonify({'success': False, 'message': 'Schedule not found'}), 404
+                if not any(s.shooting_date for s in base_schedule.scheduled_scenes):
+                    return jsonify({
+                        'success': False,
+                        'message': 'The baseline schedule has no scheduled scenes; pick another schedule or omit schedule_id'
+                    }), 400
+            
+            if data.get('start_date'):
+                start_date = datetime.datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            elif base_schedule:
+                start_date = min(s.shooting_date for s in base_schedule.scheduled_scenes if s.shooting_date)
+            else:
+                return jsonify({'success': False, 'message': 'Start date is required'}), 400
+            end_date = None
+            if data.get('end_date'):
+                end_date = datetime.datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+            
+            instance = load_problem_instance(current_project.id, start_date, end_date)
+            
+            seed = int(data['seed']) if data.get('seed') is not None else new_seed()
+            baseline_seed, scenario_seed = spawn_seeds(seed, 2)
+            
+            baseline_cached = False
+            if base_schedule:
+                baseline = instance.assignment_from_schedule({
+                    s.scene_id: {'shooting_date': s.shooting_date} for s in base_schedule.scheduled_scenes
+                })
+                # Scenes added since the schedule was made go on their cheapest day
+                if (baseline < 0).any():
+                    state = ScheduleState(instance, baseline)
+                    state.insert_greedy(state.construction_order())
+                    baseline = state.assignment
+            else:
+                baseline, baseline_cached = baseline_assignment(instance, seed=baseline_seed)
+            
+            rows = run_scenarios(instance, scenarios, baseline, reoptimize=data.get('mode') == 'reoptimize',
+                                 seed=scenario_seed)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except Exception as e:
+            logging.error(f"What-if evaluation error: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': str(e)}), 500
+        
+        return jsonify({
+            'success': True,
+            'baseline_schedule_id': base_schedule.id if base_schedule else None,
+            'baseline_cached': baseline_cached,
+            'seed': seed,
+            'scenarios': rows
+        })
+
     @app.route('/schedule/<int:schedule_id>')
     @login_required
     def schedule_view(schedule_id):
@@ -922,8 +1162,10 @@ def register_routes(app):
             set_current_project(schedule.project_id)
             current_project = get_current_project()
         
-        # Get scheduled scenes
-        scheduled_scenes = ScheduledScene.query.filter_by(schedule_id=schedule.id).order_by(
+        # Get scheduled scenes with their scenes and locations in one joined query
+        scheduled_scenes = ScheduledScene.query.filter_by(schedule_id=schedule.id).options(
+            joinedload(ScheduledScene.scene).joinedload(Scene.location)
+        ).order_by(
             ScheduledScene.shooting_date, ScheduledScene.start_time
         ).all()
         
@@ -937,54 +1179,118 @@ def register_routes(app):
             
             scenes_by_date[date_str].append(scheduled_scene)
             
-        # Prepare actor call times for first date if available
-        actor_call_times = {}
-        first_date = None
-        first_day_scenes = []
-        
-        if scenes_by_date and len(scenes_by_date.keys()) > 0:
-            date_keys = list(scenes_by_date.keys())
-            date_keys.sort()  # Sort chronologically
-            first_date = date_keys[0]
-            first_day_scenes = scenes_by_date.get(first_date, [])
-            
-            # Calculate actor call times
-            for scheduled_scene in first_day_scenes:
-                scene = Scene.query.get(scheduled_scene.scene_id)
-                if scene:
-                    actor_relationships = ActorScene.query.filter_by(scene_id=scene.id).all()
-                    
-                    for rel in actor_relationships:
-                        actor = Actor.query.get(rel.actor_id)
-                        if actor and scheduled_scene.start_time:
-                            if actor.name not in actor_call_times or scheduled_scene.start_time < actor_call_times[actor.name]:
-                                actor_call_times[actor.name] = scheduled_scene.start_time
-        
-        # Preload scene and location data for each scheduled scene
+        # First day's call sheet, computed when the schedule was saved
+        first_date = min(scenes_by_date) if scenes_by_date else None
+        first_sheet = None
+        if first_date:
+            sheets = call_sheets(schedule.id, scenes_by_date[first_date][0].shooting_date)
+            first_sheet = sheets[0] if sheets else None
+        
+        # Scene and location data came with the scheduled scenes
         scene_data = {}
         location_data = {}
         
-        for date_str, day_scenes in scenes_by_date.items():
-            for scheduled_scene in day_scenes:
-                scene = Scene.query.get(scheduled_scene.scene_id)
-                if scene:
-                    scene_data[scene.id] = scene
-                    if scene.location_id:
-                        location = Location.query.get(scene.location_id)
-                        if location:
-                            location_data[location.id] = location
+        for scheduled_scene in scheduled_scenes:
+            scene = scheduled_scene.scene
+            if scene:
+                scene_data[scene.id] = scene
+                if scene.location:
+                    location_data[scene.location.id] = scene.location
+        
+        # Other members of the same Pareto front, fewest shooting days first
+        primary = schedule.parent_schedule or schedule
+        pareto_alternatives = [primary] + primary.candidates.all() if primary.candidates.count() else []
+        pareto_alternatives.sort(key=lambda alternative: alternative.total_duration or 0)
         
         return render_template(
             'schedule_view.html',
             schedule=schedule,
+            pareto_alternatives=pareto_alternatives,
             current_project=current_project,
             scenes_by_date=scenes_by_date,
-            actor_call_times=actor_call_times,
+            first_sheet=first_sheet,
             first_date=first_date,
             scene_data=scene_data,
             location_data=location_data
         )
     
+    @app.route('/api/schedule/<int:schedule_id>/sensitivity')
+    @login_required
+    def api_schedule_sensitivity(schedule_id):
+        """Cost sensitivity of a schedule over its own calendar, computed on demand and cached."""
+        schedule = Schedule.query.get_or_404(schedule_id)
+        if not ProjectAccess.query.filter_by(project_id=schedule.project_id, user_id=current_user.id).first():
+            return jsonify({'success': False, 'message': 'You do not have access to this schedule'}), 403
+        
+        scheduled = db.session.query(ScheduledScene.scene_id, ScheduledScene.shooting_date).filter(
+            ScheduledScene.schedule_id == schedule.id,
+            ScheduledScene.shooting_date.isnot(None)
+        ).all()
+        if not scheduled:
+            return jsonify({'success': True, 'schedule_id': schedule.id, 'sensitivity': None})
+        
+        try:
+            shooting_dates = [shooting_date for _, shooting_date in scheduled]
+            instance = load_problem_instance(schedule.project_id, min(shooting_dates), max(shooting_dates))
+            sensitivity = cached_sensitivity_report(instance, instance.assignment_from_schedule({
+                scene_id: {'shooting_date': shooting_date} for scene_id, shooting_date in scheduled
+            }))
+            
+            actor_names = dict(db.session.query(Actor.id, Actor.name).filter_by(project_id=schedule.project_id))
+            for row in sensitivity['actors']:
+                row['name'] = actor_names.get(row['actor_id'], 'Unknown Actor')
+            location_names = dict(zip(instance.location_ids.tolist(), instance.location_names))
+            for row in sensitivity['blocked_dates']:
+                if row['type'] == 'actor':
+                    row['name'] = actor_names.get(row['actor_id'], 'Unknown Actor')
+                else:
+                    row['name'] = location_names.get(row['location_id'], 'Unknown Location')
+        except Exception as e:
+            logging.error(f"Sensitivity report error: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': f'Could not compute the sensitivity report: {e}'}), 500
+        
+        return jsonify({'success': True, 'schedule_id': schedule.id, 'sensitivity': sensitivity})
+    
+    def _call_sheets_of(schedule_id):
+        """A schedule the current user may see and its stored call sheets (one day with ?date=YYYY-MM-DD)."""
+        schedule = Schedule.query.get_or_404(schedule_id)
+        if not ProjectAccess.query.filter_by(project_id=schedule.project_id, user_id=current_user.id).first():
+            return schedule, None
+        
+        shooting_date = None
+        if request.args.get('date'):
+            try:
+                shooting_date = datetime.datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+            except ValueError:
+                return schedule, []
+        return schedule, call_sheets(schedule.id, shooting_date)
+    
+    @app.route('/schedule/<int:schedule_id>/call-sheet')
+    @login_required
+    def call_sheet_view(schedule_id):
+        """Call sheets of a schedule route: every shooting day, or one with ?date=YYYY-MM-DD."""
+        schedule, sheets = _call_sheets_of(schedule_id)
+        if sheets is None:
+            flash('You do not have access to this schedule', 'danger')
+            return redirect(url_for('index'))
+        
+        return render_template(
+            'call_sheet.html',
+            schedule=schedule,
+            sheets=sheets,
+            selected_date=request.args.get('date'),
+            current_project=get_current_project()
+        )
+    
+    @app.route('/api/schedule/<int:schedule_id>/call-sheets')
+    @login_required
+    def api_call_sheets(schedule_id):
+        """Call sheets of a schedule as JSON: every shooting day, or one with ?date=YYYY-MM-DD."""
+        schedule, sheets = _call_sheets_of(schedule_id)
+        if sheets is None:
+            return jsonify({'success': False, 'message': 'You do not have access to this schedule'}), 403
+        return jsonify({'success': True, 'schedule_id': schedule.id, 'call_sheets': sheets})
+    
     @app.route('/schedule/<int:schedule_id>/approve', methods=['POST'])
     @login_required
     def approve_schedule(schedule_id):
@@ -1008,41 +1314,29 @@ def register_routes(app):
                 return redirect(url_for('index'))
         
         try:
-            # Create notifications for all team members
-            project_access_list = ProjectAccess.query.filter_by(
-                project_id=schedule.project_id
-            ).all()
+            schedule.status = ScheduleStatus.APPROVED
+            schedule.approved_at = datetime.datetime.utcnow()
             
-            for access in project_access_list:
-                if access.user_id != current_user.id:  # Don't notify self
-                    notification = Notification(
-                        schedule_id=schedule.id,
-                        recipient_id=access.user_id,
-                        message=f"Schedule '{schedule.name}' has been approved by the director."
-                    )
-                    db.session.add(notification)
-            
-            # Create notifications for all actors in this schedule
-            actor_ids = set()
-            scheduled_scenes = ScheduledScene.query.filter_by(schedule_id=schedule.id).all()
-            
-            for scheduled_scene in scheduled_scenes:
-                actor_scene_relations = ActorScene.query.filter_by(scene_id=scheduled_scene.scene_id).all()
-                
-                for relation in actor_scene_relations:
-                    actor_ids.add(relation.actor_id)
-            
-            for actor_id in actor_ids:
-                notification = Notification(
-                    schedule_id=schedule.id,
-                    actor_id=actor_id,
-                    message=f"A new shooting schedule has been approved. Please check your assigned scenes."
-                )
-                db.session.add(notification)
+            # Notify the team and every actor in the schedule with one bulk insert
+            notification_ids = notify_schedule_approved(schedule, current_user.id)
             
             db.session.commit()
             
+            # Delivery beyond the in-app notification happens off this request
+            dispatch_notifications(notification_ids)
+            
             flash('Schedule approved successfully!', 'success')
+            
+            # Warn about people this schedule books on days another production already has them
+            double_bookings = find_double_bookings(schedule)
+            for conflict in double_bookings[:MAX_DOUBLE_BOOKING_WARNINGS]:
+                flash(
+                    f"{conflict['actor_name']} is also booked on {conflict['date'].strftime('%Y-%m-%d')} "
+                    f"by '{conflict['schedule_name']}' ({conflict['project_name']})",
+                    'warning'
+                )
+            if len(double_bookings) > MAX_DOUBLE_BOOKING_WARNINGS:
+                flash(f"{len(double_bookings) - MAX_DOUBLE_BOOKING_WARNINGS} more double bookings not shown", 'warning')
         except Exception as e:
             db.session.rollback()
             flash(f'Failed to approve schedule: {str(e)}', 'danger')
@@ -1052,22 +1346,71 @@ def register_routes(app):
     @app.route('/notifications')
     @login_required
     def view_notifications():
-        """View all notifications route."""
-        notifications = Notification.query.filter_by(
-            recipient_id=current_user.id
-        ).order_by(Notification.created_at.desc()).all()
+        """View notifications route: one keyset page, newest first (older pages via ?before=<cursor>)."""
+        # Mark all as read with one UPDATE
+        try:
+            mark_read(current_user.id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Failed to mark notifications as read: {str(e)}', 'danger')
+        
+        try:
+            notifications, next_cursor = notification_page(current_user.id, request.args.get('before'))
+        except ValueError:
+            return redirect(url_for('view_notifications'))
         
-        # Mark all as read
-        for notification in notifications:
-            notification.read = True
+        return render_template(
+            'notifications.html',
+            notifications=notifications,
+            next_cursor=next_cursor,
+            is_first_page=not request.args.get('before')
+        )
+    
+    @app.route('/api/notifications')
+    @login_required
+    def api_notifications():
+        """API endpoint for one keyset page of the user's notifications (?before=<cursor>&limit=N)."""
+        try:
+            notifications, next_cursor = notification_page(
+                current_user.id, request.args.get('before'), request.args.get('limit', NOTIFICATION_PAGE_SIZE)
+            )
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid cursor or limit'}), 400
+        
+        return jsonify({
+            'success': True,
+            'notifications': [{
+                'id': notification.id,
+                'schedule_id': notification.schedule_id,
+                'message': notification.message,
+                'created_at': notification.created_at.isoformat(),
+                'read': notification.read
+            } for notification in notifications],
+            'next_before': next_cursor,
+            'unread_count': unread_count(current_user)
+        })
+    
+    @app.route('/api/notifications/mark-read', methods=['POST'])
+    @login_required
+    def api_mark_notifications_read():
+        """API endpoint marking the user's notifications read: the ones in 'ids', or all of them."""
+        data = request.get_json(silent=True) or {}
+        notification_ids = data.get('ids')
+        try:
+            if notification_ids is not None:
+                notification_ids = [int(notification_id) for notification_id in notification_ids]
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'ids must be a list of notification ids'}), 400
         
         try:
+            marked = mark_read(current_user.id, notification_ids)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
-            flash(f'Failed to mark notifications as read: {str(e)}', 'danger')
+            return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
         
-        return render_template('notifications.html', notifications=notifications)
+        return jsonify({'success': True, 'marked': marked, 'unread_count': unread_count(current_user)})
     
     @app.route('/invite-user', methods=['POST'])
     @login_required
@@ -1113,12 +1456,11 @@ def register_routes(app):
             db.session.add(access)
             
             # Create notification for the invited user
-            notification = Notification(
-                schedule_id=0,  # No specific schedule
-                recipient_id=user.id,
-                message=f"You have been invited to project '{current_project.name}' as {role.replace('_', ' ').title()}."
-            )
-            db.session.add(notification)
+            add_notifications([{
+                'schedule_id': 0,  # No specific schedule
+                'recipient_id': user.id,
+                'message': f"You have been invited to project '{current_project.name}' as {role.replace('_', ' ').title()}."
+            }])
             
             db.session.commit()
             flash(f'User "{username}" has been invited to the project', 'success')
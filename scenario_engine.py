@@ -0,0 +1,199 @@
+import copy
+import datetime
+import logging
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from instance_solvers import solve_instance, solve_many
+from rng_streams import spawn_seeds
+
+BASELINE_TIME_LIMIT = 5.0  # Seconds to optimize a baseline that isn't cached yet
+SCENARIO_TIME_LIMIT = 1.0  # Seconds of re-optimization per scenario
+BASELINE_CACHE_SIZE = 16  # Baseline schedules kept per process
+MAX_SCENARIOS = 50
+
+# Instance fingerprint -> optimized baseline assignment, most recently used last
+_baseline_cache = OrderedDict()
+
+
+def _parse_date(value):
+    if isinstance(value, str):
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+
+def _edit_days(instance, edit):
+    """Boolean day mask for an edit's inclusive start_date/end_date range (whole calendar if omitted)."""
+    start = _parse_date(edit.get('start_date')) or instance.dates[0]
+    # A start date on its own edits that single day
+    end = _parse_date(edit.get('end_date')) or (start if edit.get('start_date') else instance.dates[-1])
+    return np.array([start <= date <= end for date in instance.dates], dtype=bool)
+
+
+def _entity_index(ids, entity_id, kind):
+    matches = np.flatnonzero(ids == int(entity_id))
+    if not matches.size:
+        raise ValueError(f"Unknown {kind} id {entity_id}")
+    return int(matches[0])
+
+
+def _new_cost(costs, index, edit):
+    if 'factor' in edit:
+        return costs[index] * float(edit['factor'])
+    if 'cost' in edit:
+        return float(edit['cost'])
+    raise ValueError("Cost edits need a 'factor' or a 'cost'")
+
+
+def apply_edits(instance, edits):
+    """
+    Derive a what-if instance from a compiled one.
+
+    Only the arrays an edit touches are copied; everything else is shared
+    with the original. Conflict counts are recomputed for the scenes that
+    use an edited actor or location only.
+
+    Supported edits (dicts with a 'type' key):
+        actor_unavailable / actor_available: actor_id, optional start_date and end_date
+        location_unavailable / location_available: location_id, optional start_date and end_date
+        actor_cost / location_cost: actor_id or location_id, and a 'factor' or an absolute 'cost'
+
+    Args:
+        instance: ProblemInstance to start from (left unchanged)
+        edits: List of edit dicts
+
+    Returns:
+        ProblemInstance
+    """
+    scenario = copy.copy(instance)
+    touched = np.zeros(instance.num_scenes, dtype=bool)
+
+    for edit in edits:
+        kind = edit.get('type')
+        if kind in ('actor_unavailable', 'actor_available'):
+            actor = _entity_index(instance.actor_ids, edit.get('actor_id'), 'actor')
+            if scenario.actor_available is instance.actor_available:
+                scenario.actor_available = instance.actor_available.copy()
+            scenario.actor_available[actor, _edit_days(instance, edit)] = kind == 'actor_available'
+            touched |= instance.incidence[:, actor]
+        elif kind in ('location_unavailable', 'location_available'):
+            location = _entity_index(instance.location_ids, edit.get('location_id'), 'location')
+            if scenario.location_available is instance.location_available:
+                scenario.location_available = instance.location_available.copy()
+            scenario.location_available[location, _edit_days(instance, edit)] = kind == 'location_available'
+            touched |= instance.scene_location == location
+        elif kind == 'actor_cost':
+            actor = _entity_index(instance.actor_ids, edit.get('actor_id'), 'actor')
+            if scenario.actor_cost is instance.actor_cost:
+                scenario.actor_cost = instance.actor_cost.copy()
+            scenario.actor_cost[actor] = _new_cost(scenario.actor_cost, actor, edit)
+        elif kind == 'location_cost':
+            location = _entity_index(instance.location_ids, edit.get('location_id'), 'location')
+            if scenario.location_cost is instance.location_cost:
+                scenario.location_cost = instance.location_cost.copy()
+            scenario.location_cost[location] = _new_cost(scenario.location_cost, location, edit)
+        else:
+            raise ValueError(f"Unknown scenario edit '{kind}'")
+
+    if touched.any():
+        rows = np.flatnonzero(touched)
+        conflicts = instance.conflicts.copy()
+        conflicts[rows] = instance.incidence[rows].astype(np.int32) @ (~scenario.actor_available).astype(np.int32)
+        located = rows[instance.scene_location[rows] >= 0]
+        conflicts[located] += ~scenario.location_available[instance.scene_location[located]]
+        scenario.conflicts = conflicts
+        scenario.feasible = conflicts == 0
+    return scenario
+
+
+def baseline_assignment(instance, time_limit=BASELINE_TIME_LIMIT, seed=None):
+    """
+    Optimized schedule for an unedited instance, cached by its content fingerprint.
+
+    Returns:
+        Tuple of (assignment, whether it came from the cache)
+    """
+    key = instance.fingerprint()
+    if key in _baseline_cache:
+        _baseline_cache.move_to_end(key)
+        return _baseline_cache[key].copy(), True
+
+    assignment, _ = solve_instance(instance, 'large_neighborhood', time_limit=time_limit, seed=seed)
+    _baseline_cache[key] = assignment.copy()
+    while len(_baseline_cache) > BASELINE_CACHE_SIZE:
+        _baseline_cache.popitem(last=False)
+    return assignment, False
+
+
+def _summary(name, instance, assignment, baseline, baseline_breakdown=None):
+    breakdown = instance.cost_breakdown(assignment)
+    total_cost = breakdown['actor_cost'] + breakdown['location_cost'] + breakdown['travel_cost']
+    used_days = np.flatnonzero(np.bincount(assignment, minlength=instance.num_days))
+    row = {
+        'name': name,
+        'total_cost': total_cost,
+        'objective': breakdown['objective'],
+        'shooting_days': breakdown['shooting_days'],
+        'end_date': instance.dates[used_days[-1]].strftime('%Y-%m-%d') if used_days.size else None,
+        'conflicts': breakdown['conflicts'],
+        'overtime_hours': breakdown['overtime_hours'],
+        'scenes_moved': int((assignment != baseline).sum())
+    }
+    if baseline_breakdown is not None:
+        row['cost_change'] = total_cost - baseline_breakdown['total_cost']
+        row['objective_change'] = breakdown['objective'] - baseline_breakdown['objective']
+    return row
+
+
+def run_scenarios(instance, scenarios, baseline, reoptimize=False, time_limit=SCENARIO_TIME_LIMIT,
+                  seed=None, max_workers=None):
+    """
+    Evaluate a batch of what-if scenarios against a baseline schedule.
+
+    Every scenario is a list of edits applied to the same compiled instance.
+    Without re-optimization the baseline schedule is simply priced under
+    each scenario (what the change costs if nothing is moved); with it,
+    each scenario and the baseline itself get a short local search from
+    the baseline schedule, run in parallel.
+
+    Args:
+        instance: ProblemInstance the baseline was built for
+        scenarios: List of dicts with a 'name' and a list of 'edits' (see apply_edits)
+        baseline: Baseline assignment
+        reoptimize: Whether to re-optimize every scenario
+        time_limit: Seconds of re-optimization per scenario
+        seed: Seed for the run; each scenario gets its own spawned stream
+        max_workers: Process pool size (CPU count if omitted)
+
+    Returns:
+        List of comparison rows, baseline first
+    """
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios can be compared at once")
+
+    started = time.perf_counter()
+    baseline = np.asarray(baseline, dtype=np.int64)
+    names = [scenario.get('name') or f'Scenario {i + 1}' for i, scenario in enumerate(scenarios)]
+    scenario_instances = [apply_edits(instance, scenario.get('edits', [])) for scenario in scenarios]
+
+    if reoptimize:
+        # The unedited instance gets the same search so gains from the search
+        # itself don't show up as savings of the scenario
+        batch = [instance] + scenario_instances
+        seeds = spawn_seeds(seed, len(batch))
+        results = solve_many(batch, 'local_search', [time_limit] * len(batch), seeds,
+                             max_workers, assignments=[baseline] * len(batch))
+        assignments = [assignment for assignment, _ in results]
+    else:
+        assignments = [baseline] * (len(scenario_instances) + 1)
+
+    baseline_row = _summary('Baseline', instance, assignments[0], baseline)
+    rows = [baseline_row] + [
+        _summary(name, scenario_instance, assignment, baseline, baseline_row)
+        for name, scenario_instance, assignment in zip(names, scenario_instances, assignments[1:])
+    ]
+    logging.info(f"Evaluated {len(scenarios)} what-if scenarios in {time.perf_counter() - started:.2f}s"
+                 f"{' with re-optimization' if reoptimize else ''}")
+    return rows
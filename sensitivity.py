@@ -0,0 +1,192 @@
+import copy
+from collections import OrderedDict
+
+import numpy as np
+
+from problem_instance import ScheduleState, TRAVEL_COST, UNAVAILABLE_PENALTY
+
+DEFAULT_TOP = 10  # Rows per section of the report
+SAVING_EPSILON = 1e-6
+REPORT_CACHE_SIZE = 32  # Reports kept per process
+
+# (instance fingerprint, assignment, top) -> report, most recently used last
+_report_cache = OrderedDict()
+
+
+def _best_by_group(values, group_of_row, num_groups):
+    """
+    Row-wise minimum of values within each group, for all groups at once.
+
+    Returns:
+        (num_groups, num_days) array of minima (inf for empty groups) and the
+        row index achieving each minimum
+    """
+    order = np.argsort(group_of_row, kind='stable')
+    groups = group_of_row[order]
+    best = np.full((num_groups, values.shape[1]), np.inf)
+    best_row = np.full((num_groups, values.shape[1]), -1, dtype=np.int64)
+    if not order.size:
+        return best, best_row
+
+    present, starts = np.unique(groups, return_index=True)
+    ordered = values[order]
+    best[present] = np.minimum.reduceat(ordered, starts, axis=0)
+
+    # Row achieving the minimum: first row of the group equal to it
+    hits = ordered == best[groups]
+    positions = np.where(hits, np.arange(len(order))[:, None], len(order))
+    first_hit = np.minimum.reduceat(positions, starts, axis=0)
+    best_row[present] = np.where(first_hit < len(order), order[np.minimum(first_hit, len(order) - 1)], -1)
+    return best, best_row
+
+
+def _blocked_date_savings(instance, deltas, blocked, scenes, group_of_scene, kind, ids):
+    """
+    Estimated saving of freeing each blocked (actor or location, day) pair.
+
+    Looks at scenes whose only conflict on a day is the blocked entity: if
+    it were available, the best such scene could move there at its move
+    delta minus the unavailability penalty. The saving is counted beyond
+    the best move the scene already has, so only dates that unlock
+    something new are reported.
+    """
+    inst = instance
+    already = np.minimum(deltas[scenes].min(axis=1), 0)
+    freed = np.where(inst.conflicts[scenes] == 1, deltas[scenes] - UNAVAILABLE_PENALTY - already[:, None], np.inf)
+    best, best_row = _best_by_group(freed, group_of_scene, len(ids))
+
+    entity, day = np.nonzero(blocked & (best < -SAVING_EPSILON))
+    rows = []
+    for e, d in zip(entity, day):
+        scene = scenes[best_row[e, d]]
+        rows.append({
+            'type': kind,
+            f'{kind}_id': int(ids[e]),
+            'date': inst.dates[d].strftime('%Y-%m-%d'),
+            'saving': float(-best[e, d]),
+            'scene_id': int(inst.scene_ids[scene])
+        })
+    rows.sort(key=lambda row: -row['saving'])
+    return rows
+
+
+def sensitivity_report(instance, assignment, top=DEFAULT_TOP):
+    """
+    Break a schedule's cost down by actor, location and day, and price what-if moves.
+
+    All alternatives come from one vectorized (scene × day) move delta
+    matrix, so the report costs about as much as a single evaluation
+    instead of an optimizer run.
+
+    Args:
+        instance: ProblemInstance the schedule was mapped onto
+        assignment: Day index per scene (-1 = unscheduled)
+        top: Rows kept per section
+
+    Returns:
+        Dict with 'actors', 'locations', 'days', 'blocked_dates' and 'moves' lists
+    """
+    inst = instance
+    state = ScheduleState(inst, assignment)
+    deltas = state.move_delta_matrix()
+    total_cost = max(float(state.cost), SAVING_EPSILON)
+
+    # Actor-days: cost, single-scene days, and days held between first and last shooting day
+    worked = state.actor_load > 0
+    actor_days = worked.sum(axis=1)
+    actors = []
+    for a in np.argsort(-(actor_days * inst.actor_cost), kind='stable')[:top]:
+        if not actor_days[a]:
+            continue
+        used = np.flatnonzero(worked[a])
+        actors.append({
+            'actor_id': int(inst.actor_ids[a]),
+            'days': int(actor_days[a]),
+            'cost': float(actor_days[a] * inst.actor_cost[a]),
+            'share': float(actor_days[a] * inst.actor_cost[a] / total_cost),
+            'single_scene_days': int((state.actor_load[a] == 1).sum()),
+            'idle_days_in_span': int(used[-1] - used[0] + 1 - len(used))
+        })
+
+    # Location-days
+    visited = state.location_load > 0
+    location_days = visited.sum(axis=1)
+    locations = []
+    for loc in np.argsort(-(location_days * inst.location_cost), kind='stable')[:top]:
+        if not location_days[loc]:
+            continue
+        locations.append({
+            'location_id': int(inst.location_ids[loc]),
+            'name': inst.location_names[loc],
+            'days': int(location_days[loc]),
+            'cost': float(location_days[loc] * inst.location_cost[loc]),
+            'share': float(location_days[loc] * inst.location_cost[loc] / total_cost)
+        })
+
+    # Shooting days by what they cost
+    day_cost = (inst.actor_cost @ worked) + (inst.location_cost @ visited) + \
+        TRAVEL_COST * np.maximum(state.day_locations - 1, 0)
+    scenes_per_day = np.bincount(state.assignment[state.assignment >= 0], minlength=inst.num_days)
+    days = [
+        {
+            'date': inst.dates[d].strftime('%Y-%m-%d'),
+            'cost': float(day_cost[d]),
+            'scenes': int(scenes_per_day[d]),
+            'hours': float(state.day_hours[d]),
+            'locations': int(state.day_locations[d])
+        }
+        for d in np.argsort(-day_cost, kind='stable')[:top] if scenes_per_day[d]
+    ]
+
+    # Blocked dates worth negotiating
+    scheduled = np.flatnonzero(state.assignment >= 0)
+    edge_mask = state.assignment[inst.edge_scene] >= 0
+    blocked_dates = _blocked_date_savings(
+        inst, deltas, ~inst.actor_available, inst.edge_scene[edge_mask], inst.edge_actor[edge_mask],
+        'actor', inst.actor_ids
+    )
+    located = scheduled[inst.scene_location[scheduled] >= 0]
+    blocked_dates += _blocked_date_savings(
+        inst, deltas, ~inst.location_available, located, inst.scene_location[located],
+        'location', inst.location_ids
+    )
+    blocked_dates.sort(key=lambda row: -row['saving'])
+
+    # Single-scene moves that would already pay off
+    best_day = np.argmin(deltas[scheduled], axis=1)
+    best_delta = deltas[scheduled, best_day]
+    moves = [
+        {
+            'scene_id': int(inst.scene_ids[scheduled[i]]),
+            'from_date': inst.dates[state.assignment[scheduled[i]]].strftime('%Y-%m-%d'),
+            'to_date': inst.dates[best_day[i]].strftime('%Y-%m-%d'),
+            'saving': float(-best_delta[i])
+        }
+        for i in np.argsort(best_delta, kind='stable')[:top] if best_delta[i] < -SAVING_EPSILON
+    ]
+
+    return {
+        'objective': float(state.cost),
+        'actors': actors,
+        'locations': locations,
+        'days': days,
+        'blocked_dates': blocked_dates[:top],
+        'moves': moves
+    }
+
+
+def cached_sensitivity_report(instance, assignment, top=DEFAULT_TOP):
+    """
+    sensitivity_report, reused while the instance's inputs and the schedule are unchanged.
+
+    Returns:
+        A copy of the report dict, free for the caller to annotate
+    """
+    key = (instance.fingerprint(), np.asarray(assignment, dtype=np.int64).tobytes(), top)
+    if key in _report_cache:
+        _report_cache.move_to_end(key)
+    else:
+        _report_cache[key] = sensitivity_report(instance, assignment, top)
+        while len(_report_cache) > REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+    return copy.deepcopy(_report_cache[key])
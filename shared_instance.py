@@ -0,0 +1,90 @@
+import logging
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from problem_instance import ProblemInstance
+
+ALIGNMENT = 64  # Byte alignment of every array inside the block
+
+# Blocks this process has attached to, kept open for as long as their views are in use
+_attached_blocks = {}
+
+
+class SharedInstances:
+    """
+    Compiled problem instances placed in one shared memory block.
+
+    The parent copies every array of every instance (incidence matrix,
+    availability bitmaps, cost vectors and the compiled conflict tables)
+    into the block once. Workers receive only the small handle, attach by
+    name and wrap the arrays as read-only views, so starting a worker
+    pickles no instance data and costs no extra resident memory.
+
+    Use as a context manager in the parent; the block is removed on exit.
+    """
+
+    def __init__(self, instances):
+        # The same instance object passed several times (e.g. one per seed) is stored once
+        layouts = {}
+        size = 0
+        for instance in instances:
+            if id(instance) in layouts:
+                continue
+            layout = layouts[id(instance)] = {}
+            for field, array in instance.arrays().items():
+                layout[field] = (size, array.shape, array.dtype.str)
+                size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        self.block = shared_memory.SharedMemory(create=True, size=max(size, ALIGNMENT))
+        for instance in {id(instance): instance for instance in instances}.values():
+            for field, array in instance.arrays().items():
+                offset, shape, dtype = layouts[id(instance)][field]
+                np.ndarray(shape, dtype, buffer=self.block.buf, offset=offset)[...] = array
+
+        # Everything a worker needs besides the block; display data stays behind
+        self.handle = {
+            'name': self.block.name,
+            'instances': [
+                {'layout': layouts[id(instance)], 'dates': instance.dates, 'day_capacity': instance.day_capacity}
+                for instance in instances
+            ]
+        }
+        logging.debug(f"Shared {len(instances)} instances in {size / 2**20:.1f} MiB")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release and remove the block (workers must be done with it)."""
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+
+def attach(handle):
+    """
+    Instances over the shared block described by a SharedInstances handle.
+
+    The arrays are read-only views into the block; nothing is copied.
+
+    Returns:
+        List of ProblemInstance objects in the order they were shared
+    """
+    block = _attached_blocks.get(handle['name'])
+    if block is None:
+        block = _attached_blocks[handle['name']] = shared_memory.SharedMemory(name=handle['name'])
+
+    instances = []
+    for entry in handle['instances']:
+        arrays = {}
+        for field, (offset, shape, dtype) in entry['layout'].items():
+            array = np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+            array.flags.writeable = False
+            arrays[field] = array
+        instances.append(ProblemInstance.from_arrays(arrays, entry['dates'], entry['day_capacity']))
+    return instances
@@ -0,0 +1,210 @@
+import bisect
+import datetime
+import logging
+
+import numpy as np
+
+from problem_instance import ScheduleState, DAY_START_HOUR, DAY_END_HOUR
+
+SCENE_GAP_HOURS = 0.5  # Reset between two scenes at the same location
+COMPANY_MOVE_HOURS = 1.0  # Wrap, travel and set-up between two locations
+MAX_REPAIR_ROUNDS = 5  # Rounds of handing overflow back to the day-level search
+TIME_EPSILON = 1e-9
+
+
+def _changeover(from_location, to_location):
+    """Hours needed between two consecutive scenes."""
+    if from_location == to_location or from_location < 0 or to_location < 0:
+        return SCENE_GAP_HOURS
+    return COMPANY_MOVE_HOURS
+
+
+class DayTimeline:
+    """
+    Booked intervals of one shooting day, kept sorted by start time.
+
+    The unit shoots one scene at a time, so booked intervals never overlap
+    and their end times are sorted as well; the interval that may reach
+    past a given time is always the one bisect finds just before it.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.locations = []
+
+    def find_slot(self, duration, location, earliest, latest):
+        """
+        Earliest start at or after earliest that fits duration before latest.
+
+        Leaves the changeover time (scene gap or company move) to the
+        neighbouring intervals free.
+
+        Returns:
+            Start hour, or None if the scene does not fit
+        """
+        i = bisect.bisect_right(self.starts, earliest)
+        start = earliest
+        if i > 0:
+            start = max(start, self.ends[i - 1] + _changeover(self.locations[i - 1], location))
+        while i < len(self.starts):
+            if start + duration + _changeover(location, self.locations[i]) <= self.starts[i] + TIME_EPSILON:
+                break
+            start = max(start, self.ends[i] + _changeover(self.locations[i], location))
+            i += 1
+        if start + duration > latest + TIME_EPSILON:
+            return None
+        return start
+
+    def book(self, start, end, location):
+        i = bisect.bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.locations.insert(i, location)
+
+    def company_moves(self):
+        return sum(
+            1 for a, b in zip(self.locations, self.locations[1:]) if a != b and a >= 0 and b >= 0
+        )
+
+
+def slot_day(instance, scenes, day):
+    """
+    Place one day's scenes into their locations' shooting windows.
+
+    Locations that close earliest are placed first, each location's scenes
+    back to back by priority, so blocks stay together and a company move is
+    only made when a window forces one.
+
+    Args:
+        instance: ProblemInstance
+        scenes: Scene indexes assigned to the day
+        day: Day index
+
+    Returns:
+        Tuple of (start hours, end hours, overflow scene indexes, company moves); hours are NaN
+        for overflow scenes
+    """
+    inst = instance
+    scenes = np.asarray(scenes, dtype=np.int64)
+    locs = inst.scene_location[scenes]
+    located = locs >= 0
+    # Scenes without a location only have to fit the crew day
+    opens = np.full(len(scenes), DAY_START_HOUR)
+    closes = np.full(len(scenes), DAY_END_HOUR)
+    opens[located] = inst.location_open[locs[located], day]
+    closes[located] = inst.location_close[locs[located], day]
+
+    starts = np.full(len(scenes), np.nan)
+    ends = np.full(len(scenes), np.nan)
+    overflow = []
+    timeline = DayTimeline()
+    for k in np.lexsort((scenes, -inst.priorities[scenes], locs, opens, closes)):
+        duration = float(inst.durations[scenes[k]])
+        start = timeline.find_slot(duration, int(locs[k]), float(opens[k]), float(closes[k]))
+        if start is None:
+            overflow.append(int(scenes[k]))
+            continue
+        timeline.book(start, start + duration, int(locs[k]))
+        starts[k], ends[k] = start, start + duration
+    return starts, ends, overflow, timeline.company_moves()
+
+
+def _day_groups(assignment, days):
+    """(day, scene indexes) for each of the given days, from one sort of the assignment."""
+    order = np.argsort(assignment, kind='stable')
+    sorted_days = assignment[order]
+    for day in sorted(days):
+        low, high = np.searchsorted(sorted_days, [day, day + 1])
+        yield day, order[low:high]
+
+
+def slot_schedule(instance, assignment, max_rounds=MAX_REPAIR_ROUNDS, locked=None, first_open_day=0):
+    """
+    Intra-day slotting stage run after the day-level search.
+
+    Every day's scenes are placed into the shooting windows of their
+    locations. Scenes that do not fit are handed back to the day-level
+    search: they are removed from that day and re-inserted on their cheapest
+    other day, and only the days that changed are slotted again. Scenes
+    still left over after max_rounds stay on their day without times rather
+    than getting times outside the window.
+
+    A re-planned schedule passes its locked scenes and first open day:
+    locked scenes are never moved (overflowing ones keep their day without
+    times), and no other scene is moved to a day before first_open_day.
+
+    Args:
+        instance: ProblemInstance
+        assignment: Day index per scene (-1 = unscheduled)
+        max_rounds: Repair rounds before giving up on the remaining overflow
+        locked: Optional bool mask of scenes that must keep their day
+        first_open_day: First day index overflow may be moved to
+
+    Returns:
+        Tuple of (assignment, start hours, end hours, stats dict); hours are NaN for scenes
+        without a slot
+    """
+    inst = instance
+    assignment = np.asarray(assignment, dtype=np.int64).copy()
+    start_hours = np.full(inst.num_scenes, np.nan)
+    end_hours = np.full(inst.num_scenes, np.nan)
+    company_moves = {}
+
+    state = None
+    banned = None
+    repaired = 0
+    dirty = set(np.unique(assignment[assignment >= 0]).tolist())
+    for round_number in range(max_rounds + 1):
+        overflow = []
+        for day, scenes in _day_groups(assignment, dirty):
+            starts, ends, day_overflow, company_moves[day] = slot_day(inst, scenes, day)
+            start_hours[scenes], end_hours[scenes] = starts, ends
+            overflow.extend(day_overflow)
+        if locked is not None:
+            overflow = [scene for scene in overflow if not locked[scene]]
+        if not overflow or round_number == max_rounds:
+            break
+
+        # Hand the overflow back to the day-level search, never to a day it already
+        # overflowed nor to one before the first open day
+        if state is None:
+            state = ScheduleState(inst, assignment)
+            banned = np.zeros((inst.num_scenes, inst.num_days), dtype=bool)
+            banned[:, :first_open_day] = True
+        dirty = set()
+        origins = {}
+        for scene in overflow:
+            origins[scene] = state.remove(scene)
+            banned[scene, origins[scene]] = True
+            dirty.add(origins[scene])
+        for scene in overflow:
+            allowed = ~banned[scene]
+            # Prefer days whose window still has room for the scene, ignoring changeovers
+            loc = inst.scene_location[scene]
+            window = inst.location_close[loc] - inst.location_open[loc] if loc >= 0 else DAY_END_HOUR - DAY_START_HOUR
+            roomy = allowed & (state.day_hours + inst.durations[scene] <= window)
+            if roomy.any():
+                allowed = roomy
+            day = state.best_day(scene, allowed)[0] if allowed.any() else origins[scene]
+            state.insert(scene, day)
+            dirty.add(day)
+            repaired += day != origins[scene]
+        assignment = state.assignment.copy()
+
+    unslotted = np.flatnonzero((assignment >= 0) & np.isnan(start_hours))
+    if unslotted.size:
+        logging.warning(f"{unslotted.size} scenes could not be fitted into their location's shooting window")
+
+    stats = {
+        'rescheduled_scenes': int(repaired),
+        'unslotted_scenes': int(unslotted.size),
+        'company_moves': int(sum(company_moves.values()))
+    }
+    return assignment, start_hours, end_hours, stats
+
+
+def hours_to_time(shooting_date, hours):
+    """Clock time on shooting_date that is the given number of hours after midnight (rounded to the minute)."""
+    midnight = datetime.datetime.combine(shooting_date, datetime.time(0, 0))
+    return (midnight + datetime.timedelta(minutes=round(hours * 60))).time()
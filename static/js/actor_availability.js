@@ -243,36 +243,30 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
-        // Update each date
-        let updateCount = 0;
-        const totalUpdates = selectedDates.length;
+        // Send every selected date in one request
+        const dates = selectedDates.slice();
+        const data = {
+            actor_ids: [selectedActorId],
+            dates: dates,
+            is_available: isAvailable
+        };
         
-        selectedDates.forEach(date => {
-            // Prepare data
-            const data = {
-                actor_id: selectedActorId,
-                date: date,
-                is_available: isAvailable
-            };
-            
-            // Send AJAX request
-            fetch('/api/actor-availability', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(data),
-            })
-            .then(response => response.json())
-            .then(result => {
-                if (result.success) {
-                    updateCount++;
-                    
-                    // Update local data
-                    if (!availabilityData[selectedActorId]) {
-                        availabilityData[selectedActorId] = {};
-                    }
-                    
+        fetch('/api/actor-availability/bulk', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(data),
+        })
+        .then(response => response.json())
+        .then(result => {
+            if (result.success) {
+                // Update local data
+                if (!availabilityData[selectedActorId]) {
+                    availabilityData[selectedActorId] = {};
+                }
+                
+                dates.forEach(date => {
                     availabilityData[selectedActorId][date] = isAvailable;
                     
                     // Update UI
@@ -280,19 +274,16 @@ document.addEventListener('DOMContentLoaded', function() {
                     if (dateCell) {
                         dateCell.className = isAvailable ? 'available selected' : 'unavailable selected';
                     }
-                    
-                    // Show success message when all updates are done
-                    if (updateCount === totalUpdates) {
-                        showAlert(`Successfully updated availability for ${updateCount} dates.`, 'success');
-                    }
-                } else {
-                    showAlert(`Error updating date ${date}: ${result.message}`, 'danger');
-                }
-            })
-            .catch(error => {
-                console.error('Error:', error);
-                showAlert('Failed to update availability. See console for details.', 'danger');
-            });
+                });
+                
+                showAlert(`Successfully updated availability for ${dates.length} dates.`, 'success');
+            } else {
+                showAlert(`Error updating availability: ${result.message}`, 'danger');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showAlert('Failed to update availability. See console for details.', 'danger');
         });
     }
     
@@ -273,38 +273,32 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         }
         
-        // Update each date
-        let updateCount = 0;
-        const totalUpdates = selectedDates.length;
+        // Send every selected date in one request
+        const dates = selectedDates.slice();
+        const data = {
+            location_ids: [selectedLocationId],
+            dates: dates,
+            is_available: isAvailable,
+            start_time: startTime,
+            end_time: endTime
+        };
         
-        selectedDates.forEach(date => {
-            // Prepare data
-            const data = {
-                location_id: selectedLocationId,
-                date: date,
-                is_available: isAvailable,
-                start_time: startTime,
-                end_time: endTime
-            };
-            
-            // Send AJAX request
-            fetch('/api/location-availability', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(data),
-            })
-            .then(response => response.json())
-            .then(result => {
-                if (result.success) {
-                    updateCount++;
-                    
-                    // Update local data
-                    if (!availabilityData[selectedLocationId]) {
-                        availabilityData[selectedLocationId] = {};
-                    }
-                    
+        fetch('/api/location-availability/bulk', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(data),
+        })
+        .then(response => response.json())
+        .then(result => {
+            if (result.success) {
+                // Update local data
+                if (!availabilityData[selectedLocationId]) {
+                    availabilityData[selectedLocationId] = {};
+                }
+                
+                dates.forEach(date => {
                     availabilityData[selectedLocationId][date] = {
                         is_available: isAvailable,
                         start_time: startTime,
@@ -329,19 +323,16 @@ document.addEventListener('DOMContentLoaded', function() {
                             dateCell.appendChild(timeRangeDiv);
                         }
                     }
-                    
-                    // Show success message when all updates are done
-                    if (updateCount === totalUpdates) {
-                        showAlert(`Successfully updated availability for ${updateCount} dates.`, 'success');
-                    }
-                } else {
-                    showAlert(`Error updating date ${date}: ${result.message}`, 'danger');
-                }
-            })
-            .catch(error => {
-                console.error('Error:', error);
-                showAlert('Failed to update availability. See console for details.', 'danger');
-            });
+                });
+                
+                showAlert(`Successfully updated availability for ${dates.length} dates.`, 'success');
+            } else {
+                showAlert(`Error updating availability: ${result.message}`, 'danger');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showAlert('Failed to update availability. See console for details.', 'danger');
         });
     }
     
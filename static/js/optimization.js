@@ -56,6 +56,16 @@ document.addEventListener('DOMContentLoaded', function() {
                     algorithmDescription.innerHTML = '<strong>Tabu Search</strong>: Uses memory structures to avoid revisiting recent solutions. Good for avoiding local optima in complex problems.';
                 } else if (selectedAlgorithm === 'particle_swarm') {
                     algorithmDescription.innerHTML = '<strong>Particle Swarm Optimization</strong>: Inspired by bird flocking behavior. Balanced approach that works well for many scheduling scenarios.';
+                } else if (selectedAlgorithm === 'large_neighborhood') {
+                    algorithmDescription.innerHTML = '<strong>Large Neighborhood Search</strong>: Destroys and rebuilds whole location blocks, actor clusters or date windows. Best for large projects with hundreds of scenes.';
+                } else if (selectedAlgorithm === 'decomposed') {
+                    algorithmDescription.innerHTML = '<strong>Parallel Decomposition</strong>: Optimizes scene clusters that share no actors or locations in parallel, then merges them. Best for productions with several storylines or a second unit.';
+                } else if (selectedAlgorithm === 'hierarchical') {
+                    algorithmDescription.innerHTML = '<strong>Hierarchical Two-Level</strong>: Assigns location blocks to weeks first, then optimizes the days inside each week in parallel. Best for long shoots spanning several months.';
+                } else if (selectedAlgorithm === 'rolling_horizon') {
+                    algorithmDescription.innerHTML = '<strong>Rolling Horizon</strong>: Keeps the latest approved schedule before the start date, re-plans the next few weeks in detail and places the rest provisionally. Best for daily re-planning during production.';
+                } else if (selectedAlgorithm === 'pareto') {
+                    algorithmDescription.innerHTML = '<strong>NSGA-II Pareto Front</strong>: Finds the whole trade-off between total cost and number of shooting days in one run and saves each option as a candidate schedule. Best when the shoot length is still negotiable.';
                 }
             }
         });
@@ -90,72 +100,107 @@ document.addEventListener('DOMContentLoaded', function() {
                 formDataObj[key] = value;
             });
             
-            // Send API request
-            fetch('/api/optimize-schedule', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(formDataObj),
-            })
-            .then(response => {
-                if (!response.ok) {
-                    if (response.status === 400 || response.status === 500) {
-                        // Try to parse the error response as JSON
-                        return response.text().then(text => {
-                            try {
-                                return { success: false, message: JSON.parse(text).message || 'Server error occurred' };
-                            } catch (e) {
-                                // If parsing fails, return the HTML directly for debugging
-                                console.error("Response is not valid JSON:", text);
-                                return { success: false, message: 'Server returned non-JSON response' };
-                            }
-                        });
-                    }
-                    throw new Error(`Server error: ${response.status}`);
+            submitOptimization(formDataObj);
+        });
+    }
+    
+    // Send the optimization request; while the optimizer is busy the server answers 429
+    // with a ticket, and the request is retried with that ticket to keep its place in the queue
+    function submitOptimization(payload) {
+        fetch('/api/optimize-schedule', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(payload),
+        })
+        .then(response => {
+            if (response.status === 429) {
+                return response.json().then(data => {
+                    showQueuePosition(data);
+                    payload.ticket = data.ticket;
+                    const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 3;
+                    setTimeout(() => submitOptimization(payload), retryAfter * 1000);
+                    return null;
+                });
+            }
+            if (!response.ok) {
+                if (response.status === 400 || response.status === 500) {
+                    // Try to parse the error response as JSON
+                    return response.text().then(text => {
+                        try {
+                            return { success: false, message: JSON.parse(text).message || 'Server error occurred' };
+                        } catch (e) {
+                            // If parsing fails, return the HTML directly for debugging
+                            console.error("Response is not valid JSON:", text);
+                            return { success: false, message: 'Server returned non-JSON response' };
+                        }
+                    });
                 }
-                return response.json();
-            })
-            .then(data => {
-                // Hide loading indicator
-                if (loadingIndicator) {
-                    loadingIndicator.classList.add('d-none');
+                throw new Error(`Server error: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            // Still queued; the retry is already scheduled
+            if (data === null) {
+                return;
+            }
+            
+            // Hide loading indicator
+            if (loadingIndicator) {
+                loadingIndicator.classList.add('d-none');
+            }
+            showQueuePosition(null);
+            
+            if (data.success) {
+                // The expected path for success
+                if (data.redirect_url) {
+                    window.location.href = data.redirect_url;
+                    return;
                 }
-                
-                if (data.success) {
-                    // The expected path for success
-                    if (data.redirect_url) {
-                        window.location.href = data.redirect_url;
-                        return;
-                    }
-                    // Handle both old and new response formats
-                    if (data.result && data.metadata) {
-                        // Old format with separate result and metadata
-                        displaySchedule(data.result, data.metadata);
-                    } else if (data.schedule && data.schedule.scenes) {
-                        // New format with schedule.scenes and schedule.metadata
-                        displaySchedule(data.schedule.scenes, data.schedule.metadata || {});
-                    } else {
-                        console.error("Unexpected data structure:", data);
-                        showAlert('Received unexpected data structure from server', 'warning');
-                    }
+                // Handle both old and new response formats
+                if (data.result && data.metadata) {
+                    // Old format with separate result and metadata
+                    displaySchedule(data.result, data.metadata);
+                } else if (data.schedule && data.schedule.scenes) {
+                    // New format with schedule.scenes and schedule.metadata
+                    displaySchedule(data.schedule.scenes, data.schedule.metadata || {});
                 } else {
-                    showAlert(data.message || 'Optimization failed', 'danger');
+                    console.error("Unexpected data structure:", data);
+                    showAlert('Received unexpected data structure from server', 'warning');
                 }
-            })
-            .catch(error => {
-                console.error('Error during optimization:', error);
-                
-                // Hide loading indicator
-                if (loadingIndicator) {
-                    loadingIndicator.classList.add('d-none');
-                }
-                
-                showAlert('An error occurred during optimization. Please try again or check the console for details.', 'danger');
-            });
+            } else {
+                showAlert(data.message || 'Optimization failed', 'danger');
+            }
+        })
+        .catch(error => {
+            console.error('Error during optimization:', error);
+            
+            // Hide loading indicator
+            if (loadingIndicator) {
+                loadingIndicator.classList.add('d-none');
+            }
+            showQueuePosition(null);
+            
+            showAlert('An error occurred during optimization. Please try again or check the console for details.', 'danger');
         });
     }
     
+    // Show the queue position and estimated wait under the loading spinner (null hides it)
+    function showQueuePosition(status) {
+        const queueStatus = document.getElementById('queue-status');
+        if (!queueStatus) return;
+        
+        if (!status) {
+            queueStatus.classList.add('d-none');
+            return;
+        }
+        const minutes = Math.max(1, Math.round(status.estimated_wait_seconds / 60));
+        queueStatus.textContent = `The optimizer is busy: you are number ${status.position} of ${status.queue_depth} in the queue (about ${minutes} min).`;
+        queueStatus.classList.remove('d-none');
+    }
+    
     // Validate form inputs
     function validateOptimizationForm() {
         let isValid = true;
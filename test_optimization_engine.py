@@ -0,0 +1,322 @@
+import datetime
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from problem_instance import ProblemInstance, ScheduleState, greedy_assignment
+from large_neighborhood_search import large_neighborhood_search, polish_schedule_lns
+from local_search import local_search, polish_schedule_local_search
+from decomposition import find_components, solve_decomposed
+from hierarchical_optimizer import split_weeks, solve_hierarchical
+from rolling_horizon import solve_rolling_horizon
+from pareto_front import pareto_search
+from scenario_engine import apply_edits, run_scenarios
+from sensitivity import sensitivity_report
+from rng_streams import make_rng, spawn_seeds
+from slotting import slot_schedule, SCENE_GAP_HOURS
+from headless_optimizer import run_algorithm
+from instance_solvers import solve_many
+from shared_instance import SharedInstances, attach
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+
+def create_sample_instance(num_scenes=60, num_actors=12, num_locations=6, num_days=30, seed=7):
+    """Create a random problem instance for testing the optimization engine."""
+    rng = np.random.default_rng(seed)
+    start_date = datetime.date(2025, 1, 6)
+
+    incidence = np.zeros((num_scenes, num_actors), dtype=bool)
+    for scene in range(num_scenes):
+        cast = rng.choice(num_actors, size=rng.integers(1, 4), replace=False)
+        incidence[scene, cast] = True
+
+    return ProblemInstance(
+        scene_ids=np.arange(1, num_scenes + 1),
+        actor_ids=np.arange(1, num_actors + 1),
+        location_ids=np.arange(1, num_locations + 1),
+        dates=[start_date + datetime.timedelta(days=i) for i in range(num_days)],
+        scene_location=rng.integers(0, num_locations, size=num_scenes),
+        incidence=incidence,
+        actor_cost=rng.uniform(500, 5000, size=num_actors),
+        location_cost=rng.uniform(500, 4000, size=num_locations),
+        actor_available=rng.random((num_actors, num_days)) < 0.8,
+        location_available=rng.random((num_locations, num_days)) < 0.85,
+        durations=rng.uniform(0.5, 3.0, size=num_scenes),
+        priorities=rng.integers(1, 11, size=num_scenes)
+    )
+
+
+def test_delta_kernels():
+    """Incremental move deltas must match a full re-evaluation."""
+    instance = create_sample_instance()
+    state = ScheduleState(instance, greedy_assignment(instance))
+    rng = np.random.default_rng(0)
+
+    for _ in range(500):
+        scene = int(rng.integers(instance.num_scenes))
+        day = int(rng.integers(instance.num_days))
+        delta = state.move_delta(scene, day)
+        before = instance.evaluate(state.assignment)
+        state.move(scene, day)
+        assert abs(instance.evaluate(state.assignment) - before - delta) < 1e-6
+
+    assert abs(state.cost - instance.evaluate(state.assignment)) < 1e-6
+    logging.info("Delta kernels agree with full evaluation")
+
+
+def test_large_neighborhood_search():
+    """LNS must never return a schedule worse than its starting point."""
+    instance = create_sample_instance()
+    start = greedy_assignment(instance)
+    best, stats = large_neighborhood_search(instance, start, time_limit=2.0, rng=np.random.default_rng(1))
+
+    assert (best >= 0).all()
+    assert stats['best_cost'] <= instance.evaluate(start) + 1e-6
+    logging.info(f"LNS: {stats['initial_cost']:.2f} -> {stats['best_cost']:.2f} in {stats['iterations']} iterations")
+
+
+def test_local_search_polish():
+    """Local search must reach a local optimum no worse than its input; polishing must keep the metadata."""
+    instance = create_sample_instance()
+    start = greedy_assignment(instance)
+    polished, stats = local_search(instance, start, time_limit=5.0, rng=np.random.default_rng(2))
+
+    assert stats['best_cost'] <= instance.evaluate(start) + 1e-6
+    assert abs(stats['best_cost'] - instance.evaluate(polished)) < 1e-6
+    logging.info(f"Local search removed {stats['initial_cost'] - stats['best_cost']:.2f} with moves {stats['moves']}")
+
+    # Polishing another run's result keeps that run's metadata
+    result = instance.build_result(start, 'Greedy Insertion', {'search': {'best_cost': 1.0}, 'seed': 3})
+    for polish in (polish_schedule_local_search, polish_schedule_lns):
+        metadata = polish(result, instance, time_limit=1.0, seed=2)['metadata']
+        assert metadata['search'] == {'best_cost': 1.0} and metadata['seed'] == 3
+        assert metadata['objective'] <= result['metadata']['objective'] + 1e-6
+
+
+def test_decomposition():
+    """Scenes sharing no actors or locations must land in separate components."""
+    instance = create_sample_instance(num_scenes=40, num_actors=8, num_locations=4)
+    # Split the cast and locations into two disjoint storylines
+    second = np.arange(instance.num_scenes) >= 20
+    instance.incidence[:20, 4:] = False
+    instance.incidence[20:, :4] = False
+    instance.incidence[second & ~instance.incidence[:, 4:].any(axis=1), 4] = True
+    instance.incidence[~second & ~instance.incidence[:, :4].any(axis=1), 0] = True
+    instance.scene_location = np.where(second, 2 + instance.scene_location % 2, instance.scene_location % 2)
+    instance._compile()
+
+    components = find_components(instance)
+    assert sorted(len(component) for component in components) == [20, 20]
+
+    assignment, stats = solve_decomposed(instance, time_limit=2.0, seed=3, max_workers=1)
+    assert (assignment >= 0).all()
+    assert abs(stats['best_cost'] - instance.evaluate(assignment)) < 1e-6
+    logging.info(f"Decomposition: {stats['components']} components, cost {stats['best_cost']:.2f}")
+
+
+def test_hierarchical():
+    """Every scene must land inside the horizon, and weeks must cover it exactly."""
+    instance = create_sample_instance(num_scenes=120, num_actors=15, num_locations=8, num_days=45)
+    weeks = split_weeks(instance.num_days)
+    assert np.array_equal(np.concatenate(weeks), np.arange(instance.num_days))
+
+    assignment, stats = solve_hierarchical(instance, time_limit=3.0, seed=4, max_workers=1)
+    assert ((assignment >= 0) & (assignment < instance.num_days)).all()
+    assert abs(stats['best_cost'] - instance.evaluate(assignment)) < 1e-6
+    logging.info(f"Hierarchical: {stats['blocks']} blocks over {stats['weeks']} weeks, cost {stats['best_cost']:.2f}")
+
+
+def test_rolling_horizon():
+    """Scenes before the cutoff must keep their day; everything else must be re-planned after it."""
+    instance = create_sample_instance(num_days=40)
+    base = greedy_assignment(instance)
+    cutoff = 10
+
+    assignment, stats = solve_rolling_horizon(instance, base, cutoff=cutoff, window_days=14, time_limit=2.0, seed=5)
+    locked = base < cutoff
+    assert (assignment[locked] == base[locked]).all()
+    assert (assignment[~locked] >= cutoff).all()
+    assert stats['locked_scenes'] == int(locked.sum())
+    logging.info(f"Rolling horizon: {stats['locked_scenes']} locked, firm until {stats['firm_until']}")
+
+
+def test_rolling_horizon_slotting():
+    """Slotting a re-planned schedule must neither move locked scenes nor put others before the cutoff."""
+    instance = create_sample_instance(num_days=40)
+    instance.location_open[:] = 9.0
+    instance.location_close[:] = 16.0
+    cutoff = 10
+    # Locked scenes crowd the two days before the cutoff and the rest the cutoff day, so all three overflow
+    base = np.full(instance.num_scenes, cutoff, dtype=np.int64)
+    base[:10] = cutoff - 2
+    base[10:20] = cutoff - 1
+    locked = base < cutoff
+
+    assignment, starts, ends, stats = slot_schedule(instance, base, locked=locked, first_open_day=cutoff)
+    assert (assignment[locked] == base[locked]).all()
+    assert (assignment[~locked] >= cutoff).all()
+    assert stats['rescheduled_scenes'] > 0 and np.isnan(starts[locked]).any()
+
+    assignment, _ = solve_rolling_horizon(instance, base, cutoff=cutoff, window_days=14, time_limit=1.0, seed=5)
+    result = instance.build_result(assignment, 'Rolling Horizon (RHBM)', locked=locked, first_open_day=cutoff)
+    for i, scene_id in enumerate(instance.scene_ids):
+        shooting_date = result['schedule'][int(scene_id)]['shooting_date']
+        if locked[i]:
+            assert shooting_date == instance.dates[base[i]]
+        else:
+            assert shooting_date >= instance.dates[cutoff]
+    logging.info(f"Rolling horizon slotting: {stats}")
+
+
+def test_pareto_front():
+    """Population evaluation must match cost_breakdown, and the front must be mutually non-dominated."""
+    instance = create_sample_instance()
+    rng = np.random.default_rng(6)
+    population = np.array([greedy_assignment(instance, rng) for _ in range(4)])
+    scores = instance.evaluate_population(population)
+    for i, assignment in enumerate(population):
+        assert abs(scores['objective'][i] - instance.evaluate(assignment)) < 1e-6
+
+    front, objectives, stats = pareto_search(instance, time_limit=2.0, rng=rng)
+    for a in objectives:
+        for b in objectives:
+            assert not ((a <= b).all() and (a < b).any())
+    assert (np.diff(objectives[:, 1]) > 0).all() and (np.diff(objectives[:, 0]) < 0).all()
+    logging.info(f"Pareto front: {stats['front_size']} schedules after {stats['generations']} generations")
+
+
+def test_what_if_scenarios():
+    """Edited instances must match a full recompile and leave the original untouched."""
+    instance = create_sample_instance()
+    original_available = instance.actor_available.copy()
+    edits = [
+        {'type': 'actor_unavailable', 'actor_id': 1, 'start_date': '2025-01-10', 'end_date': '2025-01-20'},
+        {'type': 'location_available', 'location_id': 2},
+        {'type': 'actor_cost', 'actor_id': 3, 'factor': 1.5}
+    ]
+    scenario = apply_edits(instance, edits)
+    recompiled = ProblemInstance(
+        scenario.scene_ids, scenario.actor_ids, scenario.location_ids, scenario.dates, scenario.scene_location,
+        scenario.incidence, scenario.actor_cost, scenario.location_cost, scenario.actor_available,
+        scenario.location_available, scenario.durations, scenario.priorities
+    )
+    assert (scenario.conflicts == recompiled.conflicts).all()
+    assert (instance.actor_available == original_available).all()
+
+    baseline = greedy_assignment(instance)
+    rows = run_scenarios(instance, [{'name': 'Edited', 'edits': edits}], baseline)
+    assert rows[0]['name'] == 'Baseline' and rows[1]['scenes_moved'] == 0
+    logging.info(f"What-if: objective change {rows[1]['objective_change']:.2f}")
+
+
+def test_sensitivity_report():
+    """The all-scenes delta matrix must match the per-scene kernel, and reported savings must be real."""
+    instance = create_sample_instance()
+    state = ScheduleState(instance, greedy_assignment(instance))
+    matrix = state.move_delta_matrix()
+    for scene in range(instance.num_scenes):
+        assert np.allclose(matrix[scene], state.move_deltas(scene))
+
+    report = sensitivity_report(instance, state.assignment)
+    for move in report['moves']:
+        scene = int(np.flatnonzero(instance.scene_ids == move['scene_id'])[0])
+        day = instance.date_index[datetime.date.fromisoformat(move['to_date'])]
+        assert abs(state.move_delta(scene, day) + move['saving']) < 1e-6
+    assert sum(row['share'] for row in report['actors']) <= 1.0
+    logging.info(f"Sensitivity: {len(report['blocked_dates'])} blocked dates, {len(report['moves'])} improving moves")
+
+
+def test_reproducible_runs():
+    """The same seed must reproduce a run, and spawned sub-streams must differ from each other."""
+    instance = create_sample_instance()
+    # An iteration cap instead of a tight time limit keeps the run independent of machine speed
+    first, _ = large_neighborhood_search(instance, time_limit=60, max_iterations=200, rng=make_rng(1234))
+    second, _ = large_neighborhood_search(instance, time_limit=60, max_iterations=200, rng=make_rng(1234))
+    assert np.array_equal(first, second)
+
+    children = spawn_seeds(1234, 2)
+    assert make_rng(children[0]).random() != make_rng(children[1]).random()
+    # A spawned child can be split again without repeating its parent's streams
+    grandchildren = spawn_seeds(children[0], 2)
+    assert make_rng(grandchildren[0]).random() != make_rng(children[0]).random()
+    logging.info("Seeded runs reproduce")
+
+
+def test_intraday_slotting():
+    """Slotted scenes must sit inside their location's window without overlapping; overflow must move."""
+    instance = create_sample_instance()
+    # Short windows, so a full 12 hour day no longer fits
+    instance.location_open[:] = 9.0
+    instance.location_close[:] = 16.0
+    assignment, starts, ends, stats = slot_schedule(instance, greedy_assignment(instance))
+
+    slotted = np.flatnonzero(~np.isnan(starts))
+    locs = instance.scene_location[slotted]
+    days = assignment[slotted]
+    assert (starts[slotted] >= instance.location_open[locs, days] - 1e-9).all()
+    assert (ends[slotted] <= instance.location_close[locs, days] + 1e-9).all()
+    for day in np.unique(days):
+        on_day = slotted[days == day]
+        order = on_day[np.argsort(starts[on_day])]
+        assert (starts[order[1:]] - ends[order[:-1]] >= SCENE_GAP_HOURS - 1e-9).all()
+    assert stats['rescheduled_scenes'] > 0
+    assert stats['unslotted_scenes'] == len(assignment) - len(slotted)
+    logging.info(f"Slotting: {stats}")
+
+
+def test_instance_round_trip():
+    """Saved instances must load back unchanged in both formats and run headless."""
+    instance = create_sample_instance()
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('instance.json', 'instance.npz'):
+            path = os.path.join(directory, name)
+            instance.save(path)
+            loaded = ProblemInstance.load(path)
+            assert loaded.fingerprint() == instance.fingerprint()
+            assert loaded.dates == instance.dates
+
+    report = run_algorithm(loaded, 'greedy', time_limit=1, seeds=[1, 2])
+    assert [run['seed'] for run in report['runs']] == [1, 2]
+    best = min(report['runs'], key=lambda run: run['objective'])
+    assert report['best_seed'] == best['seed']
+    assert report['result']['metadata']['seed'] == best['seed']
+    logging.info(f"Round trip: {len(report['result']['schedule'])} scheduled days")
+
+
+def test_shared_instances():
+    """Workers must see the same instance over shared memory and solve it exactly as in-process."""
+    instance = create_sample_instance()
+    with SharedInstances([instance, instance]) as shared:
+        attached = attach(shared.handle)
+        assert all(copy.fingerprint() == instance.fingerprint() for copy in attached)
+        assert np.array_equal(attached[0].conflicts, instance.conflicts)
+        assert not attached[0].incidence.flags.writeable
+        del attached
+
+    sub_instances = [instance.subset(np.arange(start, start + 20)) for start in (0, 20, 40)]
+    sequential = solve_many(sub_instances, 'greedy', [1] * 3, [1, 2, 3], max_workers=1)
+    pooled = solve_many(sub_instances, 'greedy', [1] * 3, [1, 2, 3], max_workers=2)
+    for (expected, _), (actual, _) in zip(sequential, pooled):
+        assert np.array_equal(expected, actual)
+    logging.info("Shared-memory workers match in-process solves")
+
+
+if __name__ == "__main__":
+    test_delta_kernels()
+    test_large_neighborhood_search()
+    test_local_search_polish()
+    test_decomposition()
+    test_hierarchical()
+    test_rolling_horizon()
+    test_rolling_horizon_slotting()
+    test_pareto_front()
+    test_what_if_scenarios()
+    test_sensitivity_report()
+    test_reproducible_runs()
+    test_intraday_slotting()
+    test_instance_round_trip()
+    test_shared_instances()
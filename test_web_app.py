@@ -0,0 +1,662 @@
+import datetime
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+# app.py reads DATABASE_URL when it is imported: point it at a throwaway SQLite file first
+_database_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+
+from flask import g
+from flask_login import login_user
+from sqlalchemy import event
+
+from app import app, db
+from models import (
+    User, Project, ProjectAccess, Scene, Actor, Location, ActorScene, Schedule, ScheduledScene,
+    ActorBooking, ActorAvailability, ActorAvailabilityRange, LocationAvailabilityRange, CallSheet,
+    Notification, OptimizationSlot, OptimizationTicket, SchemaMigration, Role, ScheduleStatus, TicketStatus
+)
+from create_sample_screenplay import create_sample_screenplay_for_project
+from utils import (
+    get_current_project, set_current_project, get_optimization_inputs, load_problem_instance, add_scheduled_scenes
+)
+from utils_json import convert_datetime_to_strings
+from problem_instance import greedy_assignment
+from booking_index import find_double_bookings, refresh_identity
+from nightly_reoptimize import find_stale_projects, run_batch
+from admission import request_slot, release, MAX_CONCURRENT_OPTIMIZATIONS, RETRY_AFTER_SECONDS
+from availability_store import encode_runs, set_actor_availability, set_location_availability, migrate_day_rows
+from migrations import MIGRATIONS, run_migrations, check_indexes
+from call_sheets import call_sheets
+from notifications import add_notifications, mark_read, unread_summary
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+PASSWORD = 'password'
+
+
+def create_user(username, role=Role.DIRECTOR):
+    """Create a user who can log in with PASSWORD; returns their id."""
+    with app.app_context():
+        user = User(username=username, email=f'{username}@example.com', role=role)
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def create_sample_project(username, role=Role.DIRECTOR):
+    """Create a user and a project of theirs holding the sample screenplay; returns (user_id, project_id)."""
+    user_id = create_user(username, role)
+    with app.app_context():
+        project = Project(name=f'{username} project', creator_id=user_id)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add(ProjectAccess(project_id=project.id, user_id=user_id, role=role))
+        db.session.commit()
+        create_sample_screenplay_for_project(project.id)
+        return user_id, project.id
+
+
+def add_member(project_id, username, role):
+    """Create a user with access to a project; returns their id."""
+    user_id = create_user(username, role)
+    with app.app_context():
+        db.session.add(ProjectAccess(project_id=project_id, user_id=user_id, role=role))
+        db.session.commit()
+    return user_id
+
+
+def login(username):
+    """A test client logged in as the user."""
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': PASSWORD})
+    assert response.status_code == 302
+    return client
+
+
+def create_schedule(project_id, start_date, status=ScheduleStatus.DRAFT, scenes_per_day=2, scene_limit=None):
+    """
+    Save a schedule shooting a project's scenes in id order, scenes_per_day a day (needs an app context).
+
+    Returns:
+        The new schedule's id
+    """
+    scenes = Scene.query.filter_by(project_id=project_id).order_by(Scene.id).all()[:scene_limit]
+    schedule = Schedule(
+        project_id=project_id,
+        name=f'Schedule from {start_date}',
+        created_by=db.session.get(Project, project_id).creator_id,
+        total_cost=1000.0 * len(scenes),
+        total_duration=(len(scenes) + scenes_per_day - 1) // scenes_per_day,
+        status=status,
+        approved_at=datetime.datetime.utcnow() if status == ScheduleStatus.APPROVED else None
+    )
+    db.session.add(schedule)
+    db.session.flush()
+    add_scheduled_scenes(schedule.id, {
+        scene.id: {
+            'scene_id': scene.id,
+            'shooting_date': start_date + datetime.timedelta(days=i // scenes_per_day),
+            'start_time': datetime.time(8 + 3 * (i % scenes_per_day)),
+            'end_time': datetime.time(10 + 3 * (i % scenes_per_day)),
+            'estimated_cost': 1000.0
+        }
+        for i, scene in enumerate(scenes)
+    })
+    db.session.commit()
+    return schedule.id
+
+
+def optimize(client, start_date, algorithm='large_neighborhood', **options):
+    """Run the optimize API for the client's current project with extra request fields; returns the new schedule's id."""
+    response = client.post('/api/optimize-schedule', json={
+        'start_date': start_date.strftime('%Y-%m-%d'), 'algorithm': algorithm, 'seed': 1, **options
+    })
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['schedule_id']
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements run inside the block (needs an app context); yields the list."""
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def test_pareto_run_is_not_polished():
+    """A Pareto run asked to be polished must keep its knee schedule and save the rest of its front."""
+    _, project_id = create_sample_project('pareto_polish')
+    client = login('pareto_polish')
+    schedule_id = optimize(client, datetime.date(2030, 9, 2), algorithm='pareto', polish='local_search')
+
+    with app.app_context():
+        schedule = db.session.get(Schedule, schedule_id)
+        assert schedule.algorithm_used == 'NSGABM'
+        candidates = Schedule.query.filter_by(parent_schedule_id=schedule_id, status=ScheduleStatus.CANDIDATE).all()
+        assert candidates
+        for candidate in candidates:
+            assert ScheduledScene.query.filter_by(schedule_id=candidate.id).count() == \
+                Scene.query.filter_by(project_id=project_id).count()
+    logging.info(f"Pareto run with polish requested: {len(candidates)} candidate schedules")
+
+
+def test_double_booking_index():
+    """An actor another project's approved schedule books on the same day must be flagged and blocked."""
+    _, first_project = create_sample_project('booking_first')
+    _, second_project = create_sample_project('booking_second')
+    start_date = datetime.date(2031, 3, 3)
+
+    with app.app_context():
+        approved = create_schedule(first_project, start_date, status=ScheduleStatus.APPROVED)
+        draft = create_schedule(second_project, start_date)
+
+        # One booking per actor and shooting day, however many of their scenes fall on it
+        bookings = db.session.query(ActorBooking.actor_id, ActorBooking.date).filter_by(schedule_id=approved).all()
+        cast_days = db.session.query(ActorScene.actor_id, ScheduledScene.shooting_date).join(
+            ScheduledScene, ScheduledScene.scene_id == ActorScene.scene_id
+        ).filter(ScheduledScene.schedule_id == approved).distinct().all()
+        assert sorted(bookings) == sorted(cast_days)
+
+        # The sample cast shares e-mail addresses across projects, so the same people are double-booked
+        conflicts = find_double_bookings(db.session.get(Schedule, draft))
+        assert conflicts
+        assert {conflict['schedule_id'] for conflict in conflicts} == {approved}
+        assert find_double_bookings(db.session.get(Schedule, approved)) == []
+
+        # ... and unavailable on those days when the second project is optimized
+        actor_availability = get_optimization_inputs(second_project)[3]
+        for conflict in conflicts:
+            assert actor_availability[conflict['actor_id']][conflict['date'].strftime('%Y-%m-%d')] is False
+
+        # A changed e-mail address makes them a different person
+        actor = db.session.get(Actor, conflicts[0]['actor_id'])
+        actor.email = 'someone.else@example.com'
+        refresh_identity(actor)
+        db.session.commit()
+        remaining = find_double_bookings(db.session.get(Schedule, draft))
+        assert actor.id not in {conflict['actor_id'] for conflict in remaining}
+    logging.info(f"Double bookings: {len(conflicts)} found, {len(remaining)} after re-keying one actor")
+
+
+def test_nightly_reoptimization():
+    """Only a project whose inputs changed since its latest schedule gets a nightly draft."""
+    user_id, project_id = create_sample_project('nightly')
+    client = login('nightly')
+    optimize(client, datetime.date.today() + datetime.timedelta(days=7))
+
+    with app.app_context():
+        assert find_stale_projects([project_id]) == []
+
+        actor = Actor.query.filter_by(project_id=project_id).order_by(Actor.id).first()
+        actor.cost_per_day += 1000
+        db.session.commit()
+        assert [job['project_id'] for job in find_stale_projects([project_id])] == [project_id]
+
+        unread_before = db.session.get(User, user_id).unread_notifications
+        summary = run_batch([project_id], cpus=1, time_limit=1, seed=1)
+        assert summary['stale_projects'] == [project_id]
+        assert len(summary['schedule_ids']) == 1 and not summary['failed_projects']
+
+        draft = db.session.get(Schedule, summary['schedule_ids'][0])
+        assert draft.status == ScheduleStatus.DRAFT and draft.seed is not None
+        assert ScheduledScene.query.filter_by(schedule_id=draft.id).count() == \
+            Scene.query.filter_by(project_id=project_id).count()
+        assert db.session.get(User, user_id).unread_notifications == unread_before + 1
+
+        # The draft was optimized over the current inputs
+        assert find_stale_projects([project_id]) == []
+    logging.info(f"Nightly batch: draft schedule {draft.id}")
+
+
+def test_admission_control():
+    """With every optimizer slot taken a request gets a 429 with Retry-After, and keeps its place."""
+    user_id, project_id = create_sample_project('admission')
+    client = login('admission')
+    payload = {'start_date': '2032-01-10', 'algorithm': 'large_neighborhood', 'seed': 1}
+
+    # JSON that is not an object has no ticket; the view answers it with its own 400
+    assert client.post('/api/optimize-schedule', json=[payload]).status_code == 400
+
+    held = []
+    try:
+        with app.app_context():
+            for i in range(MAX_CONCURRENT_OPTIMIZATIONS):
+                ticket, status = request_slot(project_id, create_user(f'admission_holder_{i}'))
+                assert status['admitted']
+                held.append(ticket.id)
+
+        response = client.post('/api/optimize-schedule', json=payload)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == str(RETRY_AFTER_SECONDS)
+        queued = response.get_json()
+        assert queued['queued'] and queued['position'] == 1 and queued['running'] == MAX_CONCURRENT_OPTIMIZATIONS
+
+        # Retrying with the ticket keeps the same place in the queue
+        response = client.post('/api/optimize-schedule', json={**payload, 'ticket': queued['ticket']})
+        assert response.status_code == 429 and response.get_json()['ticket'] == queued['ticket']
+
+        with app.app_context():
+            release(held.pop())
+        response = client.post('/api/optimize-schedule', json={**payload, 'ticket': queued['ticket']})
+        assert response.status_code == 200
+
+        # The finished run gave its slot back
+        with app.app_context():
+            assert OptimizationSlot.query.filter_by(ticket_id=queued['ticket']).count() == 0
+            assert db.session.get(OptimizationTicket, queued['ticket']).status == TicketStatus.DONE
+    finally:
+        with app.app_context():
+            for ticket_id in held:
+                release(ticket_id)
+    logging.info(f"Admission: queued as ticket {queued['ticket']}, admitted once a slot was free")
+
+
+def test_optimization_inputs():
+    """Optimization inputs come from a fixed number of set-based queries and match the stored ranges."""
+    _, project_id = create_sample_project('inputs')
+    start_date = datetime.date(2033, 5, 1)
+
+    with app.app_context():
+        actor_id = Actor.query.filter_by(project_id=project_id).order_by(Actor.id).first().id
+        location_id = Location.query.filter_by(project_id=project_id).order_by(Location.id).first().id
+        set_actor_availability(actor_id, start_date, start_date + datetime.timedelta(days=9), False)
+        set_location_availability(location_id, start_date, start_date, True, datetime.time(9), datetime.time(17))
+        db.session.commit()
+
+        # Scenes, actors, locations, actor ranges, location ranges, bookings elsewhere and cast
+        with count_queries() as statements:
+            scenes, actors, locations, actor_availability, location_availability, actor_scenes = \
+                get_optimization_inputs(project_id)
+        assert len(statements) == 7
+
+        assert all(actor_availability[actor_id][(start_date + datetime.timedelta(days=i)).strftime('%Y-%m-%d')] is False
+                   for i in range(10))
+        assert location_availability[location_id][start_date.strftime('%Y-%m-%d')] == {
+            'is_available': True, 'start_time': '09:00', 'end_time': '17:00'
+        }
+        cast = ActorScene.query.join(Scene, Scene.id == ActorScene.scene_id).filter(Scene.project_id == project_id)
+        assert sum(len(actor_ids) for actor_ids in actor_scenes.values()) == cast.count()
+
+        with count_queries() as statements:
+            instance = load_problem_instance(project_id, start_date, start_date + datetime.timedelta(days=30))
+        assert len(statements) == 7
+        assert instance.num_scenes == len(scenes)
+
+    # The optimize API compiles instance-only runs with the same loader, without ORM entities
+    client = login('inputs')
+    with app.app_context(), count_queries() as statements:
+        optimize(client, start_date)
+    assert not any('scene.page_number' in statement for statement in statements)
+    logging.info(f"Optimization inputs: {len(scenes)} scenes in 7 queries")
+
+
+def test_availability_ranges():
+    """Availability is stored as merged runs of equal days; per-day rows of earlier versions fold into them."""
+    day = datetime.timedelta(days=1)
+    start_date = datetime.date(2034, 1, 1)
+    assert encode_runs({start_date: True, start_date + day: True, start_date + 3 * day: True}) == [
+        (start_date, start_date + day, True), (start_date + 3 * day, start_date + 3 * day, True)
+    ]
+
+    _, project_id = create_sample_project('ranges')
+    with app.app_context():
+        actor_id = Actor.query.filter_by(project_id=project_id).order_by(Actor.id).first().id
+        location_id = Location.query.filter_by(project_id=project_id).order_by(Location.id).first().id
+
+        def actor_ranges():
+            return db.session.query(
+                ActorAvailabilityRange.start_date, ActorAvailabilityRange.end_date, ActorAvailabilityRange.is_available
+            ).filter(
+                ActorAvailabilityRange.actor_id == actor_id, ActorAvailabilityRange.start_date >= start_date
+            ).order_by(ActorAvailabilityRange.start_date).all()
+
+        set_actor_availability(actor_id, start_date, start_date + 9 * day, False)
+        db.session.commit()
+        assert actor_ranges() == [(start_date, start_date + 9 * day, False)]
+
+        # A day in the middle splits the run, and setting it back merges it again
+        set_actor_availability(actor_id, start_date + 4 * day, start_date + 4 * day, True)
+        db.session.commit()
+        assert actor_ranges() == [
+            (start_date, start_date + 3 * day, False),
+            (start_date + 4 * day, start_date + 4 * day, True),
+            (start_date + 5 * day, start_date + 9 * day, False)
+        ]
+        set_actor_availability(actor_id, start_date + 4 * day, start_date + 4 * day, False)
+        set_actor_availability(actor_id, start_date + 10 * day, start_date + 12 * day, False)
+        db.session.commit()
+        assert actor_ranges() == [(start_date, start_date + 12 * day, False)]
+
+        # Different opening hours are different runs
+        set_location_availability(location_id, start_date, start_date + day, True, datetime.time(8), datetime.time(18))
+        set_location_availability(location_id, start_date + 2 * day, start_date + 3 * day, True,
+                                  datetime.time(10), datetime.time(16))
+        db.session.commit()
+        assert LocationAvailabilityRange.query.filter(
+            LocationAvailabilityRange.location_id == location_id, LocationAvailabilityRange.start_date >= start_date
+        ).count() == 2
+
+        # Per-day rows written by earlier versions
+        for i in range(20, 23):
+            db.session.add(ActorAvailability(actor_id=actor_id, date=start_date + i * day, is_available=True))
+        db.session.commit()
+        migrate_day_rows()
+        assert ActorAvailability.query.count() == 0
+        assert actor_ranges()[-1] == (start_date + 20 * day, start_date + 22 * day, True)
+    logging.info("Availability ranges split, merge and absorb per-day rows")
+
+
+def test_bulk_availability_api():
+    """Bulk updates upsert ranges in one request; later updates win and repeating a request changes nothing."""
+    _, project_id = create_sample_project('bulk_availability')
+    _, other_project = create_sample_project('bulk_availability_other')
+    client = login('bulk_availability')
+
+    with app.app_context():
+        actor_ids = [actor.id for actor in Actor.query.filter_by(project_id=project_id).order_by(Actor.id).limit(2)]
+        location_id = Location.query.filter_by(project_id=project_id).order_by(Location.id).first().id
+        other_actor_id = Actor.query.filter_by(project_id=other_project).first().id
+
+    payload = {'updates': [
+        {'actor_ids': actor_ids, 'start_date': '2035-02-01', 'end_date': '2035-02-28', 'is_available': False},
+        {'actor_id': actor_ids[0], 'dates': ['2035-02-14'], 'is_available': True}
+    ]}
+
+    def stored_ranges():
+        with app.app_context():
+            return db.session.query(
+                ActorAvailabilityRange.id, ActorAvailabilityRange.actor_id, ActorAvailabilityRange.start_date,
+                ActorAvailabilityRange.end_date, ActorAvailabilityRange.is_available
+            ).filter(
+                ActorAvailabilityRange.actor_id.in_(actor_ids),
+                ActorAvailabilityRange.start_date >= datetime.date(2035, 1, 1)
+            ).order_by(ActorAvailabilityRange.actor_id, ActorAvailabilityRange.start_date).all()
+
+    response = client.post('/api/actor-availability/bulk', json=payload)
+    assert response.status_code == 200
+    assert response.get_json()['actors'] == 2 and response.get_json()['days'] == 56
+    ranges = stored_ranges()
+    assert [row[1:] for row in ranges] == [
+        (actor_ids[0], datetime.date(2035, 2, 1), datetime.date(2035, 2, 13), False),
+        (actor_ids[0], datetime.date(2035, 2, 14), datetime.date(2035, 2, 14), True),
+        (actor_ids[0], datetime.date(2035, 2, 15), datetime.date(2035, 2, 28), False),
+        (actor_ids[1], datetime.date(2035, 2, 1), datetime.date(2035, 2, 28), False)
+    ]
+
+    # Upserted in place: the same rows, ids included
+    assert client.post('/api/actor-availability/bulk', json=payload).status_code == 200
+    assert stored_ranges() == ranges
+
+    response = client.post('/api/location-availability/bulk', json={
+        'location_ids': [location_id], 'start_date': '2035-02-01', 'end_date': '2035-02-07',
+        'start_time': '07:00', 'end_time': '19:00'
+    })
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.query(
+            LocationAvailabilityRange.start_date, LocationAvailabilityRange.end_date,
+            LocationAvailabilityRange.start_time, LocationAvailabilityRange.end_time
+        ).filter(
+            LocationAvailabilityRange.location_id == location_id,
+            LocationAvailabilityRange.start_date >= datetime.date(2035, 1, 1)
+        ).all() == [(datetime.date(2035, 2, 1), datetime.date(2035, 2, 7), datetime.time(7), datetime.time(19))]
+
+    for invalid in (
+            {'actor_ids': [other_actor_id], 'dates': ['2035-02-01']},
+            {'actor_ids': actor_ids, 'start_date': '2035-02-10', 'end_date': '2035-02-01'},
+            {'actor_ids': actor_ids, 'start_date': '2035-01-01', 'end_date': '2036-12-31'},
+            {'actor_ids': actor_ids}):
+        response = client.post('/api/actor-availability/bulk', json=invalid)
+        assert response.status_code == 400, invalid
+    assert stored_ranges() == ranges
+    logging.info(f"Bulk availability: {len(ranges)} ranges upserted")
+
+
+def test_migrations_and_indexes():
+    """Migrations are applied once, and every hot query is served by an index."""
+    with app.app_context():
+        assert run_migrations() == []
+        assert {migration_id for migration_id, in db.session.query(SchemaMigration.id)} == \
+            {migration_id for migration_id, _, _ in MIGRATIONS}
+        for name, uses_index, lines in check_indexes():
+            assert uses_index, f"{name}: {lines}"
+    logging.info(f"Migrations: {len(MIGRATIONS)} applied, hot queries indexed")
+
+
+def test_schedule_view_queries():
+    """The schedule page costs the same number of queries whatever the number of scenes."""
+    _, project_id = create_sample_project('schedule_view')
+    client = login('schedule_view')
+
+    with app.app_context():
+        small = create_schedule(project_id, datetime.date(2036, 4, 1), scene_limit=2)
+        large = create_schedule(project_id, datetime.date(2036, 4, 1))
+
+    # The first page of a session also picks the current project
+    assert client.get(f'/schedule/{small}').status_code == 200
+
+    counts = []
+    for schedule_id in (small, large):
+        with app.app_context(), count_queries() as statements:
+            response = client.get(f'/schedule/{schedule_id}')
+        assert response.status_code == 200
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+    logging.info(f"Schedule view: {counts[1]} queries")
+
+
+def test_call_sheets():
+    """Every shooting day has one stored call sheet, each actor called for their first scene of the day."""
+    _, project_id = create_sample_project('call_sheets')
+    client = login('call_sheets')
+
+    with app.app_context():
+        schedule_id = create_schedule(project_id, datetime.date(2037, 6, 1))
+        sheets = call_sheets(schedule_id)
+        rows = ScheduledScene.query.filter_by(schedule_id=schedule_id).all()
+        assert [sheet['date'] for sheet in sheets] == sorted({row.shooting_date.strftime('%Y-%m-%d') for row in rows})
+        assert CallSheet.query.filter_by(schedule_id=schedule_id).count() == len(sheets)
+
+        for sheet in sheets:
+            day_rows = [row for row in rows if row.shooting_date.strftime('%Y-%m-%d') == sheet['date']]
+            starts = {row.scene_id: row.start_time for row in day_rows}
+            assert [scene['scene_id'] for scene in sheet['scenes']] == sorted(starts, key=lambda scene_id: starts[scene_id])
+            assert sheet['cost'] == sum(row.estimated_cost for row in day_rows)
+            for call in sheet['calls']:
+                scene_ids = [scene_id for scene_id, in db.session.query(ActorScene.scene_id).filter(
+                    ActorScene.actor_id == call['actor_id'], ActorScene.scene_id.in_(starts))]
+                assert call['call_time'] == min(starts[scene_id] for scene_id in scene_ids).strftime('%H:%M')
+
+    response = client.get(f'/api/schedule/{schedule_id}/call-sheets?date=2037-06-01')
+    assert response.status_code == 200
+    assert [sheet['date'] for sheet in response.get_json()['call_sheets']] == ['2037-06-01']
+    assert client.get(f'/schedule/{schedule_id}/call-sheet?date=2037-06-01').status_code == 200
+
+    create_user('call_sheets_outsider')
+    assert login('call_sheets_outsider').get(f'/api/schedule/{schedule_id}/call-sheets').status_code == 403
+    logging.info(f"Call sheets: {len(sheets)} days")
+
+
+def test_bulk_scheduled_scenes():
+    """A schedule's rows are written in one INSERT, from typed optimizer results and JSON strings alike."""
+    _, project_id = create_sample_project('bulk_scenes')
+    start_date = datetime.date(2038, 7, 1)
+
+    with app.app_context():
+        # Optimizer results carry dates and times until they are serialized
+        instance = load_problem_instance(project_id, start_date)
+        result = instance.build_result(greedy_assignment(instance), 'Greedy')
+        scene_data = next(iter(result['schedule'].values()))
+        assert isinstance(scene_data['shooting_date'], datetime.date)
+        assert scene_data['start_time'] is None or isinstance(scene_data['start_time'], datetime.time)
+
+        typed = result['schedule']
+        schedule_ids = []
+        for optimal_schedule in (typed, convert_datetime_to_strings(typed)):
+            schedule = Schedule(project_id=project_id, name='Bulk', created_by=1, total_cost=0)
+            db.session.add(schedule)
+            db.session.flush()
+            with count_queries() as statements:
+                add_scheduled_scenes(schedule.id, optimal_schedule)
+            assert sum(statement.startswith('INSERT INTO scheduled_scene') for statement in statements) == 1
+            db.session.commit()
+            schedule_ids.append(schedule.id)
+
+        rows = [sorted(db.session.query(
+            ScheduledScene.scene_id, ScheduledScene.shooting_date, ScheduledScene.start_time,
+            ScheduledScene.end_time, ScheduledScene.estimated_cost
+        ).filter_by(schedule_id=schedule_id)) for schedule_id in schedule_ids]
+        assert rows[0] == rows[1] and len(rows[0]) == len(typed)
+
+        # Bookings and call sheets are written with the rows
+        for schedule_id in schedule_ids:
+            assert ActorBooking.query.filter_by(schedule_id=schedule_id).count() > 0
+            assert CallSheet.query.filter_by(schedule_id=schedule_id).count() == len({row[1] for row in rows[0]})
+    logging.info(f"Bulk insert: {len(rows[0])} scheduled scenes per schedule")
+
+
+def test_approval_notifications():
+    """Approving a schedule notifies the team (but not the approver) and every cast actor in one INSERT."""
+    director_id, project_id = create_sample_project('approval')
+    member_id = add_member(project_id, 'approval_member', Role.PRODUCTION_MANAGER)
+    client = login('approval')
+
+    with app.app_context():
+        schedule_id = create_schedule(project_id, datetime.date(2039, 8, 1))
+        cast = {actor_id for actor_id, in db.session.query(ActorScene.actor_id).join(
+            ScheduledScene, ScheduledScene.scene_id == ActorScene.scene_id
+        ).filter(ScheduledScene.schedule_id == schedule_id).distinct()}
+        unread_before = {user.id: user.unread_notifications or 0 for user in User.query.filter(
+            User.id.in_([director_id, member_id]))}
+
+        with count_queries() as statements:
+            response = client.post(f'/schedule/{schedule_id}/approve')
+    assert response.status_code == 302
+    assert sum(statement.startswith('INSERT INTO notification') for statement in statements) == 1
+
+    with app.app_context():
+        assert db.session.get(Schedule, schedule_id).status == ScheduleStatus.APPROVED
+        notifications = Notification.query.filter_by(schedule_id=schedule_id).all()
+        assert [notification.recipient_id for notification in notifications if notification.recipient_id] == [member_id]
+        assert sorted(notification.actor_id for notification in notifications if notification.actor_id) == sorted(cast)
+        assert db.session.get(User, member_id).unread_notifications == unread_before[member_id] + 1
+        assert db.session.get(User, director_id).unread_notifications == unread_before[director_id]
+    logging.info(f"Approval: {len(notifications)} notifications")
+
+
+def test_notification_paging():
+    """Keyset pages return every notification once, newest first, and marking read keeps the counter exact."""
+    user_id, project_id = create_sample_project('paging')
+    client = login('paging')
+
+    with app.app_context():
+        schedule_id = create_schedule(project_id, datetime.date(2040, 1, 1), scene_limit=1)
+        # Five notifications share each timestamp, so the id has to break ties
+        created_at = datetime.datetime(2040, 1, 1, 12)
+        add_notifications([{
+            'schedule_id': schedule_id,
+            'recipient_id': user_id,
+            'message': f'Notification {i}',
+            'created_at': created_at + datetime.timedelta(seconds=i // 5)
+        } for i in range(45)])
+        db.session.commit()
+        newest_first = [notification_id for notification_id, in db.session.query(Notification.id).filter_by(
+            recipient_id=user_id).order_by(Notification.created_at.desc(), Notification.id.desc())]
+        assert db.session.get(User, user_id).unread_notifications == 45
+
+    seen = []
+    page_sizes = []
+    query = {'limit': 20}
+    while True:
+        data = client.get('/api/notifications', query_string=query).get_json()
+        seen += [notification['id'] for notification in data['notifications']]
+        page_sizes.append(len(data['notifications']))
+        if not data['next_before']:
+            break
+        query['before'] = data['next_before']
+    assert seen == newest_first and page_sizes == [20, 20, 5]
+    assert client.get('/api/notifications?before=not-a-cursor').status_code == 400
+
+    response = client.post('/api/notifications/mark-read', json={'ids': seen[:10]})
+    assert response.get_json()['marked'] == 10 and response.get_json()['unread_count'] == 35
+    response = client.post('/api/notifications/mark-read', json={'ids': seen[:10]})
+    assert response.get_json()['marked'] == 0 and response.get_json()['unread_count'] == 35
+
+    # The notifications page marks everything read
+    assert client.get('/notifications').status_code == 200
+    with app.app_context():
+        assert db.session.get(User, user_id).unread_notifications == 0
+        assert Notification.query.filter_by(recipient_id=user_id, read=False).count() == 0
+    logging.info(f"Notification pages: {page_sizes}")
+
+
+def test_request_scoped_context():
+    """The current project is looked up once per request, and the unread summary follows the counter."""
+    user_id, project_id = create_sample_project('request_context')
+
+    with app.test_request_context():
+        user = db.session.get(User, user_id)
+        login_user(user)
+
+        project = get_current_project()
+        assert project.id == project_id
+        with count_queries() as statements:
+            assert get_current_project() is project
+        assert statements == []
+
+        # Switching projects drops the memoized one
+        other_project = Project(name='request_context other project', creator_id=user_id)
+        db.session.add(other_project)
+        db.session.flush()
+        db.session.add(ProjectAccess(project_id=other_project.id, user_id=user_id, role=Role.DIRECTOR))
+        db.session.commit()
+        set_current_project(other_project.id)
+        assert 'current_project' not in g
+        assert get_current_project().id == other_project.id
+
+        assert unread_summary(user) == {'count': 0, 'latest': []}
+        schedule_id = create_schedule(project_id, datetime.date(2041, 2, 1), scene_limit=1)
+        add_notifications([{'schedule_id': schedule_id, 'recipient_id': user_id, 'message': f'Notification {i}'}
+                           for i in range(2)])
+        db.session.commit()
+
+        summary = unread_summary(user)
+        assert summary['count'] == 2 and len(summary['latest']) == 2
+        with count_queries() as statements:
+            assert unread_summary(user) == summary
+        assert statements == []
+
+        mark_read(user_id)
+        db.session.commit()
+        assert unread_summary(user) == {'count': 0, 'latest': []}
+    logging.info("Request context: project and unread summary memoized")
+
+
+if __name__ == "__main__":
+    test_pareto_run_is_not_polished()
+    test_double_booking_index()
+    test_nightly_reoptimization()
+    test_admission_control()
+    test_optimization_inputs()
+    test_availability_ranges()
+    test_bulk_availability_api()
+    test_migrations_and_indexes()
+    test_schedule_view_queries()
+    test_call_sheets()
+    test_bulk_scheduled_scenes()
+    test_approval_notifications()
+    test_notification_paging()
+    test_request_scoped_context()
@@ -1,11 +1,22 @@
 import datetime
 import json
-from flask import session
+import numpy as np
+from flask import g, session
 from models import (
-    Project, ProjectAccess, ActorAvailability, LocationAvailability,
-    Actor, Location
+    Project, ProjectAccess, Actor, Location, Scene, ActorScene, ScheduledScene, normalize_actor_identity
 )
 from flask_login import current_user
+from app import db
+from booking_index import booked_elsewhere, record_bookings
+from call_sheets import record_call_sheets
+from availability_store import (
+    actor_availability_days, location_availability_days,
+    actor_availability_ranges, location_availability_ranges
+)
+from problem_instance import (
+    ProblemInstance, build_date_range, _clock_hours,
+    DAY_START_HOUR, DAY_END_HOUR, DEFAULT_SCENE_DURATION
+)
 
 # Allowed file extensions for screenplay uploads
 ALLOWED_EXTENSIONS = {'pdf'}
@@ -15,10 +26,14 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def get_current_project():
-    """Get the current active project for the user."""
+    """Get the current active project for the user (looked up once per request)."""
     if not current_user.is_authenticated:
         return None
     
+    # Views and the template context processor all ask; only the first call queries
+    if 'current_project' in g:
+        return g.current_project
+    
     project_id = session.get('current_project_id')
     
     if not project_id:
@@ -29,14 +44,13 @@ def get_current_project():
             project_id = project_access.project_id
             session['current_project_id'] = project_id
     
-    if project_id:
-        return Project.query.get(project_id)
-    
-    return None
+    g.current_project = db.session.get(Project, project_id) if project_id else None
+    return g.current_project
 
 def set_current_project(project_id):
     """Set the current active project for the user."""
     session['current_project_id'] = project_id
+    g.pop('current_project', None)
 
 def format_date_for_json(date_obj):
     """Format a date object for JSON serialization."""
@@ -46,45 +60,246 @@ def format_date_for_json(date_obj):
 
 def get_actor_availability_data(project_id):
     """Get actor availability data formatted for JS."""
-    actors = Actor.query.filter_by(project_id=project_id).all()
+    availability_data = {actor_id: {} for actor_id, in db.session.query(Actor.id).filter_by(project_id=project_id)}
     
-    availability_data = {}
-    
-    for actor in actors:
-        availability_data[actor.id] = {}
-        
-        # Get all availability records
-        availabilities = ActorAvailability.query.filter_by(actor_id=actor.id).all()
-        
-        for avail in availabilities:
-            date_str = format_date_for_json(avail.date)
-            availability_data[actor.id][date_str] = avail.is_available
+    # Expand the stored ranges into the per-date view the calendar expects
+    for actor_id, date, is_available in actor_availability_days(project_id):
+        availability_data[actor_id][format_date_for_json(date)] = is_available
     
     return json.dumps(availability_data)
 
 def get_location_availability_data(project_id):
     """Get location availability data formatted for JS."""
-    locations = Location.query.filter_by(project_id=project_id).all()
+    availability_data = {location_id: {} for location_id, in db.session.query(Location.id).filter_by(project_id=project_id)}
     
-    availability_data = {}
+    for location_id, date, is_available, start_time, end_time in location_availability_days(project_id):
+        # Format times
+        availability_data[location_id][format_date_for_json(date)] = {
+            'is_available': is_available,
+            'start_time': start_time.strftime('%H:%M') if start_time else None,
+            'end_time': end_time.strftime('%H:%M') if end_time else None
+        }
     
-    for location in locations:
-        availability_data[location.id] = {}
-        
-        # Get all availability records
-        availabilities = LocationAvailability.query.filter_by(location_id=location.id).all()
+    return json.dumps(availability_data)
+
+def _project_cast(project_id):
+    """(scene_id, actor_id) pairs of a project's cast links, in one column-only query."""
+    return db.session.query(ActorScene.scene_id, ActorScene.actor_id).join(
+        Scene, Scene.id == ActorScene.scene_id
+    ).filter(Scene.project_id == project_id).order_by(ActorScene.id).all()
+
+def get_optimization_inputs(project_id):
+    """
+    Load everything the optimize_schedule_* functions take for a project.
+
+    Availability and cast links are read with one set-based query each
+    rather than one query per actor, location or scene; availability ranges
+    are expanded into the per-date dicts the optimizers take.
+
+    Returns:
+        Tuple of (scenes, actors, locations, actor_availability, location_availability, actor_scenes)
+    """
+    scenes = Scene.query.filter_by(project_id=project_id).order_by(Scene.id).all()
+    actors = Actor.query.filter_by(project_id=project_id).order_by(Actor.id).all()
+    locations = Location.query.filter_by(project_id=project_id).order_by(Location.id).all()
+    
+    # Get actor availability
+    actor_availability = {actor.id: {} for actor in actors}
+    for actor_id, date, is_available in actor_availability_days(project_id):
+        actor_availability[actor_id][date.strftime('%Y-%m-%d')] = is_available
+    
+    # Get location availability
+    location_availability = {location.id: {} for location in locations}
+    for location_id, date, is_available, start_time, end_time in location_availability_days(project_id):
+        location_availability[location_id][date.strftime('%Y-%m-%d')] = {
+            'is_available': is_available,
+            'start_time': start_time.strftime('%H:%M') if start_time else None,
+            'end_time': end_time.strftime('%H:%M') if end_time else None
+        }
+    
+    # The same person booked by another project's approved schedule is not available here
+    identities = {actor.id: actor.identity for actor in actors}
+    for actor_id, dates in booked_elsewhere(project_id, identities).items():
+        for date in dates:
+            actor_availability[actor_id][date.strftime('%Y-%m-%d')] = False
+    
+    # Get actor-scene relationships
+    actor_scenes = {scene.id: [] for scene in scenes}
+    for scene_id, actor_id in _project_cast(project_id):
+        actor_scenes[scene_id].append(actor_id)
+    
+    return scenes, actors, locations, actor_availability, location_availability, actor_scenes
+
+def _positions(ids, values):
+    """Positions of values in the sorted id array, and which values were found at all."""
+    positions = np.minimum(np.searchsorted(ids, values), max(len(ids) - 1, 0))
+    found = (ids[positions] == values) if len(ids) else np.zeros(len(values), dtype=bool)
+    return positions, found
+
+def _day_slice(first, last, dates):
+    """Slice of the instance calendar covered by an inclusive date range."""
+    return slice(max(0, (first - dates[0]).days), (last - dates[0]).days + 1)
+
+def load_problem_instance(project_id, start_date, end_date=None):
+    """
+    Compile a project straight into a ProblemInstance without loading ORM objects.
+
+    Builds the same instance as ProblemInstance.from_models() over
+    get_optimization_inputs(), fingerprint included, from seven column-only
+    queries whose rows go directly into the instance arrays (availability
+    ranges as whole slices). Use it wherever only the instance is needed.
+
+    Args:
+        project_id: Project to compile
+        start_date: First possible shooting date
+        end_date: Last possible shooting date (optional)
+
+    Returns:
+        ProblemInstance
+    """
+    scene_rows = db.session.query(
+        Scene.id, Scene.scene_number, Scene.description, Scene.location_id, Scene.estimated_duration,
+        Scene.priority, Scene.int_ext, Scene.time_of_day
+    ).filter(Scene.project_id == project_id).order_by(Scene.id).all()
+    actor_rows = db.session.query(Actor.id, Actor.cost_per_day, Actor.email, Actor.name).filter(
+        Actor.project_id == project_id
+    ).order_by(Actor.id).all()
+    location_rows = db.session.query(Location.id, Location.cost_per_day, Location.name).filter(
+        Location.project_id == project_id
+    ).order_by(Location.id).all()
+    
+    dates = build_date_range(start_date, end_date, len(scene_rows))
+    scene_ids = np.array([row.id for row in scene_rows], dtype=np.int64)
+    actor_ids = np.array([row.id for row in actor_rows], dtype=np.int64)
+    location_ids = np.array([row.id for row in location_rows], dtype=np.int64)
+    
+    # Cast links and scene locations as index arrays
+    incidence = np.zeros((len(scene_ids), len(actor_ids)), dtype=bool)
+    # Plain tuples: numpy probes Row objects for array protocols key by key
+    cast = np.array([tuple(row) for row in _project_cast(project_id)], dtype=np.int64).reshape(-1, 2)
+    scene_positions, _ = _positions(scene_ids, cast[:, 0])
+    actor_positions, found = _positions(actor_ids, cast[:, 1])
+    incidence[scene_positions[found], actor_positions[found]] = True
+    
+    scene_locations = np.array([row.location_id if row.location_id is not None else -1 for row in scene_rows],
+                               dtype=np.int64)
+    location_positions, found = _positions(location_ids, scene_locations)
+    scene_location = np.where(found, location_positions, -1)
+    
+    # Availability ranges fill day bitmaps over the instance calendar one slice each;
+    # dates without a range are available
+    actor_available = np.ones((len(actor_ids), len(dates)), dtype=bool)
+    actor_index = {actor_id: i for i, actor_id in enumerate(actor_ids.tolist())}
+    for actor_id, first, last, is_available in actor_availability_ranges(project_id, dates[0], dates[-1]):
+        actor_available[actor_index[actor_id], _day_slice(first, last, dates)] = bool(is_available)
+    
+    identities = {row.id: normalize_actor_identity(row.email, row.name) for row in actor_rows}
+    for actor_id, booked_dates in booked_elsewhere(project_id, identities, dates[0], dates[-1]).items():
+        for date in booked_dates:
+            actor_available[actor_index[actor_id], (date - dates[0]).days] = False
+    
+    location_available = np.ones((len(location_ids), len(dates)), dtype=bool)
+    location_open = np.full((len(location_ids), len(dates)), DAY_START_HOUR)
+    location_close = np.full((len(location_ids), len(dates)), DAY_END_HOUR)
+    location_index = {location_id: i for i, location_id in enumerate(location_ids.tolist())}
+    for location_id, first, last, is_available, start_time, end_time in location_availability_ranges(
+            project_id, dates[0], dates[-1]):
+        loc, days = location_index[location_id], _day_slice(first, last, dates)
+        location_available[loc, days] = bool(is_available)
+        location_open[loc, days] = _clock_hours(start_time, DAY_START_HOUR)
+        location_close[loc, days] = _clock_hours(end_time, DAY_END_HOUR)
+    
+    return ProblemInstance(
+        scene_ids=scene_ids,
+        actor_ids=actor_ids,
+        location_ids=location_ids,
+        dates=dates,
+        scene_location=scene_location,
+        incidence=incidence,
+        actor_cost=[row.cost_per_day or 0 for row in actor_rows],
+        location_cost=[row.cost_per_day or 0 for row in location_rows],
+        actor_available=actor_available,
+        location_available=location_available,
+        durations=[row.estimated_duration or DEFAULT_SCENE_DURATION for row in scene_rows],
+        priorities=[row.priority or 5 for row in scene_rows],
+        scene_info=[{
+            'scene_id': row.id,
+            'scene_number': row.scene_number,
+            'description': row.description,
+            'location_id': row.location_id,
+            'int_ext': row.int_ext,
+            'time_of_day': row.time_of_day
+        } for row in scene_rows],
+        location_names=[row.name for row in location_rows],
+        location_open=location_open,
+        location_close=location_close
+    )
+
+def _parse_clock(value, default):
+    """Parse an 'HH:MM:SS' or 'HH:MM' time string, falling back to default."""
+    for time_format in ('%H:%M:%S', '%H:%M'):
+        try:
+            return datetime.datetime.strptime(value, time_format).time()
+        except ValueError:
+            continue
+    return default
+
+def _as_date(value):
+    """A shooting date from an optimizer result: date objects as they are, 'YYYY-MM-DD' strings parsed."""
+    if isinstance(value, str):
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+def _as_time(value, default):
+    """A scene time from an optimizer result: time objects as they are, strings parsed (default if unparseable)."""
+    if isinstance(value, str):
+        return _parse_clock(value, default)
+    return value
+
+def add_scheduled_scenes(schedule_id, optimal_schedule):
+    """
+    Write the ScheduledScene rows of an optimizer's schedule dict in one bulk insert.
+    
+    Dates and times are used as the optimizer typed them; strings (from
+    results that went through JSON) are parsed. The rows, their actor
+    bookings and call sheets join the session's transaction; the caller
+    commits.
+    
+    Args:
+        schedule_id: Schedule the rows belong to (already flushed)
+        optimal_schedule: Dict mapping scene ids to scene dicts
+    """
+    rows = []
+    for scene_id, scene_data in optimal_schedule.items():
+        if isinstance(scene_id, int):
+            scene_id_int = scene_id
+        elif isinstance(scene_id, str) and scene_id.isdigit():
+            scene_id_int = int(scene_id)
+        else:
+            scene_id_int = scene_data.get('scene_id')
         
-        for avail in availabilities:
-            date_str = format_date_for_json(avail.date)
-            
-            # Format times
-            start_time = avail.start_time.strftime('%H:%M') if avail.start_time else None
-            end_time = avail.end_time.strftime('%H:%M') if avail.end_time else None
-            
-            availability_data[location.id][date_str] = {
-                'is_available': avail.is_available,
-                'start_time': start_time,
-                'end_time': end_time
-            }
+        # A missing time means the slotting stage found no room and stays empty
+        rows.append({
+            'schedule_id': schedule_id,
+            'scene_id': scene_id_int,
+            'shooting_date': _as_date(scene_data.get('shooting_date') or scene_data.get('date')),
+            'start_time': _as_time(scene_data.get('start_time'), datetime.time(8, 0)),  # Default start time 8:00 AM
+            'end_time': _as_time(scene_data.get('end_time'), datetime.time(18, 0)),  # Default end time 6:00 PM
+            'estimated_cost': float(scene_data.get('estimated_cost', scene_data.get('cost', 0)) or 0)
+        })
+    if not rows:
+        return
     
-    return json.dumps(availability_data)
+    # One executemany instead of an ORM object (and flush) per scene
+    db.session.execute(ScheduledScene.__table__.insert(), rows)
+    
+    # Keep the cross-project actor booking index in step with the new rows
+    record_bookings(schedule_id, [(row['scene_id'], row['shooting_date']) for row in rows])
+    
+    # Compute every shooting day's call sheet once, so viewing a day is a single read
+    record_call_sheets(schedule_id, [
+        (row['scene_id'], row['shooting_date'], row['start_time'], row['end_time'], row['estimated_cost'])
+        for row in rows
+    ])